@@ -1,12 +1,17 @@
-from typing import List, Callable
+import heapq
+from typing import List, Callable, Iterable, Optional, Tuple
+import events
+from stat_tracking import StatIndex
 
 class Achievement:
-    def __init__(self, name: str, description: str, condition: Callable, reward_gold: int = 0, reward_exp: int = 0):
+    def __init__(self, name: str, description: str, condition: Callable, reward_gold: int = 0, reward_exp: int = 0,
+                 stats: Iterable[str] = ()):
         self.name = name
         self.description = description
         self.condition = condition
         self.reward_gold = reward_gold
         self.reward_exp = reward_exp
+        self.stats = tuple(stats)  # Hero stats the condition reads
         self.unlocked = False
     
     def check_condition(self, hero) -> bool:
@@ -19,6 +24,15 @@ class Achievement:
 class AchievementSystem:
     def __init__(self):
         self.achievements = self._create_achievements()
+        self._snapshot: Optional[Tuple[bool, ...]] = None  # Cached until an achievement unlocks
+        self._hero = None  # The hero whose stat changes feed the index
+        self._build_index()
+    
+    def _build_index(self):
+        self._index = StatIndex()
+        for key, achievement in enumerate(self.achievements):
+            if not achievement.unlocked:
+                self._index.subscribe(key, achievement.stats)
     
     def _create_achievements(self) -> List[Achievement]:
         """Create all available achievements"""
@@ -27,74 +41,126 @@ class AchievementSystem:
                 "First Victory",
                 "Win your first battle",
                 lambda hero: hasattr(hero, 'battles_won') and hero.battles_won >= 1,
-                50, 25
+                50, 25,
+                stats=["battles_won"]
             ),
             Achievement(
                 "Level Up",
                 "Reach level 2",
                 lambda hero: hero.level >= 2,
-                25, 50
+                25, 50,
+                stats=["level"]
             ),
             Achievement(
                 "Warrior",
                 "Win 10 battles",
                 lambda hero: hasattr(hero, 'battles_won') and hero.battles_won >= 10,
-                200, 100
+                200, 100,
+                stats=["battles_won"]
             ),
             Achievement(
                 "Rich Adventurer",
                 "Accumulate 500 gold",
                 lambda hero: hero.gold >= 500,
-                0, 100
+                0, 100,
+                stats=["gold"]
             ),
             Achievement(
                 "Elite Slayer",
                 "Defeat an elite enemy",
                 lambda hero: hasattr(hero, 'elite_kills') and hero.elite_kills >= 1,
-                100, 75
+                100, 75,
+                stats=["elite_kills"]
             ),
             Achievement(
                 "Boss Hunter",
                 "Defeat a boss enemy",
                 lambda hero: hasattr(hero, 'boss_kills') and hero.boss_kills >= 1,
-                300, 200
+                300, 200,
+                stats=["boss_kills"]
             ),
             Achievement(
                 "Mage",
                 "Cast 20 spells",
                 lambda hero: hasattr(hero, 'spells_cast') and hero.spells_cast >= 20,
-                150, 100
+                150, 100,
+                stats=["spells_cast"]
             ),
             Achievement(
                 "Survivor",
                 "Survive 50 battles",
                 lambda hero: hasattr(hero, 'battles_fought') and hero.battles_fought >= 50,
-                500, 250
+                500, 250,
+                stats=["battles_fought"]
             ),
             Achievement(
                 "Master",
                 "Reach level 10",
                 lambda hero: hero.level >= 10,
-                1000, 500
+                1000, 500,
+                stats=["level"]
             )
         ]
     
     def check_achievements(self, hero) -> List[Achievement]:
-        """Check all achievements and return newly unlocked ones"""
+        """Check achievements whose stats changed and return newly unlocked ones"""
         newly_unlocked = []
-        for achievement in self.achievements:
+        if hero is not self._hero:
+            self._watch(hero)
+        
+        # Visit dirty achievements in list order. Rewards can change stats mid-pass;
+        # achievements later in the list see that change now, earlier ones next time.
+        pending = self._index.collect_dirty()
+        heapq.heapify(pending)
+        while pending:
+            key = heapq.heappop(pending)
+            achievement = self.achievements[key]
             if achievement.check_condition(hero):
+                self._index.unsubscribe(key, achievement.stats)
+                self._snapshot = None
                 newly_unlocked.append(achievement)
-                print(f"🏆 Achievement Unlocked: {achievement.name}")
-                print(f"   {achievement.description}")
+                events.emit("achievement_unlocked", achievement=achievement.name,
+                            description=achievement.description)
                 if achievement.reward_gold > 0:
-                    hero.gold += achievement.reward_gold
-                    print(f"   Reward: {achievement.reward_gold} gold!")
+                    hero.change_stat("gold", achievement.reward_gold)
+                    events.emit("reward_gold", source=achievement.name, amount=achievement.reward_gold)
                 if achievement.reward_exp > 0:
                     hero.gain_experience(achievement.reward_exp)
-                    print(f"   Reward: {achievement.reward_exp} experience!")
+                    events.emit("reward_experience", source=achievement.name, amount=achievement.reward_exp)
+                for changed in self._index.collect_dirty():
+                    if changed > key:
+                        heapq.heappush(pending, changed)
+                    else:
+                        self._index.mark_dirty(changed)
         return newly_unlocked
     
+    def snapshot(self) -> Tuple[bool, ...]:
+        """Unlocked flag of every achievement; the same tuple is returned until one unlocks"""
+        if self._snapshot is None:
+            self._snapshot = tuple(achievement.unlocked for achievement in self.achievements)
+        return self._snapshot
+    
+    def restore(self, snapshot: Tuple[bool, ...]):
+        """Return to a state from snapshot(), rebuilding the stat index if any flag differs"""
+        if snapshot is self._snapshot or snapshot == self.snapshot():
+            return
+        for achievement, unlocked in zip(self.achievements, snapshot):
+            achievement.unlocked = unlocked
+        self._snapshot = snapshot
+        self._build_index()
+    
+    def _watch(self, hero):
+        """Follow `hero`'s stat changes instead of the previous hero's, re-checking everything once"""
+        if self._hero is not None:
+            self._hero.unwatch_stats(self.stat_changed)
+        hero.watch_stats(self.stat_changed)
+        self._hero = hero
+        self._index.mark_all_dirty()
+    
+    def stat_changed(self, *stats: str):
+        """Stat listener of the watched hero: re-check only the achievements that depend on `stats`"""
+        self._index.mark_changed(*stats)
+    
     def show_achievements(self, hero):
         """Display all achievements and their status"""
         print("\n=== ACHIEVEMENTS ===")
@@ -0,0 +1,457 @@
+"""
+Auto Battle for Text-Based Battle Game
+
+MCTSAgent plays the hero's side of a fight. Every turn it picks between
+attacking, each learned spell and a healing potion by Monte Carlo Tree
+Search over a CombatState: a few integers (health, mana, potions) plus the
+fixed CombatRules of the fight. The rules hold the hero's and the enemy's
+damage distributions, which come from their AttackProfiles as in
+battle_odds, and the cost and effect of each spell. States clone cheaply
+and never print or emit events, so a search plays thousands of turns in
+the time one real turn takes to draw.
+
+The search is open-loop: tree nodes stand for sequences of hero actions,
+and every iteration plays the random rolls afresh from the current state.
+Leaves are valued by a quick rollout that mostly plays greedily. A win is
+worth more the more health the hero keeps, and each potion drunk costs a
+little, since health and potions carry over to the next fight.
+
+The budget per decision is a number of rollouts, a time limit, or both.
+With several workers the rollouts are split between independent searches
+(root parallelization) on a process pool, or on any executor that is
+passed in, and their root statistics are added up. Search seeds are
+derived from the agent's seed, so with a rollout budget a seeded agent
+makes the same choices on every run with the same number of workers.
+
+    agent = MCTSAgent(rollouts=100)
+    action = agent.choose(hero, enemy)    # ATTACK, POTION or a Spell
+    simulate_battle(hero, enemy, agent)   # auto-resolve a whole fight
+
+Usage: python auto_battle.py 200 --class Mage --level 3 [--rollouts 48] [--workers 4] [--seed 1]
+"""
+
+import argparse
+import contextlib
+import math
+import os
+import random
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import events
+import rng as rng_streams
+from battle_odds import damage_distribution, enemy_turn_distribution
+from character_classes import AVAILABLE_CLASSES
+from enemy_pool import ENEMY_POOL
+from game_utils import EnemyGenerator
+from rng import GameRNG, derive_seed
+from simulation import ATTACK, POTION, POLICIES, build_hero, simulate_battle
+
+# Rollouts per decision by default
+DEFAULT_ROLLOUTS = 48
+
+# UCT exploration constant for values between 0 and 1
+EXPLORATION = 1.0
+
+# A won fight is worth WIN_VALUE plus the rest scaled by the health left
+WIN_VALUE = 0.8
+POTION_COST = 0.02
+
+# Chance that a rollout plays a random action instead of the greedy one
+ROLLOUT_RANDOMNESS = 0.25
+
+# Rollouts treat the hero as in danger below this share of max health
+LOW_HEALTH = 0.3
+
+# Safety cap for fights where neither side can deal damage
+MAX_ROLLOUT_TURNS = 200
+
+# How often (in iterations) a timed search checks the clock
+CLOCK_INTERVAL = 16
+
+POTION_HEAL = (20, 40)
+DAMAGE_SPELL_SPREAD = 2
+HEAL_SPELL_SPREAD = 5
+
+# Action codes; spell i of the hero is FIRST_SPELL + i
+ATTACK_ACTION = 0
+POTION_ACTION = 1
+FIRST_SPELL = 2
+
+
+def _cumulative(distribution: Dict[int, float]) -> Tuple[Tuple[float, int], ...]:
+    """(cumulative probability, damage) pairs for drawing from a damage distribution"""
+    total = 0.0
+    pairs = []
+    for damage, p in sorted(distribution.items()):
+        total += p
+        pairs.append((total, damage))
+    return tuple(pairs)
+
+
+def _uniform(low: int, high: int, rng) -> int:
+    """Same distribution as rng.randint(low, high), at a fraction of the cost"""
+    return low + int(rng.random() * (high - low + 1))
+
+
+def _draw(cumulative: Tuple[Tuple[float, int], ...], rng) -> int:
+    roll = rng.random()
+    for threshold, damage in cumulative:
+        if roll < threshold:
+            return damage
+    return cumulative[-1][1]
+
+
+class CombatRules:
+    """What stays fixed for the rest of a fight"""
+
+    __slots__ = ("hero_attack", "enemy_turn", "attack_mean", "spells", "mana_regen", "hero_health_max",
+                 "damage_order", "low_health")
+
+    def __init__(self, hero, enemy):
+        attack = damage_distribution(hero)
+        self.hero_attack = _cumulative(attack)
+        self.enemy_turn = _cumulative(enemy_turn_distribution(enemy))
+        self.attack_mean = sum(damage * p for damage, p in attack.items())
+        self.mana_regen = hero.mana_max // 10
+        self.hero_health_max = hero.health_max
+
+        # (mana cost, spell type, power) with the class mana bonus applied as in Character.cast_spell
+        mana_bonus = 1.0
+        if hasattr(hero, 'character_class'):
+            from character_classes import get_class_mana_bonus
+            mana_bonus = get_class_mana_bonus(hero.character_class)
+        self.spells = tuple((int(spell.mana_cost * mana_bonus), spell.spell_type, spell.damage)
+                            for spell in hero.spells)
+
+        # Damage spells stronger than an attack, strongest first, then the attack itself
+        stronger = [(power, FIRST_SPELL + index) for index, (_, spell_type, power) in enumerate(self.spells)
+                    if spell_type == "damage" and power > self.attack_mean]
+        self.damage_order = tuple(action for _, action in sorted(stronger, reverse=True)) + (ATTACK_ACTION,)
+        self.low_health = self.hero_health_max * LOW_HEALTH
+
+
+class CombatState:
+    """The changing part of a fight, at the point where the hero picks an action"""
+
+    __slots__ = ("hero_health", "hero_mana", "hero_mana_max", "potions", "potions_used", "enemy_health")
+
+    def __init__(self, hero_health: int, hero_mana: int, hero_mana_max: int, potions: int, enemy_health: int):
+        self.hero_health = hero_health
+        self.hero_mana = hero_mana
+        self.hero_mana_max = hero_mana_max
+        self.potions = potions
+        self.potions_used = 0
+        self.enemy_health = enemy_health
+
+    @classmethod
+    def from_characters(cls, hero, enemy) -> "CombatState":
+        return cls(hero.health, hero.mana, hero.mana_max, getattr(hero, 'potions', 0), enemy.health)
+
+    def clone(self) -> "CombatState":
+        state = CombatState.__new__(CombatState)
+        state.hero_health = self.hero_health
+        state.hero_mana = self.hero_mana
+        state.hero_mana_max = self.hero_mana_max
+        state.potions = self.potions
+        state.potions_used = self.potions_used
+        state.enemy_health = self.enemy_health
+        return state
+
+    @property
+    def finished(self) -> bool:
+        return self.hero_health <= 0 or self.enemy_health <= 0
+
+    def legal_actions(self, rules: CombatRules) -> List[int]:
+        """Actions that do something: buff spells are left out because battles ignore their effect"""
+        hurt = self.hero_health < rules.hero_health_max
+        actions = [ATTACK_ACTION]
+        if self.potions > 0 and hurt:
+            actions.append(POTION_ACTION)
+        for index, (cost, spell_type, _) in enumerate(rules.spells):
+            if cost <= self.hero_mana and (spell_type == "damage" or (spell_type == "heal" and hurt)):
+                actions.append(FIRST_SPELL + index)
+        return actions
+
+    def step(self, action: int, rules: CombatRules, rng):
+        """Play the hero's action, the enemy's reply and the start of the next turn"""
+        if action == ATTACK_ACTION:
+            self.enemy_health -= _draw(rules.hero_attack, rng)
+        elif action == POTION_ACTION:
+            self.potions -= 1
+            self.potions_used += 1
+            self.hero_health = min(self.hero_health + _uniform(*POTION_HEAL, rng), rules.hero_health_max)
+        else:
+            cost, spell_type, power = rules.spells[action - FIRST_SPELL]
+            self.hero_mana -= cost
+            if spell_type == "damage":
+                self.enemy_health -= power + _uniform(-DAMAGE_SPELL_SPREAD, DAMAGE_SPELL_SPREAD, rng)
+            elif spell_type == "heal":
+                amount = power + _uniform(-HEAL_SPELL_SPREAD, HEAL_SPELL_SPREAD, rng)
+                self.hero_health = min(self.hero_health + amount, rules.hero_health_max)
+
+        if self.enemy_health > 0:
+            self.hero_health -= _draw(rules.enemy_turn, rng)
+            if self.hero_health > 0:
+                self.hero_mana = min(self.hero_mana + rules.mana_regen, self.hero_mana_max)
+
+    def value(self, rules: CombatRules) -> float:
+        """Worth of a finished fight to the hero, between 0 (lost) and 1 (won unhurt)"""
+        if self.hero_health <= 0 or self.enemy_health > 0:
+            return 0.0
+        health = self.hero_health / rules.hero_health_max
+        return max(WIN_VALUE + (1.0 - WIN_VALUE) * health - POTION_COST * self.potions_used, 0.0)
+
+    def greedy_action(self, rules: CombatRules, actions: List[int]) -> int:
+        """Heal when in danger, otherwise pick the action with the highest expected damage"""
+        if self.hero_health < rules.low_health:
+            for action in actions:
+                if action == POTION_ACTION or (action >= FIRST_SPELL and
+                                               rules.spells[action - FIRST_SPELL][1] == "heal"):
+                    return action
+        for action in rules.damage_order:
+            if action in actions:
+                return action
+        return ATTACK_ACTION
+
+    def rollout(self, rules: CombatRules, rng) -> float:
+        """Play the fight out with a mostly greedy policy and return its value.
+
+        This is where searches spend their time, so step() and the greedy
+        choice are inlined here over local variables.
+        """
+        draw = rng.random
+        hero_attack, enemy_turn, spells = rules.hero_attack, rules.enemy_turn, rules.spells
+        health_max, low_health, mana_regen = rules.hero_health_max, rules.low_health, rules.mana_regen
+        damage_order = rules.damage_order
+        health, mana, mana_max = self.hero_health, self.hero_mana, self.hero_mana_max
+        potions, potions_used, enemy_health = self.potions, self.potions_used, self.enemy_health
+
+        turns = 0
+        while health > 0 and enemy_health > 0 and turns < MAX_ROLLOUT_TURNS:
+            turns += 1
+            action = ATTACK_ACTION
+            if draw() < ROLLOUT_RANDOMNESS:
+                self.hero_health, self.hero_mana, self.potions = health, mana, potions
+                actions = self.legal_actions(rules)
+                action = actions[int(draw() * len(actions))]
+            elif health < low_health and potions > 0:
+                action = POTION_ACTION
+            else:
+                for candidate in damage_order:
+                    if candidate == ATTACK_ACTION or spells[candidate - FIRST_SPELL][0] <= mana:
+                        action = candidate
+                        break
+
+            if action == ATTACK_ACTION:
+                roll = draw()
+                for threshold, damage in hero_attack:
+                    if roll < threshold:
+                        break
+                enemy_health -= damage
+            elif action == POTION_ACTION:
+                potions -= 1
+                potions_used += 1
+                health = min(health + POTION_HEAL[0] + int(draw() * (POTION_HEAL[1] - POTION_HEAL[0] + 1)),
+                             health_max)
+            else:
+                cost, spell_type, power = spells[action - FIRST_SPELL]
+                mana -= cost
+                if spell_type == "damage":
+                    enemy_health -= power - DAMAGE_SPELL_SPREAD + int(draw() * (2 * DAMAGE_SPELL_SPREAD + 1))
+                elif spell_type == "heal":
+                    health = min(health + power - HEAL_SPELL_SPREAD + int(draw() * (2 * HEAL_SPELL_SPREAD + 1)),
+                                 health_max)
+
+            if enemy_health > 0:
+                roll = draw()
+                for threshold, damage in enemy_turn:
+                    if roll < threshold:
+                        break
+                health -= damage
+                if health > 0:
+                    mana = min(mana + mana_regen, mana_max)
+
+        self.hero_health, self.hero_mana, self.potions = health, mana, potions
+        self.potions_used, self.enemy_health = potions_used, enemy_health
+        return self.value(rules)
+
+
+class _Node:
+    __slots__ = ("visits", "total", "children")
+
+    def __init__(self):
+        self.visits = 0
+        self.total = 0.0
+        self.children: Dict[int, "_Node"] = {}
+
+
+def search(state: CombatState, rules: CombatRules, rollouts: Optional[int], time_limit: Optional[float],
+           seed: int) -> Dict[int, Tuple[int, float]]:
+    """Run one MCTS from `state` and return (visits, total value) of each root action.
+
+    Stops after `rollouts` iterations or `time_limit` seconds, whichever comes first.
+    """
+    rng = random.Random(seed)
+    root = _Node()
+    deadline = time.perf_counter() + time_limit if time_limit is not None else None
+    iteration = 0
+    while rollouts is None or iteration < rollouts:
+        if deadline is not None and iteration % CLOCK_INTERVAL == 0 and time.perf_counter() >= deadline:
+            break
+        iteration += 1
+
+        simulated = state.clone()
+        node = root
+        path = [root]
+        # Selection down the tree, expanding the first untried action met
+        while not simulated.finished:
+            actions = simulated.legal_actions(rules)
+            children = node.children
+            untried = [action for action in actions if action not in children]
+            if untried:
+                action = rng.choice(untried)
+                node = children[action] = _Node()
+                simulated.step(action, rules, rng)
+                path.append(node)
+                break
+            log_visits = math.log(node.visits)
+            action = max(actions, key=lambda a: children[a].total / children[a].visits
+                         + EXPLORATION * math.sqrt(log_visits / children[a].visits))
+            node = children[action]
+            simulated.step(action, rules, rng)
+            path.append(node)
+
+        value = simulated.rollout(rules, rng)
+        for visited in path:
+            visited.visits += 1
+            visited.total += value
+
+    return {action: (child.visits, child.total) for action, child in root.children.items()}
+
+
+class MCTSAgent:
+    """Chooses the hero's combat actions by Monte Carlo Tree Search.
+
+    Also usable as a simulation policy: agent(hero, enemy) returns ATTACK,
+    POTION or the Spell to cast.
+    """
+
+    def __init__(self, rollouts: Optional[int] = DEFAULT_ROLLOUTS, time_limit: Optional[float] = None,
+                 workers: int = 1, executor: Optional[Executor] = None, rng=None):
+        if rollouts is None and time_limit is None:
+            raise ValueError("An MCTS agent needs a rollout budget, a time limit or both")
+        self.rollouts = rollouts
+        self.time_limit = time_limit
+        self.workers = max(1, workers)
+        self._executor = executor
+        self._owns_executor = False
+        # Search seeds come from this stream; seeding it from the game's stream keeps seeded games reproducible
+        self._rng = random.Random(rng_streams.resolve(rng).getrandbits(64))
+        self.last_search: Dict[int, Tuple[int, float]] = {}
+
+    def __enter__(self) -> "MCTSAgent":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    def close(self):
+        """Shut down the process pool if the agent started one"""
+        if self._owns_executor:
+            self._executor.shutdown()
+            self._executor = None
+            self._owns_executor = False
+
+    def choose(self, hero, enemy):
+        """Best action for the hero this turn: ATTACK, POTION or a Spell"""
+        rules = CombatRules(hero, enemy)
+        state = CombatState.from_characters(hero, enemy)
+        actions = state.legal_actions(rules)
+        if len(actions) == 1:
+            return self._to_policy_action(actions[0], hero)
+
+        seed = self._rng.getrandbits(64)
+        if self.workers == 1 and self._executor is None:
+            stats = search(state, rules, self.rollouts, self.time_limit, seed)
+        else:
+            stats = self._parallel_search(state, rules, seed)
+        self.last_search = stats
+
+        best = max(stats, key=lambda action: stats[action])
+        return self._to_policy_action(best, hero)
+
+    __call__ = choose
+
+    def _parallel_search(self, state: CombatState, rules: CombatRules, seed: int) -> Dict[int, Tuple[int, float]]:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            self._owns_executor = True
+        share = None if self.rollouts is None else -(-self.rollouts // self.workers)
+        futures = [self._executor.submit(search, state, rules, share, self.time_limit, derive_seed(seed, index))
+                   for index in range(self.workers)]
+
+        # Merge in submission order so the result does not depend on which search finishes first
+        stats: Dict[int, Tuple[int, float]] = {}
+        for future in futures:
+            for action, (visits, total) in future.result().items():
+                merged_visits, merged_total = stats.get(action, (0, 0.0))
+                stats[action] = (merged_visits + visits, merged_total + total)
+        return stats
+
+    @staticmethod
+    def _to_policy_action(action: int, hero):
+        if action == ATTACK_ACTION:
+            return ATTACK
+        if action == POTION_ACTION:
+            return POTION
+        return hero.spells[action - FIRST_SPELL]
+
+
+def _compare(fights: int, class_name: str, level: int, agent: MCTSAgent, seed: int) -> Dict[str, Tuple[float, float]]:
+    """Win rate and milliseconds per fight of the agent and the simulation policies on the same matchups"""
+    contenders = dict(POLICIES)
+    contenders["mcts"] = agent
+    results = {}
+    with events.use_sink(events.NullSink()), open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        for name, policy in contenders.items():
+            wins = 0
+            elapsed = 0.0
+            for index in range(fights):
+                # Same enemy and dice for every contender
+                rng = GameRNG(seed).spawn(index)
+                hero = build_hero(class_name, level)
+                enemy = EnemyGenerator.generate_enemy(max(1, level + rng.randint(-1, 2)), rng)
+                start = time.perf_counter()
+                simulate_battle(hero, enemy, policy, rng)
+                elapsed += time.perf_counter() - start
+                wins += hero.is_alive and not enemy.is_alive
+                ENEMY_POOL.release(enemy)
+            results[name] = (wins / fights, elapsed / fights * 1000)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Auto-resolve fights with the MCTS agent and compare it "
+                                                 "with the simulation policies.")
+    parser.add_argument("fights", type=int, help="number of fights per policy")
+    parser.add_argument("--class", dest="class_name", default="Mage", choices=[c.name for c in AVAILABLE_CLASSES])
+    parser.add_argument("--level", type=int, default=3, help="hero level")
+    parser.add_argument("--rollouts", type=int, default=DEFAULT_ROLLOUTS, help="rollouts per decision")
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds per decision")
+    parser.add_argument("--workers", type=int, default=1, help="parallel searches per decision")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    with MCTSAgent(args.rollouts, args.time_limit, args.workers, rng=random.Random(args.seed)) as agent:
+        results = _compare(args.fights, args.class_name, args.level, agent, args.seed)
+    print(f"{'policy':<10}{'win rate':>10}{'ms/fight':>10}")
+    for name, (win_rate, milliseconds) in results.items():
+        print(f"{name:<10}{win_rate:>10.1%}{milliseconds:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,402 @@
+"""
+Balance Sweep for Text-Based Battle Game
+
+This module searches balance constants for configurations whose win rate
+lands in a target band. Every point of the sweep is one class, weapon and hero
+level together with one value for each swept parameter, and it is evaluated
+with batches of headless battles from simulation.run_chunk spread across a
+process pool.
+
+After each batch a point's win rate is bracketed with a Wilson score interval.
+Once the whole interval lies above or below the target band the point is
+settled early and no more batches are spent on it, so points that are clearly
+too easy or too hard cost a batch or two while borderline points run up to
+the battle cap. Batches are merged in order and seeded from the sweep seed
+and the point's index, so a seeded sweep gives identical results with any
+number of workers.
+
+Parameters are addressed by dotted names:
+
+    weapon.<weapon>.damage | crit_chance     e.g. weapon.iron_sword.damage
+    spell.<spell>.damage | mana_cost         e.g. spell.fireball.damage
+    class.<Class>.multiplier                 CLASS_DAMAGE_MULTIPLIERS
+    class.<Class>.<skill>                    stat_bonuses, e.g. class.Rogue.luck
+    enemy.health_min | health_max | health_per_level
+    enemy.elite_health | boss_health         ENEMY_TYPE_MODIFIERS
+    enemy.skip_chance                        ENEMY_SKIP_CHANCE
+
+    python balance_sweep.py --levels 1-10 --weapons all --target 0.6:0.8
+    python balance_sweep.py --classes Rogue --param class.Rogue.multiplier=1.2:1.6:0.1
+"""
+
+import argparse
+import contextlib
+import itertools
+import math
+import os
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import character
+import game_utils
+import simulation
+from character_classes import AVAILABLE_CLASSES, CLASS_DAMAGE_MULTIPLIERS
+from rng import derive_seed
+from spells import ALL_SPELLS
+from weapon import ALL_WEAPONS
+
+# Battles per batch handed to a worker
+DEFAULT_BATCH = 200
+
+# Battles after which an undecided point is settled on its point estimate
+DEFAULT_MAX_BATTLES = 2000
+
+# Width of the Wilson interval used to settle points early, in standard deviations.
+# At z = 3 a point is wrongly settled outside the band about once in 700 looks.
+CONFIDENCE_Z = 3.0
+
+DEFAULT_TARGET = (0.6, 0.8)
+
+IN_BAND = "in band"
+ABOVE = "above"
+BELOW = "below"
+
+
+class Parameter:
+    """A named balance constant that can be read and overwritten"""
+
+    def __init__(self, name: str, getter: Callable[[], float], setter: Callable[[float], None]):
+        self.name = name
+        self.get = getter
+        self.set = setter
+
+
+def _key(name: str) -> str:
+    return name.lower().replace(" ", "_")
+
+
+def _attribute(name: str, obj, attr: str) -> Parameter:
+    return Parameter(name, lambda: getattr(obj, attr), lambda value: setattr(obj, attr, value))
+
+
+def _item(name: str, mapping: dict, key) -> Parameter:
+    return Parameter(name, lambda: mapping[key], lambda value: mapping.__setitem__(key, value))
+
+
+def _enemy_type_health(name: str, enemy_type: str) -> Parameter:
+    def setter(value):
+        _, gold_multiplier = character.ENEMY_TYPE_MODIFIERS[enemy_type]
+        character.ENEMY_TYPE_MODIFIERS[enemy_type] = (value, gold_multiplier)
+    return Parameter(name, lambda: character.ENEMY_TYPE_MODIFIERS[enemy_type][0], setter)
+
+
+ENEMY_PARAMETERS: Dict[str, Callable[[str], Parameter]] = {
+    "health_min": lambda name: _attribute(name, game_utils, "ENEMY_BASE_HEALTH_MIN"),
+    "health_max": lambda name: _attribute(name, game_utils, "ENEMY_BASE_HEALTH_MAX"),
+    "health_per_level": lambda name: _attribute(name, game_utils, "ENEMY_HEALTH_PER_LEVEL"),
+    "elite_health": lambda name: _enemy_type_health(name, "elite"),
+    "boss_health": lambda name: _enemy_type_health(name, "boss"),
+    "skip_chance": lambda name: _attribute(name, character, "ENEMY_SKIP_CHANCE"),
+}
+
+
+def resolve_parameter(name: str) -> Parameter:
+    """Look up a parameter by its dotted name"""
+    parts = name.split(".")
+    group = parts[0]
+
+    if group == "weapon" and len(parts) == 3 and parts[2] in ("damage", "crit_chance"):
+        for weapon in ALL_WEAPONS:
+            if _key(weapon.name) == _key(parts[1]):
+                return _attribute(name, weapon, parts[2])
+
+    elif group == "spell" and len(parts) == 3 and parts[2] in ("damage", "mana_cost"):
+        for spell in ALL_SPELLS:
+            if _key(spell.name) == _key(parts[1]):
+                return _attribute(name, spell, parts[2])
+
+    elif group == "class" and len(parts) == 3:
+        for char_class in AVAILABLE_CLASSES:
+            if char_class.name.lower() == parts[1].lower():
+                if parts[2] == "multiplier":
+                    return _item(name, CLASS_DAMAGE_MULTIPLIERS, char_class.name)
+                if parts[2] in ("strength", "agility", "intelligence", "luck"):
+                    bonuses = char_class.stat_bonuses
+                    return Parameter(name, lambda: bonuses.get(parts[2], 0),
+                                     lambda value: bonuses.__setitem__(parts[2], value))
+
+    elif group == "enemy" and len(parts) == 2 and parts[1] in ENEMY_PARAMETERS:
+        return ENEMY_PARAMETERS[parts[1]](name)
+
+    raise ValueError(f"Unknown balance parameter: {name}")
+
+
+@contextlib.contextmanager
+def apply_overrides(overrides: Sequence[Tuple[str, float]]):
+    """Temporarily set balance parameters, restoring the originals afterwards"""
+    applied: List[Tuple[Parameter, float]] = []
+    try:
+        for name, value in overrides:
+            parameter = resolve_parameter(name)
+            original = parameter.get()
+            # Keep integer constants integers so damage and health stay whole numbers
+            parameter.set(type(original)(value))
+            applied.append((parameter, original))
+        yield
+    finally:
+        for parameter, original in reversed(applied):
+            parameter.set(original)
+
+
+def parse_values(spec: str) -> List[float]:
+    """Parse "1,2,5" or an inclusive range "start:stop:step" into a list of values"""
+    if ":" in spec:
+        start, stop, step = (float(part) for part in spec.split(":"))
+        if step <= 0:
+            raise ValueError(f"Range step must be positive: {spec}")
+        count = int(math.floor((stop - start) / step + 1e-9)) + 1
+        values = [round(start + i * step, 10) for i in range(count)]
+    else:
+        values = [float(part) for part in spec.split(",") if part]
+    return [int(value) if value.is_integer() else value for value in values]
+
+
+def wilson_interval(wins: int, battles: int, z: float = CONFIDENCE_Z) -> Tuple[float, float]:
+    """Confidence interval for a win rate from `wins` out of `battles`"""
+    if battles == 0:
+        return 0.0, 1.0
+    rate = wins / battles
+    denominator = 1 + z * z / battles
+    centre = (rate + z * z / (2 * battles)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / battles + z * z / (4 * battles * battles)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+class SweepPoint:
+    """One configuration being evaluated, with its merged battle results"""
+
+    def __init__(self, index: int, class_name: str, weapon: Optional[str], level: int,
+                 overrides: Tuple[Tuple[str, float], ...]):
+        self.index = index
+        self.class_name = class_name
+        self.weapon = weapon
+        self.level = level
+        self.overrides = overrides
+        self.battles = 0
+        self.wins = 0
+        self.turns = 0
+        self.status: Optional[str] = None
+        self.early = False
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.battles if self.battles else 0.0
+
+    @property
+    def mean_turns(self) -> float:
+        return self.turns / self.wins if self.wins else 0.0
+
+    def record(self, report: simulation.SimulationReport):
+        self.battles += report.battles
+        self.wins += report.wins
+        self.turns += sum(value * count for value, count in report.turns_to_kill.counts.items())
+
+    def settle(self, target: Tuple[float, float], max_battles: int) -> bool:
+        """Decide the point's status if the results so far allow it"""
+        low, high = wilson_interval(self.wins, self.battles)
+        if high < target[0]:
+            self.status, self.early = BELOW, self.battles < max_battles
+        elif low > target[1]:
+            self.status, self.early = ABOVE, self.battles < max_battles
+        elif self.battles >= max_battles:
+            if self.win_rate < target[0]:
+                self.status = BELOW
+            elif self.win_rate > target[1]:
+                self.status = ABOVE
+            else:
+                self.status = IN_BAND
+        return self.status is not None
+
+
+def run_batch(class_name: str, weapon: Optional[str], level: int, overrides: Tuple[Tuple[str, float], ...],
+              policy: str, battles: int, seed: int, batch_index: int) -> simulation.SimulationReport:
+    """Simulate one batch of battles for a sweep point in the current process"""
+    with apply_overrides(overrides):
+        return simulation.run_chunk(class_name, level, None, policy, battles, seed, batch_index, weapon)
+
+
+def build_points(classes: Sequence[str], weapons: Sequence[Optional[str]], levels: Sequence[int],
+                 grid: Dict[str, List[float]]) -> List[SweepPoint]:
+    """Every combination of class, weapon, level and parameter values"""
+    names = list(grid)
+    points = []
+    for class_name, weapon, level, values in itertools.product(
+            classes, weapons, levels, itertools.product(*(grid[name] for name in names))):
+        points.append(SweepPoint(len(points), class_name, weapon, level, tuple(zip(names, values))))
+    return points
+
+
+def sweep(classes: Sequence[str], weapons: Sequence[Optional[str]] = (None,), levels: Sequence[int] = (1,),
+          grid: Optional[Dict[str, List[float]]] = None, target: Tuple[float, float] = DEFAULT_TARGET,
+          policy: str = "attack", batch: int = DEFAULT_BATCH, max_battles: int = DEFAULT_MAX_BATTLES,
+          workers: Optional[int] = None, seed: Optional[int] = None) -> List[SweepPoint]:
+    """Evaluate every point of the sweep and return them ranked best first.
+
+    A weapon of None keeps the class's starting weapon.
+    """
+    grid = grid or {}
+    for name in grid:
+        resolve_parameter(name)
+    for class_name in classes:
+        simulation._get_class(class_name)
+    for weapon in weapons:
+        if weapon is not None:
+            simulation._get_weapon(weapon)
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+
+    points = build_points(classes, weapons, levels, grid)
+
+    def batch_args(point: SweepPoint, batch_index: int) -> tuple:
+        count = min(batch, max_battles - batch_index * batch)
+        return (point.class_name, point.weapon, point.level, point.overrides, policy, count,
+                derive_seed(seed, point.index), batch_index)
+
+    if workers == 1:
+        for point in points:
+            batch_index = 0
+            while not point.settle(target, max_battles):
+                point.record(run_batch(*batch_args(point, batch_index)))
+                batch_index += 1
+    else:
+        _run_parallel(points, batch_args, target, max_battles, batch, workers)
+
+    return rank(points, target)
+
+
+def _run_parallel(points: List[SweepPoint], batch_args: Callable, target: Tuple[float, float],
+                  max_battles: int, batch: int, workers: Optional[int]):
+    """Keep the pool busy with batches of unsettled points, merging each point's batches in order"""
+    batches_per_point = -(-max_battles // batch)
+    submitted = {point.index: 0 for point in points}
+    merged = {point.index: 0 for point in points}
+    finished: Dict[Tuple[int, int], simulation.SimulationReport] = {}
+    open_points = list(points)
+
+    queue_depth = 2 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        running = {}
+        while True:
+            # Spread new batches over the open points that have the fewest batches in flight
+            open_points = [point for point in open_points if point.status is None]
+            candidates = sorted((point for point in open_points if submitted[point.index] < batches_per_point),
+                                key=lambda point: (submitted[point.index] - merged[point.index], point.index))
+            for point in candidates[:max(0, queue_depth - len(running))]:
+                future = executor.submit(run_batch, *batch_args(point, submitted[point.index]))
+                running[future] = (point, submitted[point.index])
+                submitted[point.index] += 1
+            if not running:
+                break
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                point, batch_index = running.pop(future)
+                if point.status is not None:
+                    continue
+                finished[point.index, batch_index] = future.result()
+                while (point.index, merged[point.index]) in finished and point.status is None:
+                    point.record(finished.pop((point.index, merged[point.index])))
+                    merged[point.index] += 1
+                    point.settle(target, max_battles)
+                if point.status is not None:
+                    for key in [key for key in finished if key[0] == point.index]:
+                        del finished[key]
+
+
+def rank(points: List[SweepPoint], target: Tuple[float, float]) -> List[SweepPoint]:
+    """Points in the band first, then by distance of the win rate from the band's centre"""
+    centre = (target[0] + target[1]) / 2
+    return sorted(points, key=lambda point: (point.status != IN_BAND, abs(point.win_rate - centre), point.index))
+
+
+def format_table(points: Sequence[SweepPoint], top: Optional[int] = None) -> str:
+    """Ranked results as a plain-text table"""
+    names = [name for name, _ in points[0].overrides] if points else []
+    headers = ["#", "Class", "Weapon", "Lvl"] + names + ["Battles", "Win rate", "Turns", "Status"]
+    rows = []
+    for rank_number, point in enumerate(points[:top] if top else points, 1):
+        status = point.status + (" (early)" if point.early else "")
+        rows.append([str(rank_number), point.class_name, point.weapon or "(starting)", str(point.level)]
+                    + [f"{value:g}" for _, value in point.overrides]
+                    + [str(point.battles), f"{point.win_rate:.1%}", f"{point.mean_turns:.1f}", status])
+
+    widths = [max(len(row[i]) for row in [headers] + rows) for i in range(len(headers))]
+    lines = ["  ".join(cell.ljust(width) for cell, width in zip(headers, widths)).rstrip(),
+             "  ".join("-" * width for width in widths)]
+    lines.extend("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip() for row in rows)
+    return "\n".join(lines)
+
+
+def _parse_levels(spec: str) -> List[int]:
+    levels: List[int] = []
+    for part in spec.split(","):
+        if "-" in part:
+            start, stop = part.split("-")
+            levels.extend(range(int(start), int(stop) + 1))
+        else:
+            levels.append(int(part))
+    return levels
+
+
+def _parse_target(spec: str) -> Tuple[float, float]:
+    low, high = (float(part) for part in spec.split(":"))
+    if not 0 <= low <= high <= 1:
+        raise argparse.ArgumentTypeError(f"target must be low:high within 0..1, got {spec}")
+    return low, high
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep balance parameters and rank configurations by win rate.")
+    parser.add_argument("--classes", default="all", help="comma-separated class names, or 'all'")
+    parser.add_argument("--weapons", default="starting",
+                        help="comma-separated weapon names, 'all', or 'starting' for each class's own weapon")
+    parser.add_argument("--levels", type=_parse_levels, default=[1], help="hero levels, e.g. 1-10 or 1,5,10")
+    parser.add_argument("--param", action="append", default=[], metavar="NAME=VALUES",
+                        help="parameter values as v1,v2,... or start:stop:step (repeatable)")
+    parser.add_argument("--target", type=_parse_target, default=DEFAULT_TARGET, help="win-rate band low:high")
+    parser.add_argument("--policy", default="attack", choices=sorted(simulation.POLICIES))
+    parser.add_argument("--batch", type=int, default=DEFAULT_BATCH, help="battles per batch")
+    parser.add_argument("--max-battles", type=int, default=DEFAULT_MAX_BATTLES,
+                        help="battle cap for points that stay undecided")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--top", type=int, default=None, help="only print the best N configurations")
+    args = parser.parse_args()
+
+    classes = ([c.name for c in AVAILABLE_CLASSES] if args.classes == "all"
+               else [name.strip() for name in args.classes.split(",")])
+    if args.weapons == "starting":
+        weapons: List[Optional[str]] = [None]
+    elif args.weapons == "all":
+        weapons = [weapon.name for weapon in ALL_WEAPONS]
+    else:
+        weapons = [name.strip() for name in args.weapons.split(",")]
+    grid = {}
+    for spec in args.param:
+        name, _, values = spec.partition("=")
+        grid[name.strip()] = parse_values(values)
+
+    points = sweep(classes, weapons, args.levels, grid, args.target, args.policy, args.batch,
+                   args.max_battles, args.workers, args.seed)
+
+    battles = sum(point.battles for point in points)
+    early = sum(point.early for point in points)
+    in_band = sum(point.status == IN_BAND for point in points)
+    print(f"{len(points)} configurations, {battles} battles, {early} settled early, {in_band} in band "
+          f"{args.target[0]:.0%}-{args.target[1]:.0%}")
+    print(format_table(points, args.top))
+
+
+if __name__ == "__main__":
+    main()
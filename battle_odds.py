@@ -0,0 +1,145 @@
+"""
+Battle Odds for Text-Based Battle Game
+
+This module computes the exact chance that a hero wins a straight fight and
+the expected number of turns, without running any simulations. It assumes the
+hero attacks every turn and the enemy follows Enemy.ai_action (attack, or skip
+the turn with ENEMY_SKIP_CHANCE).
+
+Each side's per-turn damage distribution is built from its AttackProfile: the
+weapon's damage and crit chance, the level and strength bonus, the class
+multiplier or sneak attack chance and any damage boost. Because the two sides'
+rolls are independent, the fight splits into two one-dimensional problems:
+
+    K = turn on which the hero's total damage reaches the enemy's health
+    S(n) = enemy's total damage after n enemy turns
+
+The hero wins on turn n when K == n and S(n - 1) < hero health, and turn n is
+played when K >= n and S(n - 1) < hero health. Both are found with dynamic
+programming over the damage totals below each side's health, and results
+are memoized per (distributions, hero health, enemy health).
+
+    odds = battle_odds(hero, enemy)
+    print(describe_odds(odds))   # "87.3% chance to win (about 6.1 turns)"
+"""
+
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+from character import DAMAGE_BOOST_MULTIPLIER, ENEMY_SKIP_CHANCE, AttackProfile
+
+# Stop once the chance that the battle is still going drops below this
+NEGLIGIBLE = 1e-12
+
+# Safety cap for fights where a side can roll zero damage
+MAX_SOLVED_TURNS = 10_000
+
+Distribution = Tuple[Tuple[int, float], ...]
+
+
+class BattleOdds:
+    """Exact outcome of a hero-vs-enemy fight"""
+
+    __slots__ = ("win_probability", "expected_turns")
+
+    def __init__(self, win_probability: float, expected_turns: float):
+        self.win_probability = win_probability
+        self.expected_turns = expected_turns
+
+    @property
+    def loss_probability(self) -> float:
+        return 1.0 - self.win_probability
+
+    def __repr__(self) -> str:
+        return f"BattleOdds(win_probability={self.win_probability:.4f}, expected_turns={self.expected_turns:.2f})"
+
+
+def damage_distribution(character) -> Dict[int, float]:
+    """Probability of each damage value of one attack by `character`"""
+    profile = AttackProfile(character)
+    outcomes = [(profile.normal_damage, 1.0 - profile.crit_chance), (profile.crit_damage, profile.crit_chance)]
+
+    if profile.sneak_chance is not None:
+        sneak_chance = min(max(profile.sneak_chance, 0.0), 1.0)
+        outcomes = [split for damage, p in outcomes
+                    for split in ((int(damage * profile.class_multiplier), p * sneak_chance),
+                                  (damage, p * (1.0 - sneak_chance)))]
+    elif profile.class_multiplier is not None:
+        outcomes = [(int(damage * profile.class_multiplier), p) for damage, p in outcomes]
+
+    if profile.boosted:
+        outcomes = [(int(damage * DAMAGE_BOOST_MULTIPLIER), p) for damage, p in outcomes]
+
+    distribution: Dict[int, float] = {}
+    for damage, p in outcomes:
+        if p > 0:
+            distribution[damage] = distribution.get(damage, 0.0) + p
+    return distribution
+
+
+def enemy_turn_distribution(enemy) -> Dict[int, float]:
+    """Damage of one enemy turn, including turns it skips"""
+    distribution = {damage: p * (1.0 - ENEMY_SKIP_CHANCE) for damage, p in damage_distribution(enemy).items()}
+    distribution[0] = distribution.get(0, 0.0) + ENEMY_SKIP_CHANCE
+    return distribution
+
+
+def _freeze(distribution: Dict[int, float]) -> Distribution:
+    return tuple(sorted(distribution.items()))
+
+
+def _advance(mass: List[float], distribution: Distribution, limit: int) -> List[float]:
+    """Add one roll to the damage totals, dropping totals that reach `limit`"""
+    result = [0.0] * limit
+    for total, p in enumerate(mass):
+        if p:
+            for damage, q in distribution:
+                new_total = total + damage
+                if new_total < limit:
+                    result[new_total] += p * q
+    return result
+
+
+@lru_cache(maxsize=4096)
+def _solve(hero_attack: Distribution, enemy_turn: Distribution, hero_health: int,
+           enemy_health: int) -> BattleOdds:
+    if hero_health <= 0:
+        return BattleOdds(0.0, 0.0)
+    if enemy_health <= 0:
+        return BattleOdds(1.0, 0.0)
+
+    enemy_alive = [0.0] * enemy_health   # hero's damage total while the enemy stands
+    enemy_alive[0] = 1.0
+    hero_alive = [0.0] * hero_health     # enemy's damage total while the hero stands
+    hero_alive[0] = 1.0
+
+    win_probability = 0.0
+    expected_turns = 0.0
+    for _ in range(MAX_SOLVED_TURNS):
+        enemy_standing = sum(enemy_alive)
+        hero_standing = sum(hero_alive)
+        turn_played = enemy_standing * hero_standing
+        if turn_played < NEGLIGIBLE:
+            break
+        expected_turns += turn_played
+
+        # Hero attacks first; the enemy only strikes back if it survives
+        enemy_alive = _advance(enemy_alive, hero_attack, enemy_health)
+        win_probability += (enemy_standing - sum(enemy_alive)) * hero_standing
+        hero_alive = _advance(hero_alive, enemy_turn, hero_health)
+
+    return BattleOdds(win_probability, expected_turns)
+
+
+def battle_odds(hero, enemy) -> BattleOdds:
+    """Exact win chance and expected turns for `hero` attacking `enemy` every turn from their current health"""
+    return _solve(_freeze(damage_distribution(hero)), _freeze(enemy_turn_distribution(enemy)),
+                  hero.health, enemy.health)
+
+
+def describe_odds(odds: BattleOdds) -> str:
+    return f"{odds.win_probability:.1%} chance to win (about {odds.expected_turns:.1f} turns)"
+
+
+def clear_cache():
+    _solve.cache_clear()
@@ -0,0 +1 @@
+"""Benchmarks for Text-Based Battle Game. Run modules with `python -m benchmarks.<name>`."""
@@ -0,0 +1,41 @@
+"""
+Allocation benchmark: headless battles with and without the enemy pool.
+
+Usage: python -m benchmarks.enemy_pool [battles]
+"""
+
+import gc
+import sys
+import time
+
+import simulation
+from enemy_pool import ENEMY_POOL
+
+
+def run(battles: int, pool_size: int):
+    """Simulate battles in-process and return (seconds, gen-0 collections, pool stats)"""
+    ENEMY_POOL.clear()
+    ENEMY_POOL.max_size = pool_size
+    ENEMY_POOL.created = ENEMY_POOL.reused = ENEMY_POOL.released = ENEMY_POOL.discarded = 0
+
+    gc.collect()
+    collections_before = gc.get_stats()[0]["collections"]
+    start = time.perf_counter()
+    simulation.run_chunk("Warrior", 3, None, "attack", battles, seed=0, chunk_index=0)
+    elapsed = time.perf_counter() - start
+    collections = gc.get_stats()[0]["collections"] - collections_before
+    return elapsed, collections, ENEMY_POOL.stats()
+
+
+def main():
+    battles = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+
+    print(f"Battles: {battles}")
+    for label, pool_size in (("Without pool", 0), ("With pool", 64)):
+        elapsed, collections, stats = run(battles, pool_size)
+        print(f"{label:13} {elapsed:6.2f}s  gen-0 GCs: {collections:5}  "
+              f"enemies created: {stats['created']:6}  reused: {stats['reused']:6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+"""
+Hot path microbenchmarks with regression baselines.
+
+Each benchmark times one game operation in a tight loop with stdout and game
+events silenced and every random stream seeded, and reports the best
+microseconds per call over several repeats in several fresh processes.
+Results are compared against benchmarks/baseline.json; a benchmark more than
+--threshold slower than its baseline is reported as a regression and the run
+exits with status 1.
+
+Baselines are only meaningful on the machine that recorded them, so record
+them again with --save-baseline after changing machines.
+
+Usage: python -m benchmarks.hot_paths [names...] [--threshold 0.3] [--processes 3] [--save-baseline]
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import events
+from achievements import AchievementSystem
+from character import Enemy, Hero
+from character_classes import mage_class, warrior_class
+from dungeons import DungeonSystem
+from enemy_pool import ENEMY_POOL
+from game_utils import EnemyGenerator, GameState
+from health_bar import HealthBar, draw_bars
+from quest_system import QuestSystem, initialize_quest_tracking
+from rng import GameRNG
+from save_system import SaveSystem
+from snapshot import GameSnapshot
+from spells import fireball, heal
+from weapon import crossbow, dagger, iron_sword, steel_sword
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+SEED = 1234
+
+# A benchmark is repeated this many times and the fastest repeat is reported
+REPEATS = 7
+
+# Fresh interpreter processes per run; the best result over them is reported
+PROCESSES = 3
+
+# Each repeat runs enough calls to take at least this long
+MIN_REPEAT_SECONDS = 0.05
+
+# Run-to-run noise on a busy machine is up to about 30%
+DEFAULT_THRESHOLD = 0.3
+
+# Health that a target never runs out of during a benchmark
+ENDLESS_HEALTH = 10 ** 9
+
+# The achievement and quest benchmarks win this many battles, then roll the hero and
+# the system back to where they started. Every battle-driven achievement and
+# objective is reached within a cycle, so the timing keeps covering condition checks,
+# unlocks and reward payouts instead of an index that has emptied out.
+CYCLE_BATTLES = 50
+BATTLE_GOLD = 25
+
+
+def build_hero(char_class=warrior_class, level: int = 5) -> Hero:
+    hero = Hero("Benchmark Hero", 100, level)
+    char_class.apply_to_hero(hero)
+    initialize_quest_tracking(hero)
+    return hero
+
+
+def build_target() -> Enemy:
+    target = Enemy("Training Dummy", ENDLESS_HEALTH, iron_sword, 5)
+    target.health_bar = None
+    return target
+
+
+def bench_attack(rng, workdir: str) -> Callable:
+    hero, target = build_hero(), build_target()
+
+    def operation():
+        hero.attack(target, rng)
+        target.health = ENDLESS_HEALTH
+    return operation
+
+
+def bench_cast_spell(rng, workdir: str) -> Callable:
+    hero, target = build_hero(mage_class), build_target()
+
+    def operation():
+        hero.mana = hero.mana_max
+        hero.cast_spell(fireball, target, rng)
+        target.health = ENDLESS_HEALTH
+    return operation
+
+
+def bench_level_up(rng, workdir: str) -> Callable:
+    hero = build_hero(level=1)
+
+    def operation():
+        # Start from level 1 each time so the numbers stay the same size
+        hero.level, hero.experience, hero.experience_to_next_level = 1, 0, 100
+        hero.gain_experience(100, rng)
+    return operation
+
+
+def bench_update_buffs(rng, workdir: str) -> Callable:
+    hero = build_hero()
+    for buff_type in ("damage_boost", "defense", "regeneration"):
+        hero.add_buff({"type": buff_type, "duration": ENDLESS_HEALTH})
+
+    def operation():
+        hero.update_buffs()
+    return operation
+
+
+def bench_health_bars(rng, workdir: str) -> Callable:
+    hero, target = build_hero(), build_target()
+    target.health_bar = HealthBar(target, color="red")
+
+    def operation():
+        # A combat turn: one side takes damage, then both bars are drawn
+        target.take_damage(1)
+        draw_bars(hero.health_bar, target.health_bar)
+        target.health = ENDLESS_HEALTH
+    return operation
+
+
+def _win_battle(hero):
+    """What a won battle changes"""
+    hero.change_stat("battles_won")
+    hero.change_stat("battles_fought")
+    hero.change_stat("gold", BATTLE_GOLD)
+
+
+def bench_check_achievements(rng, workdir: str) -> Callable:
+    hero, achievements = build_hero(), AchievementSystem()
+    achievements.check_achievements(hero)
+    start = GameSnapshot(hero, achievement_system=achievements)
+    battles = itertools.cycle(range(CYCLE_BATTLES))
+
+    def operation():
+        if not next(battles):
+            start.restore()
+        _win_battle(hero)
+        achievements.check_achievements(hero)
+    return operation
+
+
+def bench_update_quests(rng, workdir: str) -> Callable:
+    hero, quests = build_hero(), QuestSystem()
+    for quest in quests.quests.values():
+        quest.start_quest()
+    quests.update_all_quests(hero)
+    start = GameSnapshot(hero, quest_system=quests)
+    battles = itertools.cycle(range(CYCLE_BATTLES))
+
+    def operation():
+        if not next(battles):
+            start.restore()
+        _win_battle(hero)
+        quests.update_all_quests(hero)
+    return operation
+
+
+def _saved_game(directory: str):
+    hero = build_hero(level=7)
+    hero.learn_spell(fireball)
+    hero.learn_spell(heal)
+    hero.inventory = [crossbow, dagger, steel_sword]
+    game_state = GameState()
+    game_state.dungeon_states = DungeonSystem(GameRNG(SEED)).get_states()
+    return hero, game_state, os.path.join(directory, "benchmark.json")
+
+
+def bench_save_game(rng, workdir: str) -> Callable:
+    hero, game_state, path = _saved_game(workdir)
+
+    def operation():
+        SaveSystem.save_game(hero, game_state, path)
+    return operation
+
+
+def bench_load_game(rng, workdir: str) -> Callable:
+    hero, game_state, path = _saved_game(workdir)
+    SaveSystem.save_game(hero, game_state, path)
+
+    def operation():
+        SaveSystem.load_game(path)
+    return operation
+
+
+def _game_objects():
+    hero = build_hero(level=7)
+    hero.learn_spell(fireball)
+    hero.inventory = [crossbow, dagger, steel_sword]
+    dungeon_system = DungeonSystem(GameRNG(SEED))
+    dungeon_system.dungeons[0].get_current_room()
+    return hero, GameState(), AchievementSystem(), QuestSystem(), dungeon_system
+
+
+def bench_snapshot(rng, workdir: str) -> Callable:
+    objects = _game_objects()
+
+    def operation():
+        GameSnapshot(*objects)
+    return operation
+
+
+def bench_restore(rng, workdir: str) -> Callable:
+    objects = _game_objects()
+    hero = objects[0]
+    snapshot = GameSnapshot(*objects)
+
+    def operation():
+        # Roll back a combat turn
+        hero.take_damage(5)
+        hero.mana -= 10
+        snapshot.restore()
+    return operation
+
+
+def bench_dungeon_system(rng, workdir: str) -> Callable:
+    def operation():
+        DungeonSystem(rng)
+    return operation
+
+
+def bench_generate_enemy(rng, workdir: str) -> Callable:
+    def operation():
+        ENEMY_POOL.release(EnemyGenerator.generate_enemy(5, rng))
+    return operation
+
+
+BENCHMARKS: Dict[str, Callable] = {
+    "attack": bench_attack,
+    "cast_spell": bench_cast_spell,
+    "level_up": bench_level_up,
+    "update_buffs": bench_update_buffs,
+    "health_bars": bench_health_bars,
+    "check_achievements": bench_check_achievements,
+    "update_all_quests": bench_update_quests,
+    "save_game": bench_save_game,
+    "load_game": bench_load_game,
+    "snapshot": bench_snapshot,
+    "restore": bench_restore,
+    "dungeon_system": bench_dungeon_system,
+    "generate_enemy": bench_generate_enemy,
+}
+
+
+def measure(names: List[str], repeats: int = REPEATS) -> Dict[str, float]:
+    """Best microseconds per call of each benchmark, with output silenced and seeded streams.
+
+    Repeats are interleaved across the benchmarks so that a slow spell on the
+    machine does not land on every repeat of the same benchmark.
+    """
+    random.seed(SEED)
+    with events.use_sink(events.NullSink()), contextlib.redirect_stdout(io.StringIO()), \
+            tempfile.TemporaryDirectory() as workdir:
+        operations = {}
+        loops = {}
+        for name in names:
+            os.mkdir(os.path.join(workdir, name))
+            operations[name] = BENCHMARKS[name](GameRNG(SEED), os.path.join(workdir, name))
+            loops[name] = _calibrate(operations[name])
+
+        best = {name: float("inf") for name in names}
+        for _ in range(repeats):
+            for name in names:
+                best[name] = min(best[name], _time_loops(operations[name], loops[name]) / loops[name])
+    return {name: seconds * 1e6 for name, seconds in best.items()}
+
+
+def _calibrate(operation: Callable) -> int:
+    """Number of calls that takes at least MIN_REPEAT_SECONDS; this also warms caches and pools"""
+    loops = 1
+    while True:
+        elapsed = _time_loops(operation, loops)
+        if elapsed >= MIN_REPEAT_SECONDS:
+            return loops
+        loops *= 2 if elapsed == 0 else max(2, min(10, int(MIN_REPEAT_SECONDS / elapsed) + 1))
+
+
+def _time_loops(operation: Callable, loops: int) -> float:
+    # Like timeit, keep the garbage collector out of the measurement
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        start = time.perf_counter()
+        for _ in range(loops):
+            operation()
+        return time.perf_counter() - start
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def measure_in_processes(names: List[str], repeats: int = REPEATS,
+                         processes: int = PROCESSES) -> Dict[str, float]:
+    """Best result of each benchmark over several fresh interpreter processes.
+
+    Timings differ between processes (memory layout, hash seeds), more than
+    between repeats in one process, so a single process can't be trusted.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    best: Dict[str, float] = {}
+    for _ in range(processes):
+        output = subprocess.run([sys.executable, "-m", "benchmarks.hot_paths", "--json",
+                                 "--repeats", str(repeats), *names],
+                                cwd=root, check=True, capture_output=True, text=True).stdout
+        for name, value in json.loads(output).items():
+            best[name] = min(best.get(name, value), value)
+    return best
+
+
+def load_baseline(path: str) -> Dict[str, float]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time the game's hot paths against stored baselines.")
+    parser.add_argument("names", nargs="*", help=f"benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="fraction slower than baseline that counts as a regression")
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--processes", type=int, default=PROCESSES)
+    parser.add_argument("--json", action="store_true", help="measure in this process and print raw JSON")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args()
+
+    names = args.names or list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    baseline = load_baseline(args.baseline)
+    regressions: List[str] = []
+
+    if args.json:
+        print(json.dumps(measure(names, args.repeats)))
+        return
+
+    results = measure_in_processes(names, args.repeats, args.processes)
+    print(f"{'benchmark':<20}{'us/call':>10}{'baseline':>10}{'change':>9}")
+    for name in names:
+        line = f"{name:<20}{results[name]:>10.2f}"
+        if name in baseline:
+            change = results[name] / baseline[name] - 1
+            line += f"{baseline[name]:>10.2f}{change:>+9.1%}"
+            if change > args.threshold:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+
+    if args.save_baseline:
+        baseline.update({name: round(value, 3) for name, value in results.items()})
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline saved to {args.baseline}")
+    elif regressions:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
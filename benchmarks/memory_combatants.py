@@ -0,0 +1,55 @@
+"""
+Memory benchmark: bytes per combatant for Enemy objects vs the combatant table.
+
+Usage: python -m benchmarks.memory_combatants [count]
+"""
+
+import contextlib
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+from combatant_store import CombatantTable
+from game_utils import EnemyGenerator
+
+
+def measure(build) -> int:
+    """Return the bytes still allocated after `build()` runs, keeping its result alive"""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return current
+
+
+def build_enemies(count: int):
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        return [EnemyGenerator.generate_enemy(5) for _ in range(count)]
+
+
+def build_table(count: int):
+    table = CombatantTable()
+    table.spawn_enemies(count, 5)
+    return table
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    random.seed(0)
+    object_bytes = measure(lambda: build_enemies(count))
+    random.seed(0)
+    table_bytes = measure(lambda: build_table(count))
+
+    print(f"Combatants: {count}")
+    print(f"Enemy objects:    {object_bytes / count:8.1f} bytes/combatant ({object_bytes / 2**20:.1f} MiB)")
+    print(f"Combatant table:  {table_bytes / count:8.1f} bytes/combatant ({table_bytes / 2**20:.1f} MiB)")
+    print(f"Reduction:        {object_bytes / max(table_bytes, 1):8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
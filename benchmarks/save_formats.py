@@ -0,0 +1,76 @@
+"""
+Save format benchmark: bytes per save and saves/loads per second, JSON vs binary.
+
+Usage: python -m benchmarks.save_formats [iterations]
+"""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from character_classes import warrior_class
+from character import Hero
+from game_utils import GameState
+from save_codec import decode_save, encode_save
+from save_system import SaveSystem
+from spells import fireball, heal
+from weapon import crossbow, dagger, steel_sword
+
+
+def build_hero() -> Hero:
+    hero = Hero("Benchmark Hero", 100, 7)
+    warrior_class.apply_to_hero(hero)
+    hero.learn_spell(fireball)
+    hero.learn_spell(heal)
+    hero.inventory = [crossbow, dagger, steel_sword]
+    hero.battles_won, hero.battles_fought, hero.elite_kills = 42, 47, 3
+    hero.boss_kills, hero.spells_cast = 1, 18
+    return hero
+
+
+def rate(operation, iterations: int) -> float:
+    """Calls per second of `operation`"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        operation()
+    return iterations / (time.perf_counter() - start)
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        hero = build_hero()
+    game_state = GameState()
+    game_state.turn_count = 31
+    save_data = SaveSystem.to_save_data(hero, game_state)
+
+    json_bytes = json.dumps(save_data, indent=2).encode()
+    binary_bytes = encode_save(save_data)
+    assert decode_save(binary_bytes) == json.loads(json_bytes)
+
+    print(f"{'format':<8}{'bytes/save':>12}{'encode/s':>12}{'decode/s':>12}{'save/s':>12}{'load/s':>12}")
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()) as out:
+        rows = []
+        for label, size, encode, decode, path in (
+            ("json", len(json_bytes), lambda: json.dumps(save_data, indent=2),
+             lambda: json.loads(json_bytes), os.path.join(tmp, "save.json")),
+            ("binary", len(binary_bytes), lambda: encode_save(save_data),
+             lambda: decode_save(binary_bytes), os.path.join(tmp, "save.sav")),
+        ):
+            rows.append((label, size, rate(encode, iterations), rate(decode, iterations),
+                         rate(lambda: SaveSystem.save_game(hero, game_state, path), iterations // 5),
+                         rate(lambda: SaveSystem.load_game(path), iterations // 5)))
+            out.seek(0)
+            out.truncate()
+
+    for label, size, encodes, decodes, saves, loads in rows:
+        print(f"{label:<8}{size:>12}{encodes:>12.0f}{decodes:>12.0f}{saves:>12.0f}{loads:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,99 @@
+from typing import Callable, Optional
 import random
-from weapon import fists
+import events
+import rng as rng_streams
+from weapon import Weapon, fists
 from health_bar import HealthBar
 
+# Damage multiplier granted by an active "damage_boost" buff
+DAMAGE_BOOST_MULTIPLIER = 1.3
+
+# Chance that an enemy spends its turn preparing instead of attacking
+ENEMY_SKIP_CHANCE = 0.1
+
+# Health and gold multipliers for tougher enemy types
+ENEMY_TYPE_MODIFIERS = {
+    "elite": (1.5, 2),
+    "boss": (2.5, 3),
+}
+
+# Mutable containers a snapshot copies; every other attribute holds an immutable
+# value or a shared object (weapon, spell, class) and is stored by reference
+SNAPSHOT_CONTAINERS = ("skills", "buffs", "spells", "inventory")
+
+# Stats that achievements and quest objectives watch; changes to them are pushed to
+# the character's stat listeners ("spells_known" is the number of spells learned)
+TRACKED_STATS = ("level", "gold", "battles_won", "battles_fought", "elite_kills", "boss_kills",
+                 "spells_cast", "items_purchased", "dungeons_completed")
+
+class AttackProfile:
+    """The numbers behind a character's attack for its current weapon, level, skills, class and buffs"""
+    
+    __slots__ = ("weapon", "flat_bonus", "normal_damage", "crit_damage", "crit_chance",
+                 "class_multiplier", "sneak_chance", "boosted")
+    
+    def __init__(self, character) -> None:
+        weapon = character.weapon
+        self.weapon = weapon
+        self.flat_bonus = character.level // 2 + character.skills["strength"] // 5
+        self.normal_damage = weapon.damage + self.flat_bonus
+        self.crit_damage = weapon.damage * 2 + self.flat_bonus
+        self.crit_chance = weapon.crit_chance
+        
+        # With a sneak chance, the class multiplier only applies when the sneak attack lands
+        self.class_multiplier, self.sneak_chance = None, None
+        if hasattr(character, 'character_class'):
+            from character_classes import class_attack_modifiers
+            self.class_multiplier, self.sneak_chance = class_attack_modifiers(character)
+        self.boosted = any(buff.get("effect") == "damage_boost" for buff in character.buffs)
+
+def build_attack_kernel(character) -> Callable:
+    """Compile a character's attack roll from its AttackProfile.
+    
+    Everything that only depends on the loadout is folded into constants, so the
+    returned function just draws the random numbers (the same ones, in the same
+    order, as the step-by-step rules) and returns (damage, is_crit). The function
+    records the id of the character it was built for in `owner`.
+    """
+    profile = AttackProfile(character)
+    weapon = profile.weapon
+    flat_bonus = profile.flat_bonus
+    normal_damage = profile.normal_damage
+    crit_damage = profile.crit_damage
+    crit_chance = profile.crit_chance
+    custom_roll = type(weapon).calculate_damage is not Weapon.calculate_damage
+    class_multiplier = profile.class_multiplier
+    sneak_chance = profile.sneak_chance
+    boosted = profile.boosted
+    name = character.name
+    
+    def attack_roll(rng=None):
+        stream = random if rng is None else rng
+        if custom_roll:
+            damage, is_crit = weapon.calculate_damage(rng)
+            damage += flat_bonus
+        else:
+            is_crit = stream.random() < crit_chance
+            damage = crit_damage if is_crit else normal_damage
+        
+        if sneak_chance is not None:
+            if stream.random() < sneak_chance:
+                damage = int(damage * class_multiplier)
+                events.emit("sneak_attack", character=name)
+        elif class_multiplier is not None:
+            damage = int(damage * class_multiplier)
+        
+        if boosted:
+            damage = int(damage * DAMAGE_BOOST_MULTIPLIER)
+        return damage, is_crit
+    
+    attack_roll.owner = id(character)
+    return attack_roll
+
 class Character:
+    # Compiled attack roll, built on first attack and dropped when the loadout changes
+    _attack_kernel: Optional[Callable] = None
+    
     def __init__(self, name: str, health: int, level: int = 1) -> None:
         self.name = name
         self.health = health
@@ -25,41 +116,133 @@ class Character:
             "luck": 10 + level
         }
         
-    def attack(self, target) -> None:
+    # Callbacks told the names of tracked stats that changed; see watch_stats()
+    stat_listeners = ()
+    
+    def watch_stats(self, listener: Callable) -> None:
+        """Call `listener(*stats)` whenever tracked stats of this character change"""
+        if not self.stat_listeners:
+            self.stat_listeners = []
+        self.stat_listeners.append(listener)
+    
+    def unwatch_stats(self, listener: Callable) -> None:
+        """Stop calling a listener added with watch_stats()"""
+        if listener in self.stat_listeners:
+            self.stat_listeners.remove(listener)
+    
+    def stat_changed(self, *stats: str) -> None:
+        """Tell the stat listeners which tracked stats changed"""
+        for listener in self.stat_listeners:
+            listener(*stats)
+    
+    def change_stat(self, stat: str, amount: int = 1) -> None:
+        """Add `amount` to a tracked counter such as gold or battles_won and tell the listeners"""
+        setattr(self, stat, getattr(self, stat) + amount)
+        for listener in self.stat_listeners:
+            listener(stat)
+    
+    def attack(self, target, rng=None) -> None:
         if not self.is_alive or not target.is_alive:
             return
             
-        damage, is_crit = self.weapon.calculate_damage()
+        # Weapon roll, level and strength bonus, class bonus and buffs
+        damage, is_crit = (self._attack_kernel or self.compile_attack())(rng)
         
-        # Add level-based damage bonus and strength bonus
-        damage += self.level // 2
-        damage += self.skills["strength"] // 5
+        target.take_damage(damage)
         
-        # Apply class-specific combat bonuses
-        if hasattr(self, 'character_class'):
-            from character_classes import apply_class_combat_bonuses
-            damage = apply_class_combat_bonuses(self, damage)
+        events.emit("attack", attacker=self.name, target=target.name, damage=damage,
+                    weapon=self.weapon.name, crit=is_crit)
         
-        # Apply buffs
-        for buff in self.buffs:
-            if buff.get("effect") == "damage_boost":
-                damage = int(damage * 1.3)
-                break
+        if not target.is_alive:
+            events.emit("defeated", target=target.name)
+            self.gain_experience(target.level * 25, rng)
+            self.change_stat("gold", target.level * 5)
+    
+    def compile_attack(self) -> Callable:
+        """Build and cache the attack roll for the current loadout"""
+        self._attack_kernel = build_attack_kernel(self)
+        return self._attack_kernel
+    
+    def invalidate_attack(self) -> None:
+        """Drop the compiled attack roll.
         
-        target.take_damage(damage)
+        The methods that change weapon, level, skills or buffs call this; code
+        that changes them directly must call it too.
+        """
+        self._attack_kernel = None
+    
+    def snapshot(self, base: Optional[dict] = None) -> dict:
+        """Capture the character's state for restore().
         
-        crit_text = " (CRITICAL HIT!)" if is_crit else ""
-        print(f"{self.name} dealt {damage} damage to {target.name} with {self.weapon.name}{crit_text}")
+        Attributes are copied with one dict copy and only the mutable containers
+        are copied again. Containers that still equal their copy in `base`, an
+        earlier snapshot of the same character, share that copy instead. The
+        compiled attack roll is kept too, since it only depends on the state
+        it was built from; restore() only reuses it on the same character.
+        """
+        state = self.__dict__.copy()
+        del state["health_bar"]
+        for name in SNAPSHOT_CONTAINERS:
+            container = state.get(name)
+            if container is None:
+                continue
+            if base is not None and base.get(name) == container:
+                state[name] = base[name]
+            elif name == "buffs":
+                state[name] = [buff.copy() for buff in container]
+            else:
+                state[name] = container.copy()
+        return state
+    
+    def restore(self, snapshot: dict) -> None:
+        """Return to a state from snapshot(), of this or another character.
         
-        if not target.is_alive:
-            print(f"{target.name} has been defeated!")
-            self.gain_experience(target.level * 25)
-            self.gold += target.level * 5
+        Containers that already equal the snapshot's are left alone; the rest
+        are replaced with fresh copies so the snapshot can be restored again.
+        Another character's compiled attack roll is dropped and rebuilt on the
+        next attack, since it was built for that character.
+        """
+        state = self.__dict__
+        live = [state.get(name) for name in SNAPSHOT_CONTAINERS]
+        listeners = state.get("stat_listeners")
+        changed = ()
+        if listeners:
+            changed = [stat for stat in TRACKED_STATS if state.get(stat) != snapshot.get(stat)]
+            if len(state.get("spells", ())) != len(snapshot.get("spells", ())):
+                changed.append("spells_known")
+        state.update(snapshot)
+        kernel = state.get("_attack_kernel")
+        if kernel is not None and kernel.owner != id(self):
+            state["_attack_kernel"] = None
+        if len(state) > len(snapshot) + 1:
+            # Attributes set since the snapshot was taken; health_bar is never in one
+            for name in state.keys() - snapshot.keys():
+                if name != "health_bar":
+                    del state[name]
+        # Listeners belong to the live character, not to the snapshot
+        if listeners is not None:
+            state["stat_listeners"] = listeners
+        else:
+            state.pop("stat_listeners", None)
+        for name, container in zip(SNAPSHOT_CONTAINERS, live):
+            saved = snapshot.get(name)
+            if saved is None:
+                continue
+            if container == saved:
+                state[name] = container
+            elif name == "buffs":
+                state[name] = [buff.copy() for buff in saved]
+            else:
+                state[name] = saved.copy()
+        if self.health_bar:
+            self.health_bar.update()
+        if changed:
+            self.stat_changed(*changed)
     
-    def cast_spell(self, spell, target=None):
+    def cast_spell(self, spell, target=None, rng=None):
         """Cast a spell if the character knows it"""
         if spell not in self.spells:
-            print(f"{self.name} doesn't know the spell {spell.name}!")
+            events.emit("spell_unknown", character=self.name, spell=spell.name)
             return False
         
         # Apply class-specific mana efficiency
@@ -69,13 +252,13 @@ class Character:
             mana_cost = int(mana_cost * get_class_mana_bonus(self.character_class))
         
         if self.mana < mana_cost:
-            print(f"{self.name} doesn't have enough mana to cast {spell.name}!")
+            events.emit("not_enough_mana", character=self.name, spell=spell.name)
             return False
         
         # Temporarily adjust spell mana cost for casting
         original_cost = spell.mana_cost
         spell.mana_cost = mana_cost
-        result = spell.cast(self, target)
+        result = spell.cast(self, target, rng)
         spell.mana_cost = original_cost  # Restore original cost
         
         return result
@@ -84,9 +267,10 @@ class Character:
         """Learn a new spell"""
         if spell not in self.spells:
             self.spells.append(spell)
-            print(f"{self.name} learned {spell.name}!")
+            self.stat_changed("spells_known")
+            events.emit("spell_learned", character=self.name, spell=spell.name)
         else:
-            print(f"{self.name} already knows {spell.name}!")
+            events.emit("spell_already_known", character=self.name, spell=spell.name)
     
     def regenerate_mana(self, amount: int = 0):
         """Regenerate mana over time or by amount"""
@@ -95,9 +279,19 @@ class Character:
         
         self.mana = min(self.mana + amount, self.mana_max)
     
+    def add_buff(self, buff: dict):
+        """Apply a buff/debuff"""
+        self.buffs.append(buff)
+        self.invalidate_attack()
+    
     def update_buffs(self):
         """Update buff durations and remove expired ones"""
-        self.buffs = [buff for buff in self.buffs if buff.get("duration", 0) > 0]
+        if not self.buffs:
+            return
+        active = [buff for buff in self.buffs if buff.get("duration", 0) > 0]
+        if len(active) != len(self.buffs):
+            self.invalidate_attack()
+        self.buffs = active
         for buff in self.buffs:
             buff["duration"] -= 1
     
@@ -117,25 +311,27 @@ class Character:
         self.health = min(self.health + amount, self.health_max)
         if self.health_bar:
             self.health_bar.update()
-        print(f"{self.name} healed for {amount} HP!")
+        events.emit("heal", character=self.name, amount=amount)
     
-    def gain_experience(self, exp: int) -> None:
+    def gain_experience(self, exp: int, rng=None) -> None:
         """Gain experience and level up if enough"""
         self.experience += exp
-        print(f"{self.name} gained {exp} experience!")
+        events.emit("experience_gained", character=self.name, amount=exp)
         
         while self.experience >= self.experience_to_next_level:
-            self.level_up()
+            self.level_up(rng)
     
-    def level_up(self) -> None:
+    def level_up(self, rng=None) -> None:
         """Level up the character"""
+        rng = rng_streams.resolve(rng)
         self.experience -= self.experience_to_next_level
         self.level += 1
         self.experience_to_next_level = int(self.experience_to_next_level * 1.5)
+        self.invalidate_attack()
         
         # Increase max health and mana
-        health_increase = random.randint(5, 15)
-        mana_increase = random.randint(3, 10)
+        health_increase = rng.randint(5, 15)
+        mana_increase = rng.randint(3, 10)
         self.health_max += health_increase
         self.health += health_increase  # Also heal on level up
         self.mana_max += mana_increase
@@ -143,7 +339,7 @@ class Character:
         
         # Increase skills
         for skill in self.skills:
-            self.skills[skill] += random.randint(1, 3)
+            self.skills[skill] += rng.randint(1, 3)
         
         # Apply class-specific level bonuses
         if hasattr(self, 'character_class'):
@@ -152,11 +348,11 @@ class Character:
             for skill, bonus in class_bonuses.items():
                 self.skills[skill] += bonus
                 if class_bonuses:
-                    print(f"Class bonus: +{bonus} {skill.capitalize()}!")
+                    events.emit("class_bonus", character=self.name, skill=skill, bonus=bonus)
         
-        print(f"🎉 {self.name} reached level {self.level}!")
-        print(f"Max HP increased by {health_increase}! Max Mana increased by {mana_increase}!")
-        print("All skills improved!")
+        events.emit("level_up", character=self.name, level=self.level,
+                    health_increase=health_increase, mana_increase=mana_increase)
+        self.stat_changed("level")
         
         if self.health_bar:
             self.health_bar.update()
@@ -186,6 +382,7 @@ class Hero(Character):
         """Equip a weapon"""
         old_weapon = self.weapon
         self.weapon = weapon
+        self.invalidate_attack()
         print(f"{self.name} equipped {self.weapon.name}.")
         if old_weapon != self.default_weapon:
             self.inventory.append(old_weapon)
@@ -195,20 +392,21 @@ class Hero(Character):
         if self.weapon != self.default_weapon:
             self.inventory.append(self.weapon)
         self.weapon = self.default_weapon
+        self.invalidate_attack()
         print(f"{self.name} dropped the weapon and equipped {self.weapon.name}.")
     
-    def use_potion(self) -> bool:
+    def use_potion(self, rng=None) -> bool:
         """Use a healing potion"""
         if self.potions > 0 and self.health < self.health_max:
             self.potions -= 1
-            heal_amount = random.randint(20, 40)
+            heal_amount = rng_streams.resolve(rng).randint(20, 40)
             self.heal(heal_amount)
-            print(f"{self.name} used a potion! ({self.potions} potions remaining)")
+            events.emit("potion_used", character=self.name, potions=self.potions)
             return True
         elif self.potions == 0:
-            print(f"{self.name} has no potions left!")
+            events.emit("no_potions", character=self.name)
         else:
-            print(f"{self.name} is already at full health!")
+            events.emit("full_health", character=self.name)
         return False
     
     def show_stats(self) -> None:
@@ -243,6 +441,7 @@ class Hero(Character):
         if self.skill_points > 0 and skill in self.skills:
             self.skills[skill] += 1
             self.skill_points -= 1
+            self.invalidate_attack()
             print(f"Increased {skill} to {self.skills[skill]}!")
             return True
         elif self.skill_points == 0:
@@ -252,30 +451,57 @@ class Hero(Character):
         return False
         
 class Enemy(Character):
-    def __init__(self, name: str, health: int, weapon, level: int = 1, enemy_type: str = "normal") -> None:
+    def __init__(self, name: str, health: int, weapon, level: int = 1, enemy_type: str = "normal",
+                 rng=None, base_gold: Optional[int] = None) -> None:
         super().__init__(name, health, level)
         self.weapon = weapon
         self.health_bar = HealthBar(self, color="red")
+        self._apply_enemy_type(enemy_type, rng, base_gold)
+    
+    def reset(self, name: str, health: int, weapon, level: int = 1, enemy_type: str = "normal",
+              rng=None, base_gold: Optional[int] = None) -> None:
+        """Return to the state of a newly constructed enemy, reusing its containers.
+        
+        Used by EnemyPool; draws the same random numbers as __init__.
+        """
+        self.name = name
+        self.health = health
+        self.health_max = health
+        self.level = level
+        self.weapon = weapon
+        self.experience = 0
+        self.experience_to_next_level = 100
+        self.is_alive = True
+        self.mana = 50 + (level * 10)
+        self.mana_max = self.mana
+        self.spells.clear()
+        self.buffs.clear()
+        skills = self.skills
+        skills.clear()
+        skills["strength"] = skills["agility"] = skills["intelligence"] = skills["luck"] = 10 + level
+        self.invalidate_attack()
+        self._apply_enemy_type(enemy_type, rng, base_gold)
+    
+    def _apply_enemy_type(self, enemy_type: str, rng, base_gold: Optional[int]) -> None:
         self.enemy_type = enemy_type
-        self.gold = level * random.randint(3, 8)
+        # Gold before the enemy type bonus, rolled unless the caller already did
+        self.gold = self.level * rng_streams.resolve(rng).randint(3, 8) if base_gold is None else base_gold
         
         # Adjust stats based on enemy type
-        if enemy_type == "elite":
-            self.health_max = int(self.health_max * 1.5)
-            self.health = self.health_max
-            self.gold *= 2
-        elif enemy_type == "boss":
-            self.health_max = int(self.health_max * 2.5)
+        if enemy_type in ENEMY_TYPE_MODIFIERS:
+            health_multiplier, gold_multiplier = ENEMY_TYPE_MODIFIERS[enemy_type]
+            self.health_max = int(self.health_max * health_multiplier)
             self.health = self.health_max
-            self.gold *= 3
+            self.gold *= gold_multiplier
+        self.health_bar.update()
     
-    def ai_action(self, target) -> None:
+    def ai_action(self, target, rng=None) -> None:
         """Simple AI for enemy actions"""
         if not self.is_alive:
             return
             
         # Simple AI: attack most of the time, occasionally "defend" (skip turn)
-        if random.random() < 0.1:  # 10% chance to skip turn
-            print(f"{self.name} is preparing for the next attack...")
+        if rng_streams.resolve(rng).random() < ENEMY_SKIP_CHANCE:
+            events.emit("enemy_prepare", character=self.name)
         else:
-            self.attack(target)
+            self.attack(target, rng)
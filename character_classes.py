@@ -5,7 +5,10 @@ This module defines different character classes that players can choose from,
 each with unique starting stats, equipment, spells, and progression bonuses.
 """
 
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
+import events
+from game_io import Flow, ask
+import rng as rng_streams
 from weapon import iron_sword, short_bow, dagger, magic_staff
 from spells import minor_heal, fireball, heal
 
@@ -42,6 +45,7 @@ class CharacterClass:
         
         # Store class reference
         hero.character_class = self
+        hero.invalidate_attack()
         
         print(f"\n🎭 {hero.name} has become a {self.name}!")
         print(f"✨ {self.description}")
@@ -147,13 +151,13 @@ def display_class_selection():
     return AVAILABLE_CLASSES
 
 
-def select_character_class():
+def select_character_class() -> Flow:
     """Allow player to select a character class"""
     available_classes = display_class_selection()
     
     while True:
         try:
-            choice = int(input(f"Choose class (1-{len(available_classes)}): "))
+            choice = int((yield from ask(f"Choose class (1-{len(available_classes)}): ")))
             if 1 <= choice <= len(available_classes):
                 return available_classes[choice - 1]
             else:
@@ -184,7 +188,22 @@ def get_class_level_bonuses(character_class: CharacterClass, new_level: int) ->
     return bonuses
 
 
-def apply_class_combat_bonuses(hero, damage: int) -> int:
+# Weapon types each class specializes in, and the damage multiplier they get with them
+CLASS_WEAPON_SPECIALTIES: Dict[str, List[str]] = {
+    "Warrior": ["sharp", "blunt"],
+    "Mage": ["magic"],
+    "Archer": ["ranged"],
+}
+
+CLASS_DAMAGE_MULTIPLIERS: Dict[str, float] = {
+    "Warrior": 1.15,
+    "Mage": 1.10,
+    "Archer": 1.20,
+    "Rogue": 1.5,  # Sneak attack multiplier
+}
+
+
+def apply_class_combat_bonuses(hero, damage: int, rng=None) -> int:
     """Apply class-specific combat bonuses"""
     if not hasattr(hero, 'character_class'):
         return damage
@@ -192,28 +211,42 @@ def apply_class_combat_bonuses(hero, damage: int) -> int:
     char_class = hero.character_class
     
     # Warrior: Extra damage with melee weapons
-    if char_class.name == "Warrior" and hero.weapon.weapon_type in ["sharp", "blunt"]:
-        damage = int(damage * 1.15)
+    if char_class.name == "Warrior" and hero.weapon.weapon_type in CLASS_WEAPON_SPECIALTIES["Warrior"]:
+        damage = int(damage * CLASS_DAMAGE_MULTIPLIERS["Warrior"])
     
     # Mage: Extra damage with magic weapons and spells
-    elif char_class.name == "Mage" and hero.weapon.weapon_type == "magic":
-        damage = int(damage * 1.10)
+    elif char_class.name == "Mage" and hero.weapon.weapon_type in CLASS_WEAPON_SPECIALTIES["Mage"]:
+        damage = int(damage * CLASS_DAMAGE_MULTIPLIERS["Mage"])
     
     # Archer: Extra damage with ranged weapons
-    elif char_class.name == "Archer" and hero.weapon.weapon_type == "ranged":
-        damage = int(damage * 1.20)
+    elif char_class.name == "Archer" and hero.weapon.weapon_type in CLASS_WEAPON_SPECIALTIES["Archer"]:
+        damage = int(damage * CLASS_DAMAGE_MULTIPLIERS["Archer"])
     
     # Rogue: Chance for extra damage based on luck
     elif char_class.name == "Rogue":
-        import random
         luck_bonus = hero.skills.get("luck", 10)
-        if random.random() < (luck_bonus * 0.01):  # Luck% chance for bonus damage
-            damage = int(damage * 1.5)
-            print("💀 Sneak Attack! Critical damage!")
+        if rng_streams.resolve(rng).random() < (luck_bonus * 0.01):  # Luck% chance for bonus damage
+            damage = int(damage * CLASS_DAMAGE_MULTIPLIERS["Rogue"])
+            events.emit("sneak_attack", character=hero.name)
     
     return damage
 
 
+def class_attack_modifiers(hero) -> Tuple[Optional[float], Optional[float]]:
+    """(damage multiplier, sneak attack chance) of the hero's class with its current weapon.
+    
+    Matches apply_class_combat_bonuses: with a sneak attack chance the
+    multiplier only applies when the sneak attack roll succeeds.
+    """
+    char_class = hero.character_class
+    if char_class.name in ("Warrior", "Mage", "Archer"):
+        if hero.weapon.weapon_type in CLASS_WEAPON_SPECIALTIES[char_class.name]:
+            return CLASS_DAMAGE_MULTIPLIERS[char_class.name], None
+    elif char_class.name == "Rogue":
+        return CLASS_DAMAGE_MULTIPLIERS["Rogue"], hero.skills.get("luck", 10) * 0.01
+    return None, None
+
+
 def get_class_mana_bonus(character_class: CharacterClass) -> float:
     """Get class-specific mana efficiency bonus"""
     if character_class.name == "Mage":
@@ -0,0 +1,473 @@
+"""
+Combat Policy Tables for Text-Based Battle Game
+
+A policy table holds the best hero action for every state of a fight,
+solved ahead of time by dynamic programming. There is one table per hero
+class, weapon, enemy level band and set of combat spells. During a battle
+the advice for the current turn is a single array index into the table,
+read from a memory-mapped file.
+
+The solver plays the same rules as battle_loop: attacks and enemy turns use
+the damage distributions of battle_odds; spells cost their class-adjusted
+mana as in Character.cast_spell and roll the same spread as Spell.cast;
+potions heal 20-40 and only when hurt; the hero regains a tenth of its max
+mana at the start of every turn; and a damage_boost buff strengthens attacks
+for as many turns as it has left. Divine Blessing is not an action, because
+battles ignore the buff its cast returns. Wins are valued like MCTSAgent
+values them, so health kept counts and potions cost a little.
+
+A state is the enemy's health, the hero's potions, buff turns, health and
+mana, each on a small grid of cells:
+
+- Health and mana are cut into equal steps. Damage and healing are split
+  between the two nearest whole numbers of cells with weights that keep
+  the average exact.
+- A spell needs all the mana cells its cost covers, so advice never names
+  a spell the hero cannot afford.
+- The hero is a fresh hero of the class at the level the band's enemies
+  meet. The enemy is a mix of every level and weapon EnemyGenerator rolls in
+  the band. Values above the top of a grid count as the top cell.
+
+A real hero's level, stats, skills and buffs other than damage_boost are
+not part of the key, so advice for them is approximate and is shown as such.
+
+A table file is a small header (grid sizes, cell steps and the spell of
+each action code) followed by one 4-bit action code per state, two states
+to a byte. Solving needs NumPy and takes about a second per table. Reading
+tables and giving advice only use the standard library.
+
+    python combat_policy.py --class Mage --bands 0 1 2    # solve tables into policies/
+    combat_hint(hero, enemy)                              # "Cast Fireball", or None without a table
+
+Usage: python combat_policy.py --class all [--bands 0 1] [--fights 300] [--dir policies]
+"""
+
+import argparse
+import contextlib
+import math
+import mmap
+import os
+import struct
+from typing import Dict, List, Optional, Tuple
+
+import events
+from auto_battle import (ATTACK_ACTION, DAMAGE_SPELL_SPREAD, FIRST_SPELL, HEAL_SPELL_SPREAD, POTION_ACTION,
+                         POTION_COST, POTION_HEAL, WIN_VALUE)
+from battle_odds import damage_distribution, enemy_turn_distribution
+from character import ENEMY_TYPE_MODIFIERS, Enemy
+from character_classes import AVAILABLE_CLASSES, get_class_mana_bonus
+from enemy_pool import ENEMY_POOL
+from game_utils import ENEMY_BASE_HEALTH_MAX, ENEMY_HEALTH_PER_LEVEL, EnemyGenerator
+from rng import GameRNG
+from simulation import ATTACK, POTION, build_hero, simulate_battle, spell_policy
+from spells import ALL_SPELLS
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+POLICY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "policies")
+
+# Enemy levels 1-3 are band 0, 4-6 band 1, and so on
+LEVEL_BAND_WIDTH = 3
+
+# Grid sizes; each dimension also has a cell 0
+ENEMY_CELLS = 40
+HERO_CELLS = 32
+MANA_CELLS = 24
+MAX_POTIONS = 5
+MAX_BUFF_TURNS = 3
+
+# Value iteration stops when no state value moves more than this
+TOLERANCE = 1e-6
+MAX_SWEEPS = 1000
+
+MAGIC = b"TBPOLICY"
+VERSION = 1
+# magic, version, enemy/hero/mana cells, max potions, max buff turns, spell count, enemy/hero/mana step
+HEADER = struct.Struct("<8sHHHHBBBxddd")
+
+SPELL_IDS = {spell.name: index for index, spell in enumerate(ALL_SPELLS)}
+COMBAT_SPELL_TYPES = ("damage", "heal")
+
+
+def level_band(level: int) -> int:
+    """Band of an enemy level"""
+    return (max(level, 1) - 1) // LEVEL_BAND_WIDTH
+
+
+def band_levels(band: int) -> range:
+    return range(band * LEVEL_BAND_WIDTH + 1, (band + 1) * LEVEL_BAND_WIDTH + 1)
+
+
+def band_hero_level(band: int) -> int:
+    """Level of the representative hero: battle_loop's enemies are the hero's level -1 to +2"""
+    return band * LEVEL_BAND_WIDTH + 1
+
+
+def combat_spells(spells) -> List:
+    """The spells a table plans with, in action code order"""
+    known = [spell for spell in spells if spell.spell_type in COMBAT_SPELL_TYPES]
+    return sorted(known, key=lambda spell: SPELL_IDS[spell.name])
+
+
+def table_path(class_name: str, weapon_name: str, band: int, spells, directory: str = POLICY_DIR) -> str:
+    ids = ".".join(str(SPELL_IDS[spell.name]) for spell in combat_spells(spells)) or "none"
+    name = f"{class_name}-{weapon_name}-band{band}-spells{ids}".lower().replace(" ", "_")
+    return os.path.join(directory, name + ".policy")
+
+
+def buff_turns(character) -> int:
+    """Turns, this one included, that the character's attacks are boosted"""
+    turns = 0
+    for buff in character.buffs:
+        if buff.get("effect") == "damage_boost":
+            turns = max(turns, buff.get("duration", 0) + 1)
+    return turns
+
+
+class PolicyTable:
+    """A solved policy table read from a memory-mapped file"""
+
+    def __init__(self, path: str):
+        with open(path, "rb") as file:
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.enemy_cells, self.hero_cells, self.mana_cells, self.max_potions,
+         self.max_buff_turns, spell_count, self.enemy_step, self.hero_step,
+         self.mana_step) = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            self._map.close()
+            raise ValueError(f"Not a version {VERSION} policy table: {path}")
+        self.spells = [ALL_SPELLS[spell_id] for spell_id in self._map[HEADER.size:HEADER.size + spell_count]]
+        self._body = HEADER.size + spell_count
+
+        # Strides of the (enemy, potions, buff turns, hero, mana) state index
+        self._mana_stride = 1
+        self._hero_stride = self.mana_cells + 1
+        self._buff_stride = self._hero_stride * (self.hero_cells + 1)
+        self._potion_stride = self._buff_stride * (self.max_buff_turns + 1)
+        self._enemy_stride = self._potion_stride * (self.max_potions + 1)
+
+    def close(self):
+        self._map.close()
+
+    def index(self, enemy_health: int, potions: int, boosted_turns: int, hero_health: int, mana: int) -> int:
+        """Index of the state holding these values"""
+        enemy = min(math.ceil(max(enemy_health, 0) / self.enemy_step), self.enemy_cells)
+        hero = min(math.ceil(max(hero_health, 0) / self.hero_step), self.hero_cells)
+        mana = min(int(max(mana, 0) / self.mana_step), self.mana_cells)
+        return (enemy * self._enemy_stride + min(potions, self.max_potions) * self._potion_stride
+                + min(boosted_turns, self.max_buff_turns) * self._buff_stride
+                + hero * self._hero_stride + mana)
+
+    def code(self, index: int) -> int:
+        """Action code stored for a state index"""
+        return (self._map[self._body + (index >> 1)] >> ((index & 1) << 2)) & 0xF
+
+    def action(self, hero, enemy):
+        """Best action for the hero this turn: ATTACK, POTION or a Spell"""
+        code = self.code(self.index(enemy.health, hero.potions, buff_turns(hero), hero.health, hero.mana))
+        if code == ATTACK_ACTION:
+            return ATTACK
+        if code == POTION_ACTION:
+            return POTION
+        return self.spells[code - FIRST_SPELL]
+
+
+_tables: Dict[str, PolicyTable] = {}
+
+
+def find_table(hero, enemy, directory: str = POLICY_DIR) -> Optional[PolicyTable]:
+    """The table for this hero and enemy, or None if it has not been solved"""
+    if not hasattr(hero, 'character_class'):
+        return None
+    path = table_path(hero.character_class.name, hero.weapon.name, level_band(enemy.level), hero.spells, directory)
+    table = _tables.get(path)
+    if table is None and os.path.exists(path):
+        # Missing tables are looked for again next time, so tables solved mid-game are picked up
+        table = _tables[path] = PolicyTable(path)
+    return table
+
+
+def clear_cache():
+    """Close open tables, so tables solved again since are picked up"""
+    for table in _tables.values():
+        table.close()
+    _tables.clear()
+
+
+def best_action(hero, enemy, directory: str = POLICY_DIR):
+    """The table's action for this turn, or None if there is no table"""
+    table = find_table(hero, enemy, directory)
+    return table.action(hero, enemy) if table is not None else None
+
+
+def table_policy(hero, enemy):
+    """Simulation policy that follows the policy tables, and spell_policy where there is none"""
+    action = best_action(hero, enemy)
+    return action if action is not None else spell_policy(hero, enemy)
+
+
+def combat_hint(hero, enemy) -> Optional[str]:
+    """Advice for the hero's turn, or None if there is no table.
+
+    The table was solved for a representative hero of the class at the
+    band's level, so the advice is approximate for this hero's own stats.
+    """
+    action = best_action(hero, enemy)
+    if action is None:
+        return None
+    if action == ATTACK:
+        return "Attack"
+    if action == POTION:
+        return "Use Potion"
+    return f"Cast {action.name}"
+
+
+def _shifts(distribution: Dict[int, float], step: float) -> List[Tuple[int, float]]:
+    """Cell shifts of an amount, each split between the two nearest whole shifts so the mean stays exact"""
+    shifts: Dict[int, float] = {}
+    for amount, p in distribution.items():
+        cells = amount / step
+        low = math.floor(cells)
+        high_share = cells - low
+        shifts[low] = shifts.get(low, 0.0) + p * (1.0 - high_share)
+        if high_share > 0:
+            shifts[low + 1] = shifts.get(low + 1, 0.0) + p * high_share
+    return sorted((shift, p) for shift, p in shifts.items() if p > 0)
+
+
+def _uniform(low: int, high: int) -> Dict[int, float]:
+    return {amount: 1.0 / (high - low + 1) for amount in range(low, high + 1)}
+
+
+def _representative_hero(class_name: str, weapon_name: Optional[str], band: int, spells):
+    with events.use_sink(events.NullSink()), open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        hero = build_hero(class_name, band_hero_level(band), weapon_name)
+    hero.spells = list(spells)
+    return hero
+
+
+def _band_enemy_turn(band: int) -> Dict[int, float]:
+    """Damage of one enemy turn, mixed over the levels and weapons of the band's enemies"""
+    mixture: Dict[int, float] = {}
+    levels = band_levels(band)
+    for level in levels:
+        weapons = EnemyGenerator.weapons[:min(len(EnemyGenerator.weapons), level + 2)]
+        for weapon in weapons:
+            weight = 1.0 / (len(levels) * len(weapons))
+            for damage, p in enemy_turn_distribution(Enemy("Enemy", 1, weapon, level, base_gold=0)).items():
+                mixture[damage] = mixture.get(damage, 0.0) + weight * p
+    return mixture
+
+
+def _band_enemy_health(band: int) -> int:
+    """Most health a band's enemy can have; bosses are rarer and count as the top cell"""
+    return int((ENEMY_BASE_HEALTH_MAX + band_levels(band)[-1] * ENEMY_HEALTH_PER_LEVEL)
+               * ENEMY_TYPE_MODIFIERS["elite"][0])
+
+
+def _after_turn(values, enemy_turn, regen):
+    """Value after the enemy's turn and the next turn's mana regen, for every state the hero's action leads to"""
+    mana_cells = values.shape[2] - 1
+    regenerated = np.zeros_like(values)
+    for shift, p in regen:
+        regenerated += p * values[:, :, np.minimum(np.arange(mana_cells + 1) + shift, mana_cells)]
+    result = np.zeros_like(values)
+    hero_cells = values.shape[1] - 1
+    for damage, p in enemy_turn:
+        if damage < hero_cells:
+            result[:, damage + 1:, :] += p * regenerated[:, 1:hero_cells + 1 - damage, :]
+    return result
+
+
+def _strike(after, win, damage_shifts):
+    """Value of hitting the enemy, before the action's mana cost"""
+    enemy_cells = after.shape[0] - 1
+    result = np.zeros_like(after)
+    for damage, p in damage_shifts:
+        if damage < enemy_cells:
+            result[damage + 1:] += p * after[1:enemy_cells + 1 - damage]
+        result[1:min(damage, enemy_cells) + 1] += p * win
+    return result
+
+
+def _heal(after, heal_shifts):
+    """Value of healing, before the action's cost"""
+    hero_cells = after.shape[1] - 1
+    result = np.zeros_like(after)
+    for amount, p in heal_shifts:
+        result += p * after[:, np.minimum(np.arange(hero_cells + 1) + amount, hero_cells), :]
+    return result
+
+
+def _pay(values, cost: int):
+    """Values seen from the mana cell before paying `cost` cells"""
+    paid = np.zeros_like(values)
+    if cost < values.shape[2]:
+        paid[:, :, cost:] = values[:, :, :values.shape[2] - cost]
+    return paid
+
+
+def solve_table(class_name: str, weapon_name: Optional[str], band: int, spells) -> Tuple[bytes, bytes]:
+    """Solve the table of one matchup and return its header and packed action codes"""
+    if np is None:
+        raise RuntimeError("Solving policy tables needs NumPy")
+    spells = combat_spells(spells)
+    hero = _representative_hero(class_name, weapon_name, band, spells)
+    enemy_step = _band_enemy_health(band) / ENEMY_CELLS
+    hero_step = hero.health_max / HERO_CELLS
+    mana_step = hero.mana_max / MANA_CELLS
+
+    attack = _shifts(damage_distribution(hero), enemy_step)
+    hero.add_buff({"type": "buff", "duration": 1, "effect": "damage_boost"})
+    boosted_attack = _shifts(damage_distribution(hero), enemy_step)
+    enemy_turn = _shifts(_band_enemy_turn(band), hero_step)
+    regen = _shifts({hero.mana_max // 10: 1.0}, mana_step)
+    potion = _shifts(_uniform(*POTION_HEAL), hero_step)
+
+    mana_bonus = get_class_mana_bonus(hero.character_class)
+    spell_actions = []
+    for spell in spells:
+        cost = math.ceil(int(spell.mana_cost * mana_bonus) / mana_step - 1e-9)
+        if spell.spell_type == "damage":
+            spread = _uniform(spell.damage - DAMAGE_SPELL_SPREAD, spell.damage + DAMAGE_SPELL_SPREAD)
+            spell_actions.append((cost, True, _shifts(spread, enemy_step)))
+        else:
+            spread = _uniform(spell.damage - HEAL_SPELL_SPREAD, spell.damage + HEAL_SPELL_SPREAD)
+            spell_actions.append((cost, False, _shifts(spread, hero_step)))
+
+    shape = (ENEMY_CELLS + 1, HERO_CELLS + 1, MANA_CELLS + 1)
+    win = (WIN_VALUE + (1.0 - WIN_VALUE) * np.arange(HERO_CELLS + 1) / HERO_CELLS).reshape(1, -1, 1)
+    alive = np.zeros(shape, dtype=bool)
+    alive[1:, 1:, :] = True
+    hurt = np.zeros(shape, dtype=bool)
+    hurt[:, :HERO_CELLS, :] = True
+
+    def action_values(after, after_potion, boosted):
+        """Value of every action in every state, -inf where it cannot be taken"""
+        options = [_strike(after, win, boosted_attack if boosted else attack)]
+        if after_potion is None:
+            options.append(np.full(shape, -np.inf))
+        else:
+            options.append(np.where(hurt, _heal(after_potion, potion) - POTION_COST, -np.inf))
+        for cost, damage, shifts in spell_actions:
+            if damage:
+                value = _strike(_pay(after, cost), win, shifts)
+            else:
+                value = np.where(hurt, _heal(_pay(after, cost), shifts), -np.inf)
+            value[:, :, :cost] = -np.inf
+            options.append(value)
+        options = np.stack(options)
+        options[:, ~alive] = 0.0
+        return options
+
+    # Potions only go down and buff turns only run out, so each (potions, buff turns) layer
+    # depends on layers solved before it, and on itself only when no buff is left
+    values = np.zeros((MAX_POTIONS + 1, MAX_BUFF_TURNS + 1) + shape)
+    codes = np.zeros((ENEMY_CELLS + 1, MAX_POTIONS + 1, MAX_BUFF_TURNS + 1) + shape[1:], dtype=np.uint8)
+    for potions in range(MAX_POTIONS + 1):
+        after_potion = _after_turn(values[potions - 1, 0], enemy_turn, regen) if potions else None
+        layer = values[potions, 0]
+        for _ in range(MAX_SWEEPS):
+            options = action_values(_after_turn(layer, enemy_turn, regen), after_potion, False)
+            updated = options.max(axis=0)
+            converged = np.abs(updated - layer).max() < TOLERANCE
+            layer[...] = updated
+            if converged:
+                break
+        codes[:, potions, 0] = options.argmax(axis=0)
+
+        for turns in range(1, MAX_BUFF_TURNS + 1):
+            after_potion = (_after_turn(values[potions - 1, turns - 1], enemy_turn, regen)
+                            if potions else None)
+            options = action_values(_after_turn(values[potions, turns - 1], enemy_turn, regen),
+                                    after_potion, True)
+            values[potions, turns] = options.max(axis=0)
+            codes[:, potions, turns] = options.argmax(axis=0)
+
+    flat = codes.ravel()
+    if len(flat) % 2:
+        flat = np.append(flat, np.uint8(0))
+    packed = flat[0::2] | (flat[1::2] << 4)
+    header = HEADER.pack(MAGIC, VERSION, ENEMY_CELLS, HERO_CELLS, MANA_CELLS, MAX_POTIONS, MAX_BUFF_TURNS,
+                         len(spells), enemy_step, hero_step, mana_step)
+    return header + bytes(SPELL_IDS[spell.name] for spell in spells), packed.tobytes()
+
+
+def build_table(class_name: str, weapon_name: Optional[str], band: int, spells=None,
+                directory: str = POLICY_DIR) -> str:
+    """Solve one table and write it, by default for the class's starting weapon and spells.
+
+    Returns the path of the table file.
+    """
+    char_class = next(c for c in AVAILABLE_CLASSES if c.name.lower() == class_name.lower())
+    weapon_name = weapon_name or char_class.starting_weapon.name
+    spells = char_class.starting_spells if spells is None else spells
+    header, body = solve_table(char_class.name, weapon_name, band, spells)
+
+    os.makedirs(directory, exist_ok=True)
+    path = table_path(char_class.name, weapon_name, band, spells, directory)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        file.write(header)
+        file.write(body)
+    os.replace(temporary, path)
+    return path
+
+
+def _compare(fights: int, class_name: str, band: int, seed: int, directory: str) -> Dict[str, float]:
+    """Win rates of spell_policy and of following the tables on the same matchups"""
+    def follow_tables(hero, enemy):
+        action = best_action(hero, enemy, directory)
+        return action if action is not None else spell_policy(hero, enemy)
+
+    level = band_hero_level(band)
+    results = {}
+    with events.use_sink(events.NullSink()), open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        for name, policy in (("spell", spell_policy), ("table", follow_tables)):
+            wins = 0
+            for index in range(fights):
+                rng = GameRNG(seed).spawn(index)
+                hero = build_hero(class_name, level)
+                enemy = EnemyGenerator.generate_enemy(max(1, level + rng.randint(-1, 2)), rng)
+                simulate_battle(hero, enemy, policy, rng)
+                wins += hero.is_alive and not enemy.is_alive
+                ENEMY_POOL.release(enemy)
+            results[name] = wins / fights
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solve combat policy tables for classes' starting weapons "
+                                                 "and spells.")
+    parser.add_argument("--class", dest="class_name", default="all",
+                        choices=["all"] + [c.name for c in AVAILABLE_CLASSES])
+    parser.add_argument("--weapon", default=None, help="weapon to solve for (default: the starting weapon)")
+    parser.add_argument("--bands", type=int, nargs="+", default=[0, 1, 2],
+                        help=f"enemy level bands, {LEVEL_BAND_WIDTH} levels each, from 0")
+    parser.add_argument("--fights", type=int, default=0,
+                        help="compare the tables with spell_policy over this many fights per band")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--dir", default=POLICY_DIR, help="directory for the table files")
+    args = parser.parse_args()
+
+    classes = [c.name for c in AVAILABLE_CLASSES] if args.class_name == "all" else [args.class_name]
+    for class_name in classes:
+        for band in args.bands:
+            path = build_table(class_name, args.weapon, band, directory=args.dir)
+            print(f"{path} ({os.path.getsize(path)} bytes)")
+
+    if args.fights:
+        print(f"{'class':<10}{'band':>6}{'spell':>10}{'table':>10}")
+        for class_name in classes:
+            for band in args.bands:
+                results = _compare(args.fights, class_name, band, args.seed, args.dir)
+                print(f"{class_name:<10}{band:>6}{results['spell']:>10.1%}{results['table']:>10.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Combatant Store for Text-Based Battle Game
+
+This module keeps large simulated enemy populations in a structure-of-arrays
+table instead of one full Enemy object per combatant. Each column is a
+compact typed array, and lightweight views expose the attributes that
+Character.attack and take_damage rely on, so table rows can fight heroes
+(and each other) without being turned into objects.
+"""
+
+from array import array
+from typing import Dict, Iterator, List
+
+import rng as rng_streams
+from character import Character, Enemy, ENEMY_TYPE_MODIFIERS, build_attack_kernel
+from game_utils import EnemyGenerator
+from weapon import ALL_WEAPONS
+
+ENEMY_TYPES: List[str] = ["normal", "elite", "boss"]
+ENEMY_TYPE_CODES: Dict[str, int] = {name: code for code, name in enumerate(ENEMY_TYPES)}
+SKILL_NAMES = ("strength", "agility", "intelligence", "luck")
+
+_WEAPON_IDS = {id(weapon): index for index, weapon in enumerate(ALL_WEAPONS)}
+
+
+class CombatantTable:
+    """Array-backed table of combatants, one row per combatant"""
+
+    # Column name -> array typecode
+    COLUMNS = {
+        "health": "i",
+        "health_max": "i",
+        "mana": "i",
+        "gold": "i",
+        "level": "h",
+        "strength": "h",
+        "agility": "h",
+        "intelligence": "h",
+        "luck": "h",
+        "weapon_id": "B",
+        "enemy_type": "B",
+        "name_id": "H",
+    }
+
+    def __init__(self):
+        for column, typecode in self.COLUMNS.items():
+            setattr(self, column, array(typecode))
+        self.names: List[str] = []
+        self._name_ids: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.health)
+
+    def __iter__(self) -> Iterator["CombatantView"]:
+        for index in range(len(self)):
+            yield CombatantView(self, index)
+
+    def view(self, index: int) -> "CombatantView":
+        """Get a view of a single row"""
+        if not 0 <= index < len(self):
+            raise IndexError(f"Combatant index {index} out of range")
+        return CombatantView(self, index)
+
+    def _intern_name(self, name: str) -> int:
+        name_id = self._name_ids.get(name)
+        if name_id is None:
+            name_id = len(self.names)
+            self.names.append(name)
+            self._name_ids[name] = name_id
+        return name_id
+
+    def add(self, name: str, health: int, weapon, level: int = 1,
+            enemy_type: str = "normal", gold: int = 0) -> int:
+        """Add a combatant with the stats a fresh Enemy would have and return its row index"""
+        modifiers = ENEMY_TYPE_MODIFIERS.get(enemy_type)
+        if modifiers:
+            health = int(health * modifiers[0])
+        self.health.append(health)
+        self.health_max.append(health)
+        self.mana.append(50 + (level * 10))
+        self.gold.append(gold)
+        self.level.append(level)
+        for skill in SKILL_NAMES:
+            getattr(self, skill).append(10 + level)
+        self.weapon_id.append(_WEAPON_IDS[id(weapon)])
+        self.enemy_type.append(ENEMY_TYPE_CODES[enemy_type])
+        self.name_id.append(self._intern_name(name))
+        return len(self.health) - 1
+
+    def add_enemy(self, enemy: Enemy) -> int:
+        """Copy an existing Enemy into the table and return its row index"""
+        index = len(self.health)
+        self.health.append(enemy.health)
+        self.health_max.append(enemy.health_max)
+        self.mana.append(enemy.mana)
+        self.gold.append(enemy.gold)
+        self.level.append(enemy.level)
+        for skill in SKILL_NAMES:
+            getattr(self, skill).append(enemy.skills[skill])
+        self.weapon_id.append(_WEAPON_IDS[id(enemy.weapon)])
+        self.enemy_type.append(ENEMY_TYPE_CODES[enemy.enemy_type])
+        self.name_id.append(self._intern_name(enemy.name))
+        return index
+
+    def spawn_enemies(self, count: int, level: int, rng=None) -> range:
+        """Generate random enemies with the same rules as EnemyGenerator.generate_enemy"""
+        rng = rng_streams.resolve(rng)
+        start = len(self)
+        for _ in range(count):
+            name, health, weapon, enemy_type = EnemyGenerator.roll_enemy(level, rng)
+            gold = level * rng.randint(3, 8)
+            modifiers = ENEMY_TYPE_MODIFIERS.get(enemy_type)
+            if modifiers:
+                gold *= modifiers[1]
+            self.add(name, health, weapon, level, enemy_type, gold)
+        return range(start, len(self))
+
+    def alive_count(self) -> int:
+        """Count rows with health left"""
+        return sum(1 for health in self.health if health > 0)
+
+    def nbytes(self) -> int:
+        """Bytes held by the column buffers"""
+        return sum(len(getattr(self, column)) * getattr(self, column).itemsize
+                   for column in self.COLUMNS)
+
+
+class SkillsView:
+    """Dict-like access to the skill columns of one row"""
+
+    __slots__ = ("_table", "_index")
+
+    def __init__(self, table: CombatantTable, index: int):
+        self._table = table
+        self._index = index
+
+    def __getitem__(self, skill: str) -> int:
+        if skill not in SKILL_NAMES:
+            raise KeyError(skill)
+        return getattr(self._table, skill)[self._index]
+
+    def __setitem__(self, skill: str, value: int):
+        if skill not in SKILL_NAMES:
+            raise KeyError(skill)
+        getattr(self._table, skill)[self._index] = value
+
+    def __contains__(self, skill) -> bool:
+        return skill in SKILL_NAMES
+
+    def __iter__(self):
+        return iter(SKILL_NAMES)
+
+    def get(self, skill: str, default=None):
+        return self[skill] if skill in SKILL_NAMES else default
+
+    def items(self):
+        return [(skill, self[skill]) for skill in SKILL_NAMES]
+
+
+class CombatantView:
+    """Lightweight stand-in for an Enemy backed by one table row"""
+
+    __slots__ = ("_table", "_index")
+
+    # Table rows carry no per-row buffs, spells, health bar or stat listeners
+    buffs = ()
+    spells = ()
+    health_bar = None
+    stat_listeners = ()
+
+    def __init__(self, table: CombatantTable, index: int):
+        self._table = table
+        self._index = index
+
+    @property
+    def index(self) -> int:
+        return self._index
+
+    @property
+    def name(self) -> str:
+        return self._table.names[self._table.name_id[self._index]]
+
+    @property
+    def health(self) -> int:
+        return self._table.health[self._index]
+
+    @health.setter
+    def health(self, value: int):
+        self._table.health[self._index] = value
+
+    @property
+    def health_max(self) -> int:
+        return self._table.health_max[self._index]
+
+    @property
+    def mana(self) -> int:
+        return self._table.mana[self._index]
+
+    @mana.setter
+    def mana(self, value: int):
+        self._table.mana[self._index] = value
+
+    @property
+    def mana_max(self) -> int:
+        """Rows start with a fresh enemy's full mana and never level up"""
+        return 50 + self.level * 10
+
+    @property
+    def gold(self) -> int:
+        return self._table.gold[self._index]
+
+    @gold.setter
+    def gold(self, value: int):
+        self._table.gold[self._index] = value
+
+    @property
+    def level(self) -> int:
+        return self._table.level[self._index]
+
+    @property
+    def skills(self) -> SkillsView:
+        return SkillsView(self._table, self._index)
+
+    @property
+    def weapon(self):
+        return ALL_WEAPONS[self._table.weapon_id[self._index]]
+
+    @property
+    def enemy_type(self) -> str:
+        return ENEMY_TYPES[self._table.enemy_type[self._index]]
+
+    @property
+    def is_alive(self) -> bool:
+        return self._table.health[self._index] > 0
+
+    def take_damage(self, damage: int) -> None:
+        """Take damage, clamping health at zero"""
+        health = self._table.health[self._index] - damage
+        self._table.health[self._index] = health if health > 0 else 0
+
+    def heal(self, amount: int) -> None:
+        """Heal up to max health"""
+        if self.is_alive:
+            self.health = min(self.health + amount, self.health_max)
+
+    def gain_experience(self, exp: int, rng=None) -> None:
+        """Table combatants do not level up"""
+
+    def update_buffs(self):
+        """Table combatants carry no buffs"""
+
+    # Views hold no state of their own, so the attack roll is compiled per attack
+    _attack_kernel = None
+
+    def compile_attack(self):
+        return build_attack_kernel(self)
+
+    # Reuse the combat rules of full characters
+    attack = Character.attack
+    stat_changed = Character.stat_changed
+    change_stat = Character.change_stat
+    regenerate_mana = Character.regenerate_mana
+    ai_action = Enemy.ai_action
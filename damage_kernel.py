@@ -0,0 +1,158 @@
+"""
+Batched Damage Resolution for Text-Based Battle Game
+
+This module resolves one attack round for many attacker/target pairs at once.
+It applies the same rules as Character.attack: weapon critical hits, the
+level and strength bonuses, class weapon specialties, the Rogue sneak attack
+and the damage_boost buff. Results are distribution-identical to the scalar
+path, although individual rolls are drawn from a different random stream.
+
+NumPy is used when it is installed. Without it the same rules run in a
+plain Python loop so the module keeps working on the standard library alone.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import rng as rng_streams
+from character import DAMAGE_BOOST_MULTIPLIER
+from character_classes import CLASS_DAMAGE_MULTIPLIERS, CLASS_WEAPON_SPECIALTIES
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+# Integer codes used in the batch arrays. Id 0 means "no class".
+CLASS_IDS: Dict[Optional[str], int] = {None: 0, "Warrior": 1, "Mage": 2, "Archer": 3, "Rogue": 4}
+WEAPON_TYPE_IDS: Dict[str, int] = {"sharp": 0, "blunt": 1, "ranged": 2, "magic": 3}
+ROGUE_ID = CLASS_IDS["Rogue"]
+
+
+def class_multiplier_table() -> List[List[float]]:
+    """Build the [class id][weapon type id] damage multiplier table from the class rules"""
+    table = [[1.0] * len(WEAPON_TYPE_IDS) for _ in CLASS_IDS]
+    for class_name, weapon_types in CLASS_WEAPON_SPECIALTIES.items():
+        for weapon_type in weapon_types:
+            table[CLASS_IDS[class_name]][WEAPON_TYPE_IDS[weapon_type]] = CLASS_DAMAGE_MULTIPLIERS[class_name]
+    return table
+
+
+class AttackBatch:
+    """Column arrays describing a batch of attackers"""
+
+    def __init__(self, weapon_damage: Sequence[int], crit_chance: Sequence[float],
+                 level: Sequence[int], strength: Sequence[int],
+                 class_id: Optional[Sequence[int]] = None, weapon_type_id: Optional[Sequence[int]] = None,
+                 luck: Optional[Sequence[int]] = None, damage_boost: Optional[Sequence[bool]] = None):
+        size = len(weapon_damage)
+        self.weapon_damage = weapon_damage
+        self.crit_chance = crit_chance
+        self.level = level
+        self.strength = strength
+        self.class_id = class_id if class_id is not None else [0] * size
+        self.weapon_type_id = weapon_type_id if weapon_type_id is not None else [0] * size
+        self.luck = luck if luck is not None else [10] * size
+        self.damage_boost = damage_boost if damage_boost is not None else [False] * size
+
+    def __len__(self) -> int:
+        return len(self.weapon_damage)
+
+    @classmethod
+    def from_characters(cls, characters) -> "AttackBatch":
+        """Build a batch from Character objects"""
+        weapon_damage, crit_chance, level, strength = [], [], [], []
+        class_id, weapon_type_id, luck, damage_boost = [], [], [], []
+        for character in characters:
+            weapon_damage.append(character.weapon.damage)
+            crit_chance.append(character.weapon.crit_chance)
+            level.append(character.level)
+            strength.append(character.skills["strength"])
+            char_class = getattr(character, 'character_class', None)
+            class_id.append(CLASS_IDS.get(char_class.name if char_class else None, 0))
+            weapon_type_id.append(WEAPON_TYPE_IDS.get(character.weapon.weapon_type, 0))
+            luck.append(character.skills.get("luck", 10))
+            damage_boost.append(any(buff.get("effect") == "damage_boost" for buff in character.buffs))
+        return cls(weapon_damage, crit_chance, level, strength, class_id, weapon_type_id, luck, damage_boost)
+
+
+class AttackRoundResult:
+    """Per-pair outcome of a resolved attack round"""
+
+    def __init__(self, damage, is_crit, sneak_attack, target_health=None):
+        self.damage = damage
+        self.is_crit = is_crit
+        self.sneak_attack = sneak_attack
+        self.target_health = target_health
+
+
+def resolve_attack_round(batch: AttackBatch, target_health: Optional[Sequence[int]] = None,
+                         rng=None) -> AttackRoundResult:
+    """Resolve one attack from every attacker in the batch against its paired target.
+
+    `rng` is a random.Random or GameRNG (or the global random module when
+    left out) with or without NumPy; a seeded one gives the same result on
+    every call. With NumPy installed the result fields are arrays, otherwise
+    lists. `target_health`, when given, is reduced by the damage
+    dealt and clamped at zero, like Character.take_damage.
+    """
+    if np is not None:
+        return _resolve_numpy(batch, target_health, rng)
+    return _resolve_python(batch, target_health, rng)
+
+
+def _resolve_numpy(batch: AttackBatch, target_health, rng) -> AttackRoundResult:
+    rng = rng_streams.numpy_generator(rng)
+    size = len(batch)
+    weapon_damage = np.asarray(batch.weapon_damage, dtype=np.int64)
+    class_id = np.asarray(batch.class_id, dtype=np.intp)
+
+    is_crit = rng.random(size) < np.asarray(batch.crit_chance, dtype=np.float64)
+    damage = np.where(is_crit, weapon_damage * 2, weapon_damage)
+    damage += np.asarray(batch.level, dtype=np.int64) // 2
+    damage += np.asarray(batch.strength, dtype=np.int64) // 5
+
+    # int() truncation in the scalar path is a floor here because damage is never negative
+    multiplier = np.asarray(class_multiplier_table())[class_id, np.asarray(batch.weapon_type_id, dtype=np.intp)]
+    damage = np.floor(damage * multiplier).astype(np.int64)
+
+    luck_chance = np.asarray(batch.luck, dtype=np.float64) * 0.01
+    sneak_attack = (class_id == ROGUE_ID) & (rng.random(size) < luck_chance)
+    damage = np.where(sneak_attack, np.floor(damage * CLASS_DAMAGE_MULTIPLIERS["Rogue"]).astype(np.int64), damage)
+
+    boosted = np.asarray(batch.damage_boost, dtype=bool)
+    damage = np.where(boosted, np.floor(damage * DAMAGE_BOOST_MULTIPLIER).astype(np.int64), damage)
+
+    remaining = None
+    if target_health is not None:
+        remaining = np.maximum(np.asarray(target_health, dtype=np.int64) - damage, 0)
+    return AttackRoundResult(damage, is_crit, sneak_attack, remaining)
+
+
+def _resolve_python(batch: AttackBatch, target_health, rng) -> AttackRoundResult:
+    rng = rng_streams.resolve(rng)
+    table = class_multiplier_table()
+    sneak_multiplier = CLASS_DAMAGE_MULTIPLIERS["Rogue"]
+    damages, crits, sneaks = [], [], []
+
+    for i in range(len(batch)):
+        weapon_damage = batch.weapon_damage[i]
+        is_crit = rng.random() < batch.crit_chance[i]
+        damage = weapon_damage * 2 if is_crit else weapon_damage
+        damage += batch.level[i] // 2 + batch.strength[i] // 5
+
+        class_id = batch.class_id[i]
+        damage = int(damage * table[class_id][batch.weapon_type_id[i]])
+        sneak = class_id == ROGUE_ID and rng.random() < batch.luck[i] * 0.01
+        if sneak:
+            damage = int(damage * sneak_multiplier)
+        if batch.damage_boost[i]:
+            damage = int(damage * DAMAGE_BOOST_MULTIPLIER)
+
+        damages.append(damage)
+        crits.append(is_crit)
+        sneaks.append(sneak)
+
+    remaining = None
+    if target_health is not None:
+        remaining = [max(health - damage, 0) for health, damage in zip(target_health, damages)]
+    return AttackRoundResult(damages, crits, sneaks, remaining)
@@ -1,8 +1,27 @@
-import random
-from typing import List, Optional, Dict, Any
+import rng as rng_streams
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Iterable, Tuple
 from character import Enemy
+from battle_odds import BattleOdds, battle_odds, describe_odds
+from enemy_pool import ENEMY_POOL
 from weapon import short_bow, iron_sword, steel_sword, war_hammer, crossbow, magic_staff
 
+# (name, min_level, max_level); a dungeon's id is its position, so only append
+DUNGEON_CATALOG = [
+    ("Goblin Caves", 1, 3),
+    ("Abandoned Mine", 3, 5),
+    ("Dark Forest Temple", 5, 7),
+    ("Ancient Ruins", 7, 10),
+    ("Dragon's Lair", 10, 15)
+]
+
+# Stream index of the room layout; room N is generated from stream N + 1
+LAYOUT_STREAM = 0
+
+# New games pick one of this many layouts per dungeon, so sessions share templates
+DUNGEON_VARIANTS = 64
+DEFAULT_TEMPLATE_CACHE_SIZE = 512
+
 class Room:
     def __init__(self, name: str, description: str, room_type: str = "normal"):
         self.name = name
@@ -12,21 +31,71 @@ class Room:
         self.enemy: Optional[Enemy] = None
         self.treasure: Optional[Dict[str, Any]] = None
 
-class Dungeon:
-    def __init__(self, name: str, min_level: int, max_level: int):
+class EnemySpec:
+    """The rolled stats of a room enemy, used to build a fresh Enemy for each run"""
+    
+    __slots__ = ("name", "health", "weapon", "level", "enemy_type", "base_gold")
+    
+    def __init__(self, name: str, health: int, weapon, level: int, enemy_type: str, base_gold: int):
+        self.name = name
+        self.health = health
+        self.weapon = weapon
+        self.level = level
+        self.enemy_type = enemy_type
+        self.base_gold = base_gold
+    
+    def create(self) -> Enemy:
+        return ENEMY_POOL.acquire(self.name, self.health, self.weapon, self.level, self.enemy_type,
+                                  base_gold=self.base_gold)
+
+class RoomTemplate:
+    """Immutable description of one room"""
+    
+    __slots__ = ("name", "description", "room_type", "enemy", "treasure")
+    
+    def __init__(self, name: str, description: str, room_type: str,
+                 enemy: Optional[EnemySpec] = None, treasure: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.description = description
+        self.room_type = room_type
+        self.enemy = enemy
+        self.treasure = treasure
+    
+    def create_room(self) -> Room:
+        """Build the mutable room a hero explores"""
+        room = Room(self.name, self.description, self.room_type)
+        if self.enemy is not None:
+            room.enemy = self.enemy.create()
+        if self.treasure is not None:
+            room.treasure = dict(self.treasure)
+        return room
+
+class DungeonTemplate:
+    """Immutable, pre-generated rooms of a dungeon, shared by every run with the same seed.
+    
+    The layout comes from the seed's layout stream and each room from its own
+    stream, so the same (name, level band, seed) always gives the same dungeon.
+    """
+    
+    __slots__ = ("name", "min_level", "max_level", "seed", "rooms")
+    
+    def __init__(self, name: str, min_level: int, max_level: int, seed: int):
         self.name = name
         self.min_level = min_level
         self.max_level = max_level
-        self.rooms = self._generate_rooms()
-        self.current_room = 0
-        self.completed = False
+        self.seed = seed
+        
+        root = rng_streams.GameRNG(seed)
+        room_types = self._generate_layout(root.spawn(LAYOUT_STREAM))
+        self.rooms: Tuple[RoomTemplate, ...] = tuple(
+            self._create_room(room_type, i, root.spawn(i + 1)) for i, room_type in enumerate(room_types))
     
-    def _generate_rooms(self) -> List[Room]:
-        """Generate rooms for the dungeon"""
-        rooms = []
+    def _generate_layout(self, rng) -> List[str]:
+        """Draw the room types for the dungeon"""
+        room_types = []
         
         # Generate 5-8 rooms
-        num_rooms = random.randint(5, 8)
+        num_rooms = rng.randint(5, 8)
         
         for i in range(num_rooms):
             if i == 0:
@@ -37,14 +106,13 @@ class Dungeon:
                 room_type = "boss"
             else:
                 # Random room types for middle rooms
-                room_type = random.choice(["normal", "normal", "treasure", "rest"])
+                room_type = rng.choice(["normal", "normal", "treasure", "rest"])
             
-            room = self._create_room(room_type, i)
-            rooms.append(room)
+            room_types.append(room_type)
         
-        return rooms
+        return room_types
     
-    def _create_room(self, room_type: str, room_number: int) -> Room:
+    def _create_room(self, room_type: str, room_number: int, rng) -> RoomTemplate:
         """Create a specific type of room"""
         room_names = {
             "normal": ["Dark Corridor", "Ancient Chamber", "Crumbling Hall", "Shadowy Passage"],
@@ -60,59 +128,147 @@ class Dungeon:
             "rest": "A safe place to rest and recover."
         }
         
-        name = random.choice(room_names[room_type])
+        name = rng.choice(room_names[room_type])
         description = descriptions[room_type]
         
-        room = Room(f"Room {room_number + 1}: {name}", description, room_type)
-        
         # Populate room based on type
+        enemy, treasure = None, None
         if room_type in ["normal", "boss"]:
-            room.enemy = self._generate_room_enemy(room_type)
+            enemy = self._roll_room_enemy(room_type, rng)
         elif room_type == "treasure":
-            room.treasure = self._generate_treasure()
+            treasure = self._generate_treasure(rng)
         
-        return room
+        return RoomTemplate(f"Room {room_number + 1}: {name}", description, room_type, enemy, treasure)
     
-    def _generate_room_enemy(self, room_type: str) -> Enemy:
-        """Generate an enemy for the room"""
+    def _roll_room_enemy(self, room_type: str, rng) -> EnemySpec:
+        """Roll an enemy for the room"""
         enemy_names = ["Cave Troll", "Shadow Beast", "Undead Warrior", "Dark Mage", "Stone Golem"]
         
         if room_type == "boss":
             enemy_names = ["Dungeon Lord", "Ancient Dragon", "Lich King", "Demon Prince", "Elder Beast"]
         
-        name = random.choice(enemy_names)
-        level = random.randint(self.min_level, self.max_level)
-        base_health = random.randint(80, 120)
+        name = rng.choice(enemy_names)
+        level = rng.randint(self.min_level, self.max_level)
+        base_health = rng.randint(80, 120)
         health = base_health + (level * 15)
         
         # Select weapon
         weapons = [short_bow, iron_sword, steel_sword, war_hammer, crossbow, magic_staff]
-        weapon = random.choice(weapons)
+        weapon = rng.choice(weapons)
         
-        enemy_type = "boss" if room_type == "boss" else random.choice(["normal", "elite"])
+        enemy_type = "boss" if room_type == "boss" else rng.choice(["normal", "elite"])
+        base_gold = level * rng.randint(3, 8)
         
-        return Enemy(name, health, weapon, level, enemy_type)
+        return EnemySpec(name, health, weapon, level, enemy_type, base_gold)
     
-    def _generate_treasure(self) -> dict:
+    def _generate_treasure(self, rng) -> dict:
         """Generate treasure for treasure rooms"""
         treasures = [
-            {"type": "gold", "amount": random.randint(100, 300), "name": "Gold Coins"},
-            {"type": "potion", "amount": random.randint(2, 5), "name": "Health Potions"},
-            {"type": "experience", "amount": random.randint(50, 150), "name": "Ancient Tome"},
+            {"type": "gold", "amount": rng.randint(100, 300), "name": "Gold Coins"},
+            {"type": "potion", "amount": rng.randint(2, 5), "name": "Health Potions"},
+            {"type": "experience", "amount": rng.randint(50, 150), "name": "Ancient Tome"},
         ]
         
-        return random.choice(treasures)
+        return rng.choice(treasures)
+
+class TemplateCache:
+    """Process-wide LRU cache of dungeon templates keyed by (name, level band, seed)"""
+    
+    def __init__(self, max_size: int = DEFAULT_TEMPLATE_CACHE_SIZE):
+        self.max_size = max_size
+        self._templates: "OrderedDict[Tuple[str, int, int, int], DungeonTemplate]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+    
+    def get(self, name: str, min_level: int, max_level: int, seed: int) -> DungeonTemplate:
+        """Get the template for a dungeon, generating it on a miss"""
+        key = (name, min_level, max_level, seed)
+        template = self._templates.get(key)
+        if template is not None:
+            self.hits += 1
+            self._templates.move_to_end(key)
+            return template
+        
+        self.misses += 1
+        template = DungeonTemplate(name, min_level, max_level, seed)
+        self._templates[key] = template
+        self._evict()
+        return template
+    
+    def resize(self, max_size: int):
+        self.max_size = max_size
+        self._evict()
+    
+    def _evict(self):
+        while len(self._templates) > self.max_size:
+            self._templates.popitem(last=False)
+            self.evictions += 1
+    
+    def clear(self):
+        self._templates.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._templates), "max_size": self.max_size, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions}
+    
+    def __len__(self) -> int:
+        return len(self._templates)
+
+TEMPLATE_CACHE = TemplateCache()
+
+class Dungeon:
+    """One hero's run through a dungeon.
+    
+    Only the seed and the hero's position are stored. The rooms come from the
+    shared DungeonTemplate for the seed, and each room (with a fresh enemy) is
+    built when the hero enters it, so a save only needs (seed, current_room).
+    """
+    
+    def __init__(self, name: str, min_level: int, max_level: int, seed: Optional[int] = None, rng=None,
+                 cache: Optional[TemplateCache] = None):
+        self.name = name
+        self.min_level = min_level
+        self.max_level = max_level
+        self.seed = rng_streams.resolve(rng).getrandbits(64) if seed is None else seed
+        self.current_room = 0
+        self.completed = False
+        self._cache = cache or TEMPLATE_CACHE
+        self._template: Optional[DungeonTemplate] = None
+        self._room: Optional[Room] = None  # Room the hero is in, built on arrival
+    
+    @property
+    def template(self) -> DungeonTemplate:
+        if self._template is None:
+            self._template = self._cache.get(self.name, self.min_level, self.max_level, self.seed)
+        return self._template
+    
+    @property
+    def room_types(self) -> List[str]:
+        """Type of every room in order"""
+        return [room.room_type for room in self.template.rooms]
+    
+    @property
+    def room_count(self) -> int:
+        return len(self.template.rooms)
+    
+    def generate_room(self, room_number: int) -> Room:
+        """Build a fresh copy of a room from the template"""
+        return self.template.rooms[room_number].create_room()
     
     def get_current_room(self) -> Optional[Room]:
         """Get the current room"""
-        if self.current_room < len(self.rooms):
-            return self.rooms[self.current_room]
+        if self.current_room < self.room_count:
+            if self._room is None:
+                self._room = self.generate_room(self.current_room)
+            return self._room
         return None
     
     def advance_room(self) -> bool:
         """Advance to the next room"""
-        if self.current_room < len(self.rooms) - 1:
+        if self.current_room < self.room_count - 1:
             self.current_room += 1
+            self._room = None
             return True
         else:
             self.completed = True
@@ -122,18 +278,95 @@ class Dungeon:
         """Reset the dungeon"""
         self.current_room = 0
         self.completed = False
-        for room in self.rooms:
-            room.completed = False
+        self._room = None
+    
+    def boss_odds(self, hero) -> BattleOdds:
+        """Exact odds of the hero beating this dungeon's boss from its current health"""
+        boss = self.template.rooms[-1].enemy.create()
+        try:
+            return battle_odds(hero, boss)
+        finally:
+            ENEMY_POOL.release(boss)
+    
+    def snapshot(self) -> tuple:
+        """(seed, current_room, completed, room) where room is None or the state of the room the hero is in"""
+        room = self._room
+        if room is None:
+            return self.seed, self.current_room, self.completed, None
+        enemy = room.enemy
+        return (self.seed, self.current_room, self.completed,
+                (room, room.completed, enemy, None if enemy is None else enemy.snapshot()))
+    
+    def restore(self, snapshot: tuple):
+        """Return to a state from snapshot().
+        
+        The room comes back with its enemy as it was. An enemy that has since
+        left the room (and may have gone back to the pool) is replaced with a
+        fresh one from the template that takes on the saved state.
+        """
+        seed, current_room, completed, room_state = snapshot
+        if seed != self.seed:
+            self.seed = seed
+            self._template = None
+        self.current_room = current_room
+        self.completed = completed
+        if room_state is None:
+            self._room = None
+            return
+        
+        room, room_completed, enemy, enemy_state = room_state
+        room.completed = room_completed
+        self._room = room
+        if enemy_state is None:
+            room.enemy = None
+            return
+        if room.enemy is not enemy:
+            enemy = self.template.rooms[current_room].enemy.create()
+            room.enemy = enemy
+        enemy.restore(enemy_state)
+    
+    def get_state(self) -> Tuple[int, int]:
+        """(seed, current_room), with current_room == room_count once completed"""
+        return self.seed, self.room_count if self.completed else self.current_room
+    
+    def restore_state(self, seed: int, current_room: int):
+        """Return to a state from get_state()"""
+        if seed != self.seed:
+            self.seed = seed
+            self._template = None
+        self._room = None
+        self.completed = current_room > 0 and current_room >= self.room_count
+        self.current_room = self.room_count - 1 if self.completed else current_room
 
 class DungeonSystem:
-    def __init__(self):
-        self.dungeons = [
-            Dungeon("Goblin Caves", 1, 3),
-            Dungeon("Abandoned Mine", 3, 5),
-            Dungeon("Dark Forest Temple", 5, 7),
-            Dungeon("Ancient Ruins", 7, 10),
-            Dungeon("Dragon's Lair", 10, 15)
-        ]
+    def __init__(self, rng=None, states: Optional[Iterable[Tuple[int, int, int]]] = None,
+                 variants: Optional[int] = DUNGEON_VARIANTS):
+        rng = rng_streams.resolve(rng)
+        self.dungeons = []
+        for dungeon_id, (name, min_level, max_level) in enumerate(DUNGEON_CATALOG):
+            # With variants, seeds come from a small shared set so templates are reused
+            seed = None if variants is None else rng_streams.derive_seed(dungeon_id, rng.randrange(variants))
+            self.dungeons.append(Dungeon(name, min_level, max_level, seed, rng))
+        if states:
+            self.restore_states(states)
+    
+    def get_states(self) -> List[Tuple[int, int, int]]:
+        """(dungeon id, seed, current_room) for every dungeon, for saving"""
+        return [(dungeon_id, *dungeon.get_state()) for dungeon_id, dungeon in enumerate(self.dungeons)]
+    
+    def restore_states(self, states: Iterable[Tuple[int, int, int]]):
+        """Restore dungeons from get_states() output; unknown ids are ignored"""
+        for dungeon_id, seed, current_room in states:
+            if 0 <= dungeon_id < len(self.dungeons):
+                self.dungeons[dungeon_id].restore_state(seed, current_room)
+    
+    def snapshot(self) -> tuple:
+        """Dungeon.snapshot() of every dungeon"""
+        return tuple(dungeon.snapshot() for dungeon in self.dungeons)
+    
+    def restore(self, snapshot: tuple):
+        for dungeon, state in zip(self.dungeons, snapshot):
+            dungeon.restore(state)
     
     def get_available_dungeons(self, hero_level: int) -> List[Dungeon]:
         """Get dungeons suitable for the hero's level"""
@@ -143,8 +376,8 @@ class DungeonSystem:
                 suitable.append(dungeon)
         return suitable
     
-    def show_dungeons(self, hero_level: int):
-        """Display available dungeons"""
+    def show_dungeons(self, hero_level: int, hero=None):
+        """Display available dungeons, with the odds against each boss when the hero is given"""
         available = self.get_available_dungeons(hero_level)
         
         print("\n=== AVAILABLE DUNGEONS ===")
@@ -156,7 +389,9 @@ class DungeonSystem:
             print(f"   Level Range: {dungeon.min_level}-{dungeon.max_level}")
             print(f"   Difficulty: {difficulty}")
             print(f"   Status: {status}")
-            print(f"   Rooms: {len(dungeon.rooms)}")
+            print(f"   Rooms: {dungeon.room_count}")
+            if hero is not None:
+                print(f"   Boss Odds: {describe_odds(dungeon.boss_odds(hero))}")
             print()
         
         return available
@@ -0,0 +1,274 @@
+"""
+Utility Enemy AI for Text-Based Battle Game
+
+A utility-scoring alternative to Enemy.ai_action. Each turn the enemy scores
+every action it can take and picks the highest score:
+
+- attack with its weapon
+- defend: hold back and regain a tenth of its max mana
+- cast a damage or heal spell, paying its mana cost
+- cast a buff spell, which gives a damage_boost buff for three turns
+
+A score is a weighted sum of a few considerations: how hurt the enemy is,
+how hurt its target is, how much mana it has left, whether it is already
+boosted, and, for damage spells, the spell's damage relative to its own
+attack. The weights come from UTILITY_WEIGHTS, one table per enemy type, so
+bosses fight more carefully than normal enemies. A small random term,
+largest for normal enemies, keeps enemies from being entirely predictable.
+Enemies that know no spells use the spellbook of their type.
+
+choose_actions() scores a whole CombatantTable at once. With NumPy it works
+on the columns directly; without it the same rules run in a plain Python
+loop. Table rows carry no buffs, so they never pick buff spells.
+
+The game and battle_odds keep the attack-or-skip AI of Enemy.ai_action.
+Simulations opt in:
+
+    simulate_battle(hero, enemy, policy, rng, enemy_ai=act)
+    codes = choose_actions(table, target_hurt=0.4)    # one action code per row
+    perform(table.view(row), hero, codes[row])
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import events
+import rng as rng_streams
+from character import Character, DAMAGE_BOOST_MULTIPLIER
+from combatant_store import ENEMY_TYPES
+from spells import divine_blessing, frost_lance, heal, lightning_bolt, minor_heal
+from weapon import ALL_WEAPONS
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional
+    np = None
+
+# Action codes; spell i of the enemy's known spells is FIRST_SPELL + i
+ATTACK = 0
+DEFEND = 1
+FIRST_SPELL = 2
+
+# Considerations, in the order of the weights below
+HURT, TARGET_HURT, MANA, BOOSTED, POWER = range(1, 6)
+
+# Weights per enemy type and kind of action:
+#   (bias, hurt, target hurt, mana left, boosted, spell power / attack)
+UTILITY_WEIGHTS: Dict[str, Dict[str, Tuple[float, ...]]] = {
+    "normal": {
+        "attack": (1.0, 0.0, 0.2, 0.0, 0.0, 0.0),
+        "defend": (0.3, 0.5, -0.3, -0.2, 0.0, 0.0),
+        "damage": (0.0, 0.0, 0.2, 0.2, 0.0, 0.9),
+        "heal": (-0.3, 1.5, 0.0, 0.0, 0.0, 0.0),
+        "buff": (0.5, 0.0, -0.6, 0.2, -2.0, 0.0),
+    },
+    "elite": {
+        "attack": (1.0, 0.0, 0.3, 0.0, 0.0, 0.0),
+        "defend": (0.2, 0.4, -0.4, -0.4, 0.0, 0.0),
+        "damage": (0.0, 0.0, 0.3, 0.2, 0.0, 1.0),
+        "heal": (-0.4, 2.0, -0.3, 0.0, 0.0, 0.0),
+        "buff": (0.7, 0.0, -0.8, 0.2, -2.0, 0.0),
+    },
+    "boss": {
+        "attack": (1.0, 0.0, 0.4, 0.0, 0.0, 0.0),
+        "defend": (0.1, 0.3, -0.5, -0.5, 0.0, 0.0),
+        "damage": (0.0, 0.0, 0.4, 0.2, 0.0, 1.0),
+        "heal": (-0.5, 2.5, -0.5, 0.0, 0.0, 0.0),
+        "buff": (0.9, 0.0, -1.0, 0.2, -2.0, 0.0),
+    },
+}
+
+# Largest random term added to each score
+NOISE: Dict[str, float] = {"normal": 0.3, "elite": 0.15, "boss": 0.05}
+
+# Spells of enemies that know none of their own
+SPELLBOOKS: Dict[str, tuple] = {
+    "normal": (),
+    "elite": (frost_lance, minor_heal),
+    "boss": (lightning_bolt, heal, divine_blessing),
+}
+
+_UNAVAILABLE = float("-inf")
+
+
+def known_spells(enemy) -> Sequence:
+    """The spells an enemy chooses from: its own, or its type's spellbook"""
+    return enemy.spells or SPELLBOOKS.get(enemy.enemy_type, ())
+
+
+def attack_mean(weapon, level: int, strength: int, boosted: bool = False) -> float:
+    """Average damage of an enemy's attack, as rolled by Character.attack"""
+    mean = weapon.damage * (1.0 + weapon.crit_chance) + level // 2 + strength // 5
+    return mean * DAMAGE_BOOST_MULTIPLIER if boosted else mean
+
+
+def _score(weights: Tuple[float, ...], hurt: float, target_hurt: float, mana: float, boosted: float) -> float:
+    return (weights[0] + weights[HURT] * hurt + weights[TARGET_HURT] * target_hurt
+            + weights[MANA] * mana + weights[BOOSTED] * boosted)
+
+
+def _scores(enemy_type: str, spells: Sequence, health: int, health_max: int, mana: int, mana_max: int,
+            boosted: bool, attack: float, target_hurt: float, can_buff: bool) -> List[float]:
+    """Score of each action code, -inf for actions that cannot be taken"""
+    weights = UTILITY_WEIGHTS[enemy_type]
+    hurt = 1.0 - health / health_max
+    mana_left = mana / mana_max if mana_max > 0 else 0.0
+    boost = 1.0 if boosted else 0.0
+
+    scores = [_score(weights["attack"], hurt, target_hurt, mana_left, boost),
+              _score(weights["defend"], hurt, target_hurt, mana_left, boost)]
+    for spell in spells:
+        kind = spell.spell_type
+        if (kind not in weights or spell.mana_cost > mana or (kind == "heal" and health >= health_max)
+                or (kind == "buff" and not can_buff)):
+            scores.append(_UNAVAILABLE)
+            continue
+        score = _score(weights[kind], hurt, target_hurt, mana_left, boost)
+        if kind == "damage":
+            score += weights[kind][POWER] * spell.damage / max(attack, 1.0)
+        scores.append(score)
+    return scores
+
+
+def score_actions(enemy, target) -> List[float]:
+    """Score of each action code for this enemy's turn against `target`, without the random term"""
+    boosted = any(buff.get("effect") == "damage_boost" for buff in enemy.buffs)
+    attack = attack_mean(enemy.weapon, enemy.level, enemy.skills["strength"], boosted)
+    return _scores(enemy.enemy_type, known_spells(enemy), enemy.health, enemy.health_max, enemy.mana,
+                   enemy.mana_max, boosted, attack, 1.0 - target.health / target.health_max,
+                   isinstance(enemy, Character))
+
+
+def _pick(scores: List[float], noise: float, rng) -> int:
+    best, best_score = ATTACK, _UNAVAILABLE
+    for action, score in enumerate(scores):
+        if score == _UNAVAILABLE:
+            continue
+        score += noise * rng.random()
+        if score > best_score:
+            best, best_score = action, score
+    return best
+
+
+def choose_action(enemy, target, rng=None) -> int:
+    """Action code with the best score this turn"""
+    return _pick(score_actions(enemy, target), NOISE[enemy.enemy_type], rng_streams.resolve(rng))
+
+
+def perform(enemy, target, action: int, rng=None):
+    """Play an action code for `enemy` against `target`"""
+    if action == ATTACK:
+        enemy.attack(target, rng)
+    elif action == DEFEND:
+        enemy.regenerate_mana()
+        events.emit("enemy_prepare", character=enemy.name)
+    else:
+        result = known_spells(enemy)[action - FIRST_SPELL].cast(enemy, target, rng)
+        if isinstance(result, dict) and isinstance(enemy, Character):
+            enemy.add_buff(result)
+
+
+def act(enemy, target, rng=None):
+    """Take the enemy's turn with the utility AI; a drop-in for enemy.ai_action(target, rng)"""
+    if not enemy.is_alive:
+        return
+    perform(enemy, target, choose_action(enemy, target, rng), rng)
+
+
+def choose_actions(table, target_hurt: Union[float, Sequence[float]], rows: Optional[Sequence[int]] = None,
+                   rng=None):
+    """Pick the action of many CombatantTable rows at once.
+
+    `target_hurt` is 1 - health / max health of each row's target, or one
+    value for a target they all share. `rows` defaults to the whole table.
+    `rng` is a random.Random or GameRNG (or the global random module when
+    left out) with or without NumPy; a seeded one picks the same actions on
+    every call. With NumPy installed an array of action codes is returned,
+    otherwise a list.
+    """
+    if rows is None:
+        rows = range(len(table))
+    if np is not None:
+        return _choose_numpy(table, target_hurt, rows, rng)
+    return _choose_python(table, target_hurt, rows, rng)
+
+
+def _choose_python(table, target_hurt, rows, rng) -> List[int]:
+    rng = rng_streams.resolve(rng)
+    shared_target = isinstance(target_hurt, (int, float))
+    actions = []
+    for position, row in enumerate(rows):
+        enemy_type = ENEMY_TYPES[table.enemy_type[row]]
+        level = table.level[row]
+        scores = _scores(enemy_type, SPELLBOOKS[enemy_type], table.health[row], table.health_max[row],
+                         table.mana[row], 50 + level * 10, False,  # max mana as CombatantView.mana_max
+                         attack_mean(ALL_WEAPONS[table.weapon_id[row]], level, table.strength[row]),
+                         target_hurt if shared_target else target_hurt[position], False)
+        actions.append(_pick(scores, NOISE[enemy_type], rng))
+    return actions
+
+
+def _type_tables():
+    """Arrays indexed by enemy type code and action slot, plus the weapon stats, for _choose_numpy"""
+    slots = FIRST_SPELL + max(len(spellbook) for spellbook in SPELLBOOKS.values())
+    weights = np.zeros((len(ENEMY_TYPES), slots, POWER + 1))
+    cost = np.zeros((len(ENEMY_TYPES), slots))
+    damage = np.zeros((len(ENEMY_TYPES), slots))
+    heal_slot = np.zeros((len(ENEMY_TYPES), slots), dtype=bool)
+    usable = np.zeros((len(ENEMY_TYPES), slots), dtype=bool)
+    for code, enemy_type in enumerate(ENEMY_TYPES):
+        type_weights = UTILITY_WEIGHTS[enemy_type]
+        weights[code, ATTACK] = type_weights["attack"]
+        weights[code, DEFEND] = type_weights["defend"]
+        usable[code, :FIRST_SPELL] = True
+        for index, spell in enumerate(SPELLBOOKS[enemy_type]):
+            if spell.spell_type not in ("damage", "heal"):
+                continue
+            slot = FIRST_SPELL + index
+            weights[code, slot] = type_weights[spell.spell_type]
+            cost[code, slot] = spell.mana_cost
+            damage[code, slot] = spell.damage if spell.spell_type == "damage" else 0.0
+            heal_slot[code, slot] = spell.spell_type == "heal"
+            usable[code, slot] = True
+    noise = np.array([NOISE[enemy_type] for enemy_type in ENEMY_TYPES])
+    weapon_damage = np.array([weapon.damage for weapon in ALL_WEAPONS], dtype=np.float64)
+    weapon_crit = np.array([weapon.crit_chance for weapon in ALL_WEAPONS])
+    return weights, cost, damage, heal_slot, usable, noise, weapon_damage, weapon_crit
+
+
+_TYPE_TABLES = None
+
+
+def _choose_numpy(table, target_hurt, rows, rng):
+    global _TYPE_TABLES
+    if _TYPE_TABLES is None:
+        _TYPE_TABLES = _type_tables()
+    weights, cost, damage, heal_slot, usable, noise, weapon_damage, weapon_crit = _TYPE_TABLES
+    rng = rng_streams.numpy_generator(rng)
+    rows = np.asarray(rows, dtype=np.intp)
+
+    def column(name):
+        values = getattr(table, name)
+        return np.frombuffer(values, dtype=values.typecode)[rows]
+
+    types = column("enemy_type")
+    health = column("health")
+    health_max = column("health_max")
+    mana = column("mana")
+    level = column("level").astype(np.int64)
+    weapon_ids = column("weapon_id")
+    attack = (weapon_damage[weapon_ids] * (1.0 + weapon_crit[weapon_ids]) + level // 2
+              + column("strength") // 5)
+
+    hurt = 1.0 - health / health_max
+    target = np.broadcast_to(np.asarray(target_hurt, dtype=np.float64), hurt.shape)
+    # Max mana as CombatantView.mana_max has it
+    features = np.stack([np.ones_like(hurt), hurt, target, mana / (50 + level * 10), np.zeros_like(hurt)], axis=1)
+    row_weights = weights[types]
+    scores = np.einsum("nsf,nf->ns", row_weights[:, :, :POWER], features)
+    scores += row_weights[:, :, POWER] * damage[types] / np.maximum(attack, 1.0)[:, None]
+    scores += noise[types][:, None] * rng.random(scores.shape)
+
+    available = usable[types] & (cost[types] <= mana[:, None])
+    available &= ~(heal_slot[types] & (health >= health_max)[:, None])
+    scores[~available] = -np.inf
+    return scores.argmax(axis=1)
@@ -0,0 +1,72 @@
+"""
+Enemy Pool for Text-Based Battle Game
+
+Every encounter used to construct a new Enemy, which allocates the enemy's
+skills dict, buff and spell lists and HealthBar, only for all of it to become
+garbage when the battle ends. EnemyPool keeps finished enemies and hands them
+out again after resetting them in place to the requested spec, so a long run
+of battles (a headless simulation or a busy server) reuses a small, steady
+set of objects.
+
+    enemy = ENEMY_POOL.acquire("Goblin", 80, short_bow, 2)
+    ...battle...
+    ENEMY_POOL.release(enemy)
+
+A released enemy must not be used again by the caller. The counters in
+stats() show how many enemies were allocated versus reused.
+"""
+
+from typing import Dict, List, Optional
+
+from character import Enemy
+
+DEFAULT_POOL_SIZE = 64
+
+
+class EnemyPool:
+    """Free list of Enemy objects, reset to a new spec on each acquire"""
+
+    def __init__(self, max_size: int = DEFAULT_POOL_SIZE):
+        self.max_size = max_size
+        self._free: List[Enemy] = []
+        self.created = 0    # acquires that had to construct a new Enemy
+        self.reused = 0     # acquires served from the free list
+        self.released = 0   # enemies returned to the free list
+        self.discarded = 0  # releases dropped because the pool was full
+
+    def acquire(self, name: str, health: int, weapon, level: int = 1, enemy_type: str = "normal",
+                rng=None, base_gold: Optional[int] = None) -> Enemy:
+        """Get an enemy in exactly the state Enemy(...) with these arguments would have"""
+        if self._free:
+            enemy = self._free.pop()
+            enemy.reset(name, health, weapon, level, enemy_type, rng, base_gold)
+            enemy._pooled = False
+            self.reused += 1
+            return enemy
+
+        self.created += 1
+        return Enemy(name, health, weapon, level, enemy_type, rng, base_gold)
+
+    def release(self, enemy: Optional[Enemy]):
+        """Return an enemy whose battle is over; None and double releases are ignored"""
+        if enemy is None or getattr(enemy, "_pooled", False):
+            return
+        if len(self._free) < self.max_size:
+            enemy._pooled = True
+            self._free.append(enemy)
+            self.released += 1
+        else:
+            self.discarded += 1
+
+    def clear(self):
+        self._free.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"free": len(self._free), "created": self.created, "reused": self.reused,
+                "released": self.released, "discarded": self.discarded}
+
+    def __len__(self) -> int:
+        return len(self._free)
+
+
+ENEMY_POOL = EnemyPool()
@@ -0,0 +1,152 @@
+"""
+Game Event System for Text-Based Battle Game
+
+Combat and progression code reports what happens as structured events: a
+name plus a dict of fields. The active sink decides what to do with them.
+The terminal sink prints the classic game messages, the buffered sink keeps
+events for later inspection, and the null sink drops them without doing any
+string formatting, which keeps headless simulations fast.
+"""
+
+import contextlib
+from typing import Callable, Dict, List
+
+
+def _format_attack(fields: dict) -> str:
+    crit_text = " (CRITICAL HIT!)" if fields["crit"] else ""
+    return (f"{fields['attacker']} dealt {fields['damage']} damage to {fields['target']} "
+            f"with {fields['weapon']}{crit_text}")
+
+
+def _format_level_up(fields: dict) -> str:
+    return (f"🎉 {fields['character']} reached level {fields['level']}!\n"
+            f"Max HP increased by {fields['health_increase']}! "
+            f"Max Mana increased by {fields['mana_increase']}!\n"
+            "All skills improved!")
+
+
+# Event name -> function turning the event fields into the terminal message
+EVENT_FORMATTERS: Dict[str, Callable[[dict], str]] = {
+    # Combat
+    "attack": _format_attack,
+    "defeated": lambda f: f"{f['target']} has been defeated!",
+    "sneak_attack": lambda f: "💀 Sneak Attack! Critical damage!",
+    "enemy_prepare": lambda f: f"{f['character']} is preparing for the next attack...",
+    "heal": lambda f: f"{f['character']} healed for {f['amount']} HP!",
+    "potion_used": lambda f: f"{f['character']} used a potion! ({f['potions']} potions remaining)",
+    "no_potions": lambda f: f"{f['character']} has no potions left!",
+    "full_health": lambda f: f"{f['character']} is already at full health!",
+
+    # Spells
+    "spell_unknown": lambda f: f"{f['character']} doesn't know the spell {f['spell']}!",
+    "not_enough_mana": lambda f: f"{f['character']} doesn't have enough mana to cast {f['spell']}!",
+    "spell_learned": lambda f: f"{f['character']} learned {f['spell']}!",
+    "spell_already_known": lambda f: f"{f['character']} already knows {f['spell']}!",
+    "spell_damage": lambda f: (f"{f['character']} casts {f['spell']} dealing {f['damage']} "
+                               f"magic damage to {f['target']}!"),
+    "spell_heal": lambda f: f"{f['character']} casts {f['spell']} and heals for {f['amount']} HP!",
+    "spell_buff": lambda f: f"{f['character']} casts {f['spell']} and feels empowered!",
+
+    # Progression
+    "experience_gained": lambda f: f"{f['character']} gained {f['amount']} experience!",
+    "class_bonus": lambda f: f"Class bonus: +{f['bonus']} {f['skill'].capitalize()}!",
+    "level_up": _format_level_up,
+
+    # Achievements and quests
+    "achievement_unlocked": lambda f: f"🏆 Achievement Unlocked: {f['achievement']}\n   {f['description']}",
+    "quest_started": lambda f: f"📋 Quest Started: {f['quest']}\n   {f['description']}",
+    "objective_completed": lambda f: f"📋 Objective Complete: {f['objective']}",
+    "quest_completed": lambda f: f"🎉 Quest Completed: {f['quest']}",
+    "reward_gold": lambda f: f"   Reward: {f['amount']} gold!",
+    "reward_experience": lambda f: f"   Reward: {f['amount']} experience!",
+    "reward_item": lambda f: f"   Reward: {f['item']}!",
+    "reward_skill_point": lambda f: "   Reward: 1 skill point!",
+}
+
+
+class GameEvent:
+    """A named event with its fields"""
+
+    __slots__ = ("name", "fields")
+
+    def __init__(self, name: str, fields: dict):
+        self.name = name
+        self.fields = fields
+
+    def text(self) -> str:
+        """Get the terminal message for this event"""
+        return EVENT_FORMATTERS[self.name](self.fields)
+
+    def __repr__(self) -> str:
+        return f"GameEvent({self.name!r}, {self.fields!r})"
+
+
+class NullSink:
+    """Discard every event"""
+
+    def emit(self, name: str, fields: dict) -> None:
+        pass
+
+
+class TerminalSink:
+    """Print events as the classic game messages"""
+
+    def __init__(self, stream=None):
+        self.stream = stream  # None means whatever sys.stdout is at print time
+
+    def emit(self, name: str, fields: dict) -> None:
+        print(EVENT_FORMATTERS[name](fields), file=self.stream)
+
+
+class BufferedSink:
+    """Collect events in memory"""
+
+    def __init__(self):
+        self.events: List[GameEvent] = []
+
+    def emit(self, name: str, fields: dict) -> None:
+        self.events.append(GameEvent(name, fields))
+
+    def lines(self) -> List[str]:
+        """Get the terminal messages for the collected events"""
+        return [event.text() for event in self.events]
+
+    def flush(self, stream=None) -> None:
+        """Print the collected events and clear the buffer"""
+        if self.events:
+            print("\n".join(self.lines()), file=stream)
+        self.clear()
+
+    def clear(self) -> None:
+        self.events.clear()
+
+
+_sink = TerminalSink()
+
+
+def emit(name: str, **fields) -> None:
+    """Send an event to the active sink"""
+    _sink.emit(name, fields)
+
+
+def get_sink():
+    """Get the active sink"""
+    return _sink
+
+
+def set_sink(sink):
+    """Make `sink` the active sink and return the previous one"""
+    global _sink
+    previous = _sink
+    _sink = sink
+    return previous
+
+
+@contextlib.contextmanager
+def use_sink(sink):
+    """Temporarily route events to `sink`"""
+    previous = set_sink(sink)
+    try:
+        yield sink
+    finally:
+        set_sink(previous)
@@ -0,0 +1,157 @@
+"""
+Game Input/Output for Text-Based Battle Game
+
+Menus and game loops are written as generators. Wherever they need a line
+from the player they `yield` a Prompt and receive the typed line back, so
+the same game code can be driven by blocking input() in the terminal or by
+awaited socket reads in the multi-session server:
+
+    def display_main_menu():
+        choice = int((yield from ask("Choose option (1-11): ")))
+
+    run(game_session())   # terminal: answers come from input()
+
+Output keeps going through print(). While a server session is running,
+sys.stdout is a SessionStdout proxy that sends each print to the output
+buffer of whichever session is active in the current asyncio task.
+
+Both drivers can hand prints to a FrameRenderer (see renderer.py), which
+composes each cleared screen and shows it as a minimal redraw together with
+the next prompt.
+"""
+
+import contextvars
+import sys
+from typing import Callable, Generator, List, Optional, Tuple
+
+from renderer import FrameRenderer, FrameStdout
+
+
+class Prompt:
+    """A request for one line of player input"""
+
+    __slots__ = ("text", "pause")
+
+    def __init__(self, text: str, pause: bool = False):
+        self.text = text
+        self.pause = pause  # True for "Press Enter to continue" style prompts
+
+    def __repr__(self) -> str:
+        return f"Prompt({self.text!r}, pause={self.pause})"
+
+
+# A game flow yields Prompts, is sent the player's answers and returns a result
+Flow = Generator[Prompt, str, object]
+
+
+def ask(text: str) -> Flow:
+    """Ask the player for a line of input"""
+    line = yield Prompt(text)
+    return line
+
+
+def pause(text: str = "\nPress Enter to continue...") -> Flow:
+    """Wait for the player to press Enter"""
+    yield Prompt(text, pause=True)
+
+
+def run(flow: Flow, input_func: Callable[[str], str] = input, renderer: Optional[FrameRenderer] = None):
+    """Drive a flow to completion with blocking input and return its result.
+
+    With a renderer, prints go through it while the flow runs, and each frame
+    is written out together with the prompt that follows it.
+    """
+    if renderer is None:
+        try:
+            prompt = next(flow)
+            while True:
+                prompt = flow.send(input_func(prompt.text))
+        except StopIteration as stop:
+            return stop.value
+
+    stdout = sys.stdout
+    frames = FrameStdout(stdout, renderer)
+    token = _renderer.set(renderer)
+    try:
+        sys.stdout = frames
+        prompt = next(flow)
+        while True:
+            # input() gets the real stdout so it can still use line editing
+            sys.stdout = stdout
+            answer = input_func(renderer.present(prompt.text))
+            renderer.echo(answer)
+            sys.stdout = frames
+            prompt = flow.send(answer)
+    except StopIteration as stop:
+        return stop.value
+    finally:
+        sys.stdout = stdout
+        if renderer.composing:
+            stdout.write(renderer.present())
+        _renderer.reset(token)
+
+
+# Output buffer of the session running in the current asyncio task, if any
+_session_output: contextvars.ContextVar[Optional[List[str]]] = contextvars.ContextVar(
+    "session_output", default=None)
+
+# Renderer of the terminal or session the current flow draws to, if any
+_renderer: contextvars.ContextVar[Optional[FrameRenderer]] = contextvars.ContextVar(
+    "renderer", default=None)
+
+
+def in_session() -> bool:
+    """Whether output currently goes to a server session instead of the terminal"""
+    return _session_output.get() is not None
+
+
+def current_renderer() -> Optional[FrameRenderer]:
+    """The renderer that clear_screen() should start a frame on, if any"""
+    return _renderer.get()
+
+
+def begin_session_output(buffer: List[str], renderer: Optional[FrameRenderer] = None
+                         ) -> Tuple[contextvars.Token, contextvars.Token]:
+    """Route prints in the current context into `buffer`, through `renderer` if given"""
+    return _session_output.set(buffer), _renderer.set(renderer)
+
+
+def end_session_output(tokens: Tuple[contextvars.Token, contextvars.Token]):
+    output_token, renderer_token = tokens
+    _renderer.reset(renderer_token)
+    _session_output.reset(output_token)
+
+
+class SessionStdout:
+    """sys.stdout replacement that routes writes to the active session's buffer"""
+
+    def __init__(self, fallback):
+        self.fallback = fallback
+
+    def write(self, text: str) -> int:
+        buffer = _session_output.get()
+        if buffer is None:
+            return self.fallback.write(text)
+        renderer = _renderer.get()
+        if renderer is None:
+            buffer.append(text)
+        elif renderer.composing:
+            renderer.compose(text)
+        else:
+            buffer.append(text)
+            renderer.track(text)
+        return len(text)
+
+    def flush(self):
+        if _session_output.get() is None:
+            self.fallback.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.fallback, name)
+
+
+def install_session_stdout() -> SessionStdout:
+    """Replace sys.stdout with a SessionStdout proxy (idempotent)"""
+    if not isinstance(sys.stdout, SessionStdout):
+        sys.stdout = SessionStdout(sys.stdout)
+    return sys.stdout
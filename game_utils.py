@@ -1,6 +1,8 @@
-import random
-import os
+import rng as rng_streams
+from game_io import Flow, ask, current_renderer, pause
+from renderer import CLEAR
 from character import Hero, Enemy
+from enemy_pool import ENEMY_POOL
 from weapon import (steel_sword, magic_staff, war_hammer, crossbow, dagger, 
                     short_bow, iron_sword)
 from spells import fireball, heal, lightning_bolt, frost_lance, divine_blessing
@@ -10,9 +12,17 @@ class GameState:
         self.turn_count = 0
         self.game_over = False
         self.victory = False
+        self.dungeon_states = []  # (dungeon id, seed, current_room) for each dungeon
         
     def increment_turn(self):
         self.turn_count += 1
+    
+    def snapshot(self) -> tuple:
+        return self.turn_count, self.game_over, self.victory, tuple(self.dungeon_states)
+    
+    def restore(self, snapshot: tuple):
+        self.turn_count, self.game_over, self.victory, dungeon_states = snapshot
+        self.dungeon_states = list(dungeon_states)
 
 class Shop:
     def __init__(self):
@@ -47,12 +57,12 @@ class Shop:
         if choice <= len(self.weapons):
             weapon = self.weapons[choice - 1]
             if hero.gold >= weapon.value:
-                hero.gold -= weapon.value
+                hero.change_stat("gold", -weapon.value)
                 hero.inventory.append(weapon)
                 
                 # Track for quests
                 if hasattr(hero, 'items_purchased'):
-                    hero.items_purchased += 1
+                    hero.change_stat("items_purchased")
                 
                 print(f"Purchased {weapon.name}!")
                 return True
@@ -70,12 +80,12 @@ class Shop:
                 return False
             
             if hero.gold >= price:
-                hero.gold -= price
+                hero.change_stat("gold", -price)
                 hero.learn_spell(spell)
                 
                 # Track for quests
                 if hasattr(hero, 'items_purchased'):
-                    hero.items_purchased += 1
+                    hero.change_stat("items_purchased")
                 
                 print(f"Learned {spell.name}!")
                 return True
@@ -85,12 +95,12 @@ class Shop:
         
         elif choice == len(self.weapons) + len(self.spells) + 1:
             if hero.gold >= self.potion_price:
-                hero.gold -= self.potion_price
+                hero.change_stat("gold", -self.potion_price)
                 hero.potions += 1
                 
                 # Track for quests
                 if hasattr(hero, 'items_purchased'):
-                    hero.items_purchased += 1
+                    hero.change_stat("items_purchased")
                 
                 print("Purchased healing potion!")
                 return True
@@ -99,35 +109,54 @@ class Shop:
                 return False
         return False
 
+# Random encounter health: randint(MIN, MAX) + level * ENEMY_HEALTH_PER_LEVEL
+ENEMY_BASE_HEALTH_MIN = 60
+ENEMY_BASE_HEALTH_MAX = 100
+ENEMY_HEALTH_PER_LEVEL = 10
+
 class EnemyGenerator:
     enemy_names = ["Goblin", "Orc", "Skeleton", "Bandit", "Wolf", "Spider", "Troll", "Dark Knight"]
+    # Enemies of level L pick from the first L + 2 weapons
+    weapons = [short_bow, iron_sword, steel_sword, war_hammer, crossbow]
     
     @staticmethod
-    def generate_enemy(level: int) -> Enemy:
-        name = random.choice(EnemyGenerator.enemy_names)
-        base_health = random.randint(60, 100)
-        health = base_health + (level * 10)
+    def generate_enemy(level: int, rng=None) -> Enemy:
+        """Roll a random enemy, reusing a pooled one; release it to ENEMY_POOL after the battle"""
+        name, health, weapon, enemy_type = EnemyGenerator.roll_enemy(level, rng)
+        return ENEMY_POOL.acquire(name, health, weapon, level, enemy_type, rng)
+    
+    @staticmethod
+    def roll_enemy(level: int, rng=None) -> tuple:
+        """Roll the name, health, weapon and type of a random enemy"""
+        rng = rng_streams.resolve(rng)
+        name = rng.choice(EnemyGenerator.enemy_names)
+        base_health = rng.randint(ENEMY_BASE_HEALTH_MIN, ENEMY_BASE_HEALTH_MAX)
+        health = base_health + (level * ENEMY_HEALTH_PER_LEVEL)
         
         # Select weapon based on level
-        weapons = [short_bow, iron_sword, steel_sword, war_hammer, crossbow]
-        weapon = random.choice(weapons[:min(len(weapons), level + 2)])
+        weapons = EnemyGenerator.weapons
+        weapon = rng.choice(weapons[:min(len(weapons), level + 2)])
         
         # Determine enemy type
         enemy_type = "normal"
-        if random.random() < 0.1:  # 10% chance for elite
+        if rng.random() < 0.1:  # 10% chance for elite
             enemy_type = "elite"
             name = f"Elite {name}"
-        elif random.random() < 0.05:  # 5% chance for boss
+        elif rng.random() < 0.05:  # 5% chance for boss
             enemy_type = "boss"
             name = f"Boss {name}"
         
-        return Enemy(name, health, weapon, level, enemy_type)
+        return name, health, weapon, enemy_type
 
 def clear_screen():
-    """Clear the console screen"""
-    os.system("cls" if os.name == "nt" else "clear")
+    """Clear the console screen, or start a new frame when a renderer draws the screen"""
+    renderer = current_renderer()
+    if renderer is not None:
+        renderer.begin_frame()
+    else:
+        print(CLEAR, end="")
 
-def display_combat_menu() -> int:
+def display_combat_menu() -> Flow:
     """Display combat menu and return choice"""
     print("\n=== COMBAT MENU ===")
     print("1. Attack")
@@ -135,18 +164,19 @@ def display_combat_menu() -> int:
     print("3. Use Potion")
     print("4. View Stats")
     print("5. Run Away")
+    print("6. Auto Battle")
     
     while True:
         try:
-            choice = int(input("Choose action (1-5): "))
-            if 1 <= choice <= 5:
+            choice = int((yield from ask("Choose action (1-6): ")))
+            if 1 <= choice <= 6:
                 return choice
             else:
-                print("Invalid choice. Please enter 1-5.")
+                print("Invalid choice. Please enter 1-6.")
         except ValueError:
             print("Invalid input. Please enter a number.")
 
-def display_spell_menu(hero: Hero) -> int:
+def display_spell_menu(hero: Hero) -> Flow:
     """Display spell menu and return choice"""
     if not hero.spells:
         print("You don't know any spells!")
@@ -162,7 +192,7 @@ def display_spell_menu(hero: Hero) -> int:
     
     while True:
         try:
-            choice = int(input("Choose spell: "))
+            choice = int((yield from ask("Choose spell: ")))
             if 1 <= choice <= len(hero.spells) + 1:
                 return choice
             else:
@@ -170,7 +200,7 @@ def display_spell_menu(hero: Hero) -> int:
         except ValueError:
             print("Invalid input. Please enter a number.")
 
-def display_main_menu() -> int:
+def display_main_menu() -> Flow:
     """Display main menu and return choice"""
     print("\n=== MAIN MENU ===")
     print("1. Continue Adventure")
@@ -187,7 +217,7 @@ def display_main_menu() -> int:
     
     while True:
         try:
-            choice = int(input("Choose option (1-11): "))
+            choice = int((yield from ask("Choose option (1-11): ")))
             if 1 <= choice <= 11:
                 return choice
             else:
@@ -195,7 +225,7 @@ def display_main_menu() -> int:
         except ValueError:
             print("Invalid input. Please enter a number.")
 
-def display_inventory(hero: Hero):
+def display_inventory(hero: Hero) -> Flow:
     """Display hero's inventory"""
     print(f"\n=== {hero.name}'s INVENTORY ===")
     print(f"Current Weapon: {hero.weapon.name}")
@@ -211,11 +241,12 @@ def display_inventory(hero: Hero):
         
         while True:
             try:
-                choice = int(input("Equip weapon (enter number): "))
+                choice = int((yield from ask("Equip weapon (enter number): ")))
                 if 1 <= choice <= len(hero.inventory):
                     old_weapon = hero.weapon
                     hero.weapon = hero.inventory[choice - 1]
                     hero.inventory[choice - 1] = old_weapon
+                    hero.invalidate_attack()
                     print(f"Equipped {hero.weapon.name}!")
                     break
                 elif choice == len(hero.inventory) + 1:
@@ -227,11 +258,11 @@ def display_inventory(hero: Hero):
     else:
         print("Inventory is empty.")
 
-def display_skill_menu(hero: Hero):
+def display_skill_menu(hero: Hero) -> Flow:
     """Display skill allocation menu"""
     if hero.skill_points == 0:
         print("No skill points available!")
-        wait_for_input()
+        yield from wait_for_input()
         return
     
     while hero.skill_points > 0:
@@ -244,7 +275,7 @@ def display_skill_menu(hero: Hero):
         print(f"{len(skills)+1}. Exit")
         
         try:
-            choice = int(input("Allocate point to skill: "))
+            choice = int((yield from ask("Allocate point to skill: ")))
             if 1 <= choice <= len(skills):
                 skill_name = skills[choice - 1]
                 hero.allocate_skill_point(skill_name)
@@ -255,8 +286,8 @@ def display_skill_menu(hero: Hero):
         except ValueError:
             print("Invalid input. Please enter a number.")
     
-    wait_for_input()
+    yield from wait_for_input()
 
-def wait_for_input():
+def wait_for_input() -> Flow:
     """Wait for user input to continue"""
-    input("\nPress Enter to continue...")
+    yield from pause()
@@ -1,6 +1,9 @@
 import os
+from typing import Dict, Iterable, Tuple
 
-os.system("")
+# Windows consoles only interpret ANSI colors after a console call has enabled them
+if os.name == "nt":
+    os.system("")
 
 
 class HealthBar:
@@ -21,6 +24,9 @@ class HealthBar:
         "default": "\033[0m"
     }
 
+    # Rendered bar for each (length, color, is_colored, filled segments), shared by all bars
+    _glyphs: Dict[Tuple[int, str, bool, int], str] = {}
+
     def __init__(self, entity, length: int = 20, is_colored: bool = True, color: str = "") -> None:
         self.entity = entity
         self.length = length
@@ -28,16 +34,50 @@ class HealthBar:
         self.current_value = entity.health
         self.is_colored = is_colored
         self.color = self.colors.get(color, self.colors["default"])
+        self.dirty = True
+        self._rendered = ""
         
     def update(self) -> None:
+        """Pick up the entity's current and max health; the bar is redrawn on the next render"""
         self.current_value = self.entity.health
+        self.max_value = self.entity.health_max
+        self.dirty = True
+        
+    def filled_segments(self) -> int:
+        if self.max_value <= 0:
+            return 0
+        return min(max(round(self.current_value / self.max_value * self.length), 0), self.length)
+        
+    def glyph(self, filled: int) -> str:
+        """The bar itself, built once per look and fill level"""
+        key = (self.length, self.color, self.is_colored, filled)
+        bar = self._glyphs.get(key)
+        if bar is None:
+            bar = (f" {self.barrier}"
+                   f"{self.color if self.is_colored else ''}{filled * self.symbol_remaining}"
+                   f"{(self.length - filled) * self.symbol_lost}"
+                   f"{self.colors['default'] if self.is_colored else ''}"
+                   f"{self.barrier}")
+            self._glyphs[key] = bar
+        return bar
+        
+    def render(self) -> str:
+        """Both lines of the bar, rebuilt only after update() marked it dirty"""
+        if self.dirty:
+            self._rendered = (f" {self.entity.name}'s HEALTH: {self.current_value}/{self.max_value}\n"
+                              f"{self.glyph(self.filled_segments())}")
+            self.dirty = False
+        return self._rendered
         
     def draw(self) -> None:
-        remaining_bars = round(self.current_value / self.max_value * self.length)
-        lost_bars = self.length - remaining_bars
-        print(f" {self.entity.name}'s HEALTH: {self.entity.health}/{self.entity.health_max}")
-        print(f" {self.barrier}"
-              f"{self.color if self.is_colored else ''}{remaining_bars * self.symbol_remaining}"
-              f"{lost_bars * self.symbol_lost}"
-              f"{self.colors['default'] if self.is_colored else ''}"
-              f"{self.barrier}")
+        print(self.render())
+
+
+def render_bars(bars: Iterable[HealthBar]) -> str:
+    """Several bars, e.g. a party or a spectator view, as one block of text"""
+    return "\n".join(bar.render() for bar in bars)
+
+
+def draw_bars(*bars: HealthBar) -> None:
+    """Print several bars with a single write"""
+    print(render_bars(bars))
@@ -0,0 +1,194 @@
+"""
+Instrumentation for Text-Based Battle Game
+
+Opt-in timers and counters for the game's hot paths. The game loops wrap each
+phase of work (combat resolution, enemy AI, rendering, achievement and quest
+checks, persistence, ...) in a phase() block, and count() tallies events such
+as turns and battles. Prompts are never inside a phase, so the time a player
+spends thinking is not measured.
+
+Instrumentation is off by default. Turn it on with the TEXT_BATTLE_PROFILE
+environment variable or the --profile flag of main.py and server.py:
+
+    TEXT_BATTLE_PROFILE=1 python main.py
+    python server.py --profile
+
+While it is off, phase() returns one shared do-nothing context manager and
+count() returns at once. While it is on, the summary (count, total, p50, p99
+and max per phase) is written to stderr at exit, on SIGUSR1 where the
+platform has it, or whenever dump() is called.
+
+    with instrumentation.phase("combat"):
+        hero.attack(enemy)
+    instrumentation.count("turns")
+"""
+
+import atexit
+import math
+import os
+import signal
+import sys
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+ENV_VAR = "TEXT_BATTLE_PROFILE"
+
+# Durations are kept in logarithmic buckets this many per doubling (about 9% wide),
+# so memory stays fixed however long a session runs
+BUCKETS_PER_DOUBLING = 8
+
+_enabled = False
+_hooks_installed = False
+
+
+class PhaseStats:
+    """Call count, total time and a duration histogram for one phase"""
+
+    __slots__ = ("count", "total_ns", "max_ns", "buckets")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets: Counter = Counter()
+
+    def record(self, elapsed_ns: int):
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.buckets[int(math.log2(elapsed_ns) * BUCKETS_PER_DOUBLING) if elapsed_ns > 0 else -1] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Approximate duration in nanoseconds that `fraction` of calls finished within"""
+        threshold = fraction * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= threshold:
+                if bucket < 0:
+                    return 0.0
+                # Upper edge of the bucket, capped by the slowest call seen
+                return min(2 ** ((bucket + 1) / BUCKETS_PER_DOUBLING), self.max_ns)
+        return float(self.max_ns)
+
+
+_phases: Dict[str, PhaseStats] = {}
+_counters: Counter = Counter()
+
+
+class _Phase:
+    __slots__ = ("stats", "start")
+
+    def __init__(self, stats: PhaseStats):
+        self.stats = stats
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stats.record(time.perf_counter_ns() - self.start)
+        return False
+
+
+class _NullPhase:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_PHASE = _NullPhase()
+
+
+def phase(name: str):
+    """Context manager timing one run of the named phase"""
+    if not _enabled:
+        return _NULL_PHASE
+    stats = _phases.get(name)
+    if stats is None:
+        stats = _phases[name] = PhaseStats()
+    return _Phase(stats)
+
+
+def count(name: str, amount: int = 1):
+    """Add to a named counter"""
+    if _enabled:
+        _counters[name] += amount
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def enable(dump_at_exit: bool = True):
+    """Start collecting; the summary is dumped at exit and on SIGUSR1"""
+    global _enabled, _hooks_installed
+    _enabled = True
+    if dump_at_exit and not _hooks_installed:
+        _hooks_installed = True
+        atexit.register(dump)
+        if hasattr(signal, "SIGUSR1"):
+            try:
+                signal.signal(signal.SIGUSR1, lambda signum, frame: dump())
+            except ValueError:
+                pass  # Not the main thread; dump() can still be called directly
+
+
+def disable():
+    global _enabled
+    _enabled = False
+
+
+def reset():
+    """Forget everything collected so far"""
+    _phases.clear()
+    _counters.clear()
+
+
+def _format_duration(ns: float) -> str:
+    if ns >= 1e9:
+        return f"{ns / 1e9:.2f}s"
+    if ns >= 1e6:
+        return f"{ns / 1e6:.2f}ms"
+    return f"{ns / 1e3:.1f}us"
+
+
+def summary() -> str:
+    """Table of every phase and counter collected so far"""
+    lines = [f"{'phase':<20}{'count':>9}{'total':>11}{'p50':>11}{'p99':>11}{'max':>11}"]
+    for name, stats in sorted(_phases.items(), key=lambda item: item[1].total_ns, reverse=True):
+        lines.append(f"{name:<20}{stats.count:>9}{_format_duration(stats.total_ns):>11}"
+                     f"{_format_duration(stats.percentile(0.5)):>11}"
+                     f"{_format_duration(stats.percentile(0.99)):>11}"
+                     f"{_format_duration(stats.max_ns):>11}")
+    if _counters:
+        lines.append("")
+        lines.append(f"{'counter':<20}{'count':>9}")
+        for name, value in sorted(_counters.items()):
+            lines.append(f"{name:<20}{value:>9}")
+    return "\n".join(lines)
+
+
+def dump(stream=None):
+    """Write the summary, to stderr by default so it never mixes with game output"""
+    if not _phases and not _counters:
+        return
+    stream = stream if stream is not None else sys.__stderr__
+    stream.write("\n=== INSTRUMENTATION ===\n" + summary() + "\n")
+    stream.flush()
+
+
+def enable_from_env(environ: Optional[dict] = None):
+    """Enable instrumentation if TEXT_BATTLE_PROFILE is set to anything but 0"""
+    value = (environ if environ is not None else os.environ).get(ENV_VAR, "")
+    if value not in ("", "0"):
+        enable()
+
+
+enable_from_env()
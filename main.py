@@ -2,81 +2,117 @@ from character import Hero
 from game_utils import (GameState, Shop, EnemyGenerator, clear_screen, 
                        display_combat_menu, display_main_menu, display_inventory, 
                        display_spell_menu, display_skill_menu, wait_for_input)
-from save_system import SaveSystem
+from save_system import SaveSystem, SAVE_FILE
 from achievements import AchievementSystem, initialize_achievement_tracking
 from dungeons import DungeonSystem
 from character_classes import select_character_class, apply_class_combat_bonuses
 from quest_system import QuestSystem, initialize_quest_tracking
+from game_io import ask, pause, run
+from renderer import FrameRenderer
+from health_bar import draw_bars
+from enemy_pool import ENEMY_POOL
+from battle_odds import battle_odds, describe_odds
+from auto_battle import MCTSAgent
+from combat_policy import combat_hint
+from simulation import take_action
+from instrumentation import count, phase
+import instrumentation
+import argparse
 import random
 
 def main():
+    """Play the game in the terminal"""
+    parser = argparse.ArgumentParser(description="Play the text-based battle game.")
+    parser.add_argument("--profile", action="store_true",
+                        help="time game phases and print a summary at exit")
+    parser.add_argument("--record", metavar="FILE", help="record the session for replay.py")
+    parser.add_argument("--seed", type=int, default=None, help="random seed for a recorded session")
+    args = parser.parse_args()
+    if args.profile:
+        instrumentation.enable()
+    if args.record:
+        from replay import record_session
+        record_session(args.record, seed=args.seed, renderer=FrameRenderer())
+    else:
+        run(game_session(), renderer=FrameRenderer())
+
+def game_session(save_file: str = SAVE_FILE):
+    """One complete game, from the title screen to game over"""
     # Initialize game systems
     print("=== WELCOME TO TEXT-BASED BATTLE GAME ===")
     
     # Check for existing save file
-    if SaveSystem.has_save_file():
-        choice = input("Found existing save file. Load game? (y/n): ").strip().lower()
+    if SaveSystem.has_save_file(save_file):
+        choice = (yield from ask("Found existing save file. Load game? (y/n): ")).strip().lower()
         if choice == 'y':
-            hero, game_state = SaveSystem.load_game()
+            with phase("persistence"):
+                hero, game_state = SaveSystem.load_game(save_file)
             if hero and game_state:
                 shop = Shop()
                 achievement_system = AchievementSystem()
-                dungeon_system = DungeonSystem()
+                dungeon_system = DungeonSystem(states=game_state.dungeon_states)
                 quest_system = QuestSystem()
                 initialize_achievement_tracking(hero)
                 initialize_quest_tracking(hero)
                 print(f"Welcome back, {hero.name}!")
-                wait_for_input()
+                yield from wait_for_input()
             else:
-                hero, game_state, shop, achievement_system, dungeon_system, quest_system = create_new_game()
+                hero, game_state, shop, achievement_system, dungeon_system, quest_system = yield from create_new_game()
         else:
-            hero, game_state, shop, achievement_system, dungeon_system, quest_system = create_new_game()
+            hero, game_state, shop, achievement_system, dungeon_system, quest_system = yield from create_new_game()
     else:
-        hero, game_state, shop, achievement_system, dungeon_system, quest_system = create_new_game()
+        hero, game_state, shop, achievement_system, dungeon_system, quest_system = yield from create_new_game()
     
     # Main game loop
     while not game_state.game_over:
-        clear_screen()
-        print(f"=== ADVENTURE - Day {game_state.turn_count + 1} ===")
-        hero.show_stats()
+        with phase("render"):
+            clear_screen()
+            print(f"=== ADVENTURE - Day {game_state.turn_count + 1} ===")
+            hero.show_stats()
         
         # Check for achievements
-        achievement_system.check_achievements(hero)
+        with phase("achievements"):
+            achievement_system.check_achievements(hero)
         
         # Update quest progress
-        quest_system.update_all_quests(hero)
+        with phase("quests"):
+            quest_system.update_all_quests(hero)
         
-        choice = display_main_menu()
+        choice = yield from display_main_menu()
         
         if choice == 1:  # Continue Adventure
-            battle_loop(hero, game_state, achievement_system, quest_system)
+            yield from battle_loop(hero, game_state, achievement_system, quest_system)
         elif choice == 2:  # Explore Dungeons
-            dungeon_loop(hero, game_state, dungeon_system, achievement_system, quest_system)
+            yield from dungeon_loop(hero, game_state, dungeon_system, achievement_system, quest_system)
         elif choice == 3:  # Visit Shop
-            shop_loop(hero, shop)
+            yield from shop_loop(hero, shop)
         elif choice == 4:  # Visit NPCs
-            npc_loop(hero, quest_system)
+            yield from npc_loop(hero, quest_system)
         elif choice == 5:  # View Inventory
-            display_inventory(hero)
-            wait_for_input()
+            yield from display_inventory(hero)
+            yield from wait_for_input()
         elif choice == 6:  # Character Stats
             hero.show_stats()
-            wait_for_input()
+            yield from wait_for_input()
         elif choice == 7:  # Skill Points
-            display_skill_menu(hero)
+            yield from display_skill_menu(hero)
         elif choice == 8:  # Quest Log
             quest_system.show_quest_log(hero)
-            wait_for_input()
+            yield from wait_for_input()
         elif choice == 9:  # Achievements
             achievement_system.show_achievements(hero)
-            wait_for_input()
+            yield from wait_for_input()
         elif choice == 10:  # Save Game
-            SaveSystem.save_game(hero, game_state)
-            wait_for_input()
+            with phase("persistence"):
+                game_state.dungeon_states = dungeon_system.get_states()
+                SaveSystem.save_game(hero, game_state, save_file)
+            yield from wait_for_input()
         elif choice == 11:  # Quit Game
-            save_choice = input("Save game before quitting? (y/n): ").strip().lower()
+            save_choice = (yield from ask("Save game before quitting? (y/n): ")).strip().lower()
             if save_choice == 'y':
-                SaveSystem.save_game(hero, game_state)
+                with phase("persistence"):
+                    game_state.dungeon_states = dungeon_system.get_states()
+                    SaveSystem.save_game(hero, game_state, save_file)
             print("Thanks for playing!")
             game_state.game_over = True
     
@@ -84,16 +120,17 @@ def main():
     print(f"Final Stats for {hero.name}:")
     hero.show_stats()
     print(f"Days survived: {game_state.turn_count}")
+    return hero, game_state
 
 def create_new_game():
     """Create a new game with fresh hero and game state"""
-    hero_name = input("Enter your hero's name: ").strip()
+    hero_name = (yield from ask("Enter your hero's name: ")).strip()
     if not hero_name:
         hero_name = "Hero"
     
     # Character class selection
     print(f"\nWelcome, {hero_name}! Now choose your path...")
-    character_class = select_character_class()
+    character_class = yield from select_character_class()
     
     hero = Hero(hero_name, 100, 1)
     
@@ -111,85 +148,115 @@ def create_new_game():
     quest_system = QuestSystem()
     
     print(f"\nYour adventure begins, {hero.name} the {character_class.name}!")
-    wait_for_input()
+    yield from wait_for_input()
     
     return hero, game_state, shop, achievement_system, dungeon_system, quest_system
 
 def battle_loop(hero: Hero, game_state: GameState, achievement_system: AchievementSystem, quest_system: QuestSystem):
     """Main battle loop"""
     # Generate enemy based on hero's level
-    enemy_level = max(1, hero.level + random.randint(-1, 2))
-    enemy = EnemyGenerator.generate_enemy(enemy_level)
+    with phase("enemy_generation"):
+        enemy_level = max(1, hero.level + random.randint(-1, 2))
+        enemy = EnemyGenerator.generate_enemy(enemy_level)
+    
+    with phase("odds"):
+        odds = describe_odds(battle_odds(hero, enemy))
     
     print(f"\n💀 A {enemy.name} (Level {enemy.level}) appears!")
     print(f"Enemy Health: {enemy.health}")
     print(f"Enemy Weapon: {enemy.weapon.name}")
-    wait_for_input()
+    print(f"Odds: {odds}")
+    yield from wait_for_input()
     
     # Track battle
-    hero.battles_fought += 1
+    hero.change_stat("battles_fought")
+    count("battles")
     
-    # Battle loop
+    # Battle loop; once Auto Battle is picked the agent plays the hero's turns
+    agent = None
     while hero.is_alive and enemy.is_alive:
-        clear_screen()
-        print(f"=== BATTLE: {hero.name} vs {enemy.name} ===")
-        
-        # Update buffs
-        hero.update_buffs()
-        enemy.update_buffs()
-        
-        # Regenerate some mana
-        hero.regenerate_mana()
+        count("turns")
+        with phase("combat"):
+            # Update buffs
+            hero.update_buffs()
+            enemy.update_buffs()
+            
+            # Regenerate some mana
+            hero.regenerate_mana()
         
-        # Display health bars
-        hero.health_bar.draw()
-        enemy.health_bar.draw()
+        with phase("render"):
+            if agent is None:
+                clear_screen()
+                print(f"=== BATTLE: {hero.name} vs {enemy.name} ===")
+                
+                # Display health bars
+                draw_bars(hero.health_bar, enemy.health_bar)
+                
+                # Advice from a solved policy table, when there is one
+                hint = combat_hint(hero, enemy)
+                if hint:
+                    print(f"💡 Hint (approximate): {hint}")
+            else:
+                print(f"\n{hero.name} {hero.health}/{hero.health_max} HP vs "
+                      f"{enemy.name} {enemy.health}/{enemy.health_max} HP")
         
         # Hero's turn
         if hero.is_alive:
-            action = display_combat_menu()
+            if agent is None:
+                action = yield from display_combat_menu()
+            else:
+                action = 6
             
             if action == 1:  # Attack
-                hero.attack(enemy)
+                with phase("combat"):
+                    hero.attack(enemy)
             elif action == 2:  # Cast Spell
-                spell_choice = display_spell_menu(hero)
+                spell_choice = yield from display_spell_menu(hero)
                 if spell_choice <= len(hero.spells):
                     spell = hero.spells[spell_choice - 1]
-                    if hero.cast_spell(spell, enemy):
-                        hero.spells_cast += 1
+                    with phase("combat"):
+                        if hero.cast_spell(spell, enemy):
+                            hero.change_stat("spells_cast")
             elif action == 3:  # Use Potion
-                hero.use_potion()
+                with phase("combat"):
+                    hero.use_potion()
             elif action == 4:  # View Stats
                 hero.show_stats()
-                wait_for_input()
+                yield from wait_for_input()
                 continue
             elif action == 5:  # Run Away
                 if random.random() < 0.7:  # 70% chance to escape
                     print(f"{hero.name} successfully ran away!")
-                    wait_for_input()
+                    yield from wait_for_input()
+                    ENEMY_POOL.release(enemy)
                     return
                 else:
                     print(f"{hero.name} couldn't escape!")
+            elif action == 6:  # Auto Battle
+                agent = agent or start_auto_battle(hero)
+                auto_turn(agent, hero, enemy)
         
         # Enemy's turn
         if enemy.is_alive:
             print()
-            enemy.ai_action(hero)
+            with phase("ai"):
+                enemy.ai_action(hero)
         
-        wait_for_input()
+        if agent is None:
+            yield from wait_for_input()
     
     # Battle result
     if hero.is_alive:
         print(f"\n🎉 Victory! {hero.name} defeated {enemy.name}!")
         print(f"Gained {enemy.gold} gold!")
-        hero.gold += enemy.gold
-        hero.battles_won += 1
+        hero.change_stat("gold", enemy.gold)
+        hero.change_stat("battles_won")
         
         # Track enemy type kills
         if enemy.enemy_type == "elite":
-            hero.elite_kills += 1
+            hero.change_stat("elite_kills")
         elif enemy.enemy_type == "boss":
-            hero.boss_kills += 1
+            hero.change_stat("boss_kills")
         
         # Give skill points occasionally
         if random.random() < 0.3:  # 30% chance
@@ -199,35 +266,50 @@ def battle_loop(hero: Hero, game_state: GameState, achievement_system: Achieveme
         game_state.increment_turn()
         
         # Check achievements
-        achievement_system.check_achievements(hero)
+        with phase("achievements"):
+            achievement_system.check_achievements(hero)
     else:
         print(f"\n💀 {hero.name} has been defeated...")
         game_state.game_over = True
     
-    wait_for_input()
+    yield from wait_for_input()
+    ENEMY_POOL.release(enemy)
+
+def start_auto_battle(hero: Hero) -> MCTSAgent:
+    """Hand the rest of the fight over to the auto-battle agent"""
+    print(f"\n🤖 Auto battle: {hero.name} fights on without further orders...")
+    return MCTSAgent()
+
+def auto_turn(agent: MCTSAgent, hero: Hero, enemy):
+    """Play one hero turn chosen by the auto-battle agent"""
+    with phase("auto_battle"):
+        action = agent.choose(hero, enemy)
+    with phase("combat"):
+        take_action(hero, enemy, action)
 
 def dungeon_loop(hero: Hero, game_state: GameState, dungeon_system: DungeonSystem, achievement_system: AchievementSystem, quest_system: QuestSystem):
     """Dungeon exploration loop"""
-    available_dungeons = dungeon_system.show_dungeons(hero.level)
+    with phase("dungeon_list"):
+        available_dungeons = dungeon_system.show_dungeons(hero.level, hero)
     
     if not available_dungeons:
         print("No dungeons available for your level!")
-        wait_for_input()
+        yield from wait_for_input()
         return
     
     try:
-        choice = int(input("Choose dungeon (0 to cancel): "))
+        choice = int((yield from ask("Choose dungeon (0 to cancel): ")))
         if choice == 0:
             return
         if 1 <= choice <= len(available_dungeons):
             dungeon = available_dungeons[choice - 1]
-            explore_dungeon(hero, game_state, dungeon, achievement_system)
+            yield from explore_dungeon(hero, game_state, dungeon, achievement_system)
         else:
             print("Invalid choice!")
-            wait_for_input()
+            yield from wait_for_input()
     except ValueError:
         print("Invalid input!")
-        wait_for_input()
+        yield from wait_for_input()
 
 def explore_dungeon(hero: Hero, game_state: GameState, dungeon, achievement_system: AchievementSystem):
     """Explore a specific dungeon"""
@@ -235,15 +317,18 @@ def explore_dungeon(hero: Hero, game_state: GameState, dungeon, achievement_syst
     dungeon.reset()
     
     while not dungeon.completed and hero.is_alive:
-        room = dungeon.get_current_room()
+        with phase("dungeon_generation"):
+            room = dungeon.get_current_room()
         if not room:
             break
+        count("rooms")
         
-        clear_screen()
-        print(f"=== {dungeon.name} ===")
-        print(f"Room {dungeon.current_room + 1}/{len(dungeon.rooms)}")
-        print(f"\n{room.name}")
-        print(room.description)
+        with phase("render"):
+            clear_screen()
+            print(f"=== {dungeon.name} ===")
+            print(f"Room {dungeon.current_room + 1}/{dungeon.room_count}")
+            print(f"\n{room.name}")
+            print(room.description)
         
         if room.room_type == "rest":
             print("\nYou found a safe place to rest!")
@@ -255,7 +340,7 @@ def explore_dungeon(hero: Hero, game_state: GameState, dungeon, achievement_syst
         elif room.room_type == "treasure" and room.treasure:
             print(f"\n💰 You found: {room.treasure['name']}!")
             if room.treasure['type'] == 'gold':
-                hero.gold += room.treasure['amount']
+                hero.change_stat("gold", room.treasure['amount'])
                 print(f"Gained {room.treasure['amount']} gold!")
             elif room.treasure['type'] == 'potion':
                 hero.potions += room.treasure['amount']
@@ -266,19 +351,23 @@ def explore_dungeon(hero: Hero, game_state: GameState, dungeon, achievement_syst
             
         elif room.enemy and room.enemy.is_alive:
             print(f"\n⚔️ A {room.enemy.name} blocks your path!")
-            if not fight_dungeon_enemy(hero, room.enemy, achievement_system):
+            enemy = room.enemy
+            won = yield from fight_dungeon_enemy(hero, enemy, achievement_system)
+            room.enemy = None
+            ENEMY_POOL.release(enemy)
+            if not won:
                 return  # Hero died
         
         room.completed = True
         
-        if dungeon.current_room < len(dungeon.rooms) - 1:
-            input("\nPress Enter to continue to the next room...")
+        if dungeon.current_room < dungeon.room_count - 1:
+            yield from pause("\nPress Enter to continue to the next room...")
             dungeon.advance_room()
         else:
             dungeon.completed = True
             print(f"\n🎉 You have completed {dungeon.name}!")
             completion_reward = dungeon.max_level * 100
-            hero.gold += completion_reward
+            hero.change_stat("gold", completion_reward)
             hero.gain_experience(completion_reward)
             print(f"Completion reward: {completion_reward} gold and experience!")
             
@@ -288,72 +377,98 @@ def explore_dungeon(hero: Hero, game_state: GameState, dungeon, achievement_syst
             
             # Track for quests
             if hasattr(hero, 'dungeons_completed'):
-                hero.dungeons_completed += 1
+                hero.change_stat("dungeons_completed")
             
-            achievement_system.check_achievements(hero)
+            with phase("achievements"):
+                achievement_system.check_achievements(hero)
             break
     
-    wait_for_input()
+    yield from wait_for_input()
 
 def fight_dungeon_enemy(hero: Hero, enemy, achievement_system: AchievementSystem) -> bool:
     """Fight an enemy in a dungeon room"""
-    hero.battles_fought += 1
+    hero.change_stat("battles_fought")
+    count("dungeon_battles")
     
+    agent = None
     while hero.is_alive and enemy.is_alive:
-        clear_screen()
-        print(f"=== DUNGEON BATTLE: {hero.name} vs {enemy.name} ===")
-        
-        # Update buffs and regenerate mana
-        hero.update_buffs()
-        enemy.update_buffs()
-        hero.regenerate_mana()
+        count("turns")
+        with phase("combat"):
+            # Update buffs and regenerate mana
+            hero.update_buffs()
+            enemy.update_buffs()
+            hero.regenerate_mana()
         
-        # Display health bars
-        hero.health_bar.draw()
-        enemy.health_bar.draw()
+        with phase("render"):
+            if agent is None:
+                clear_screen()
+                print(f"=== DUNGEON BATTLE: {hero.name} vs {enemy.name} ===")
+                
+                # Display health bars
+                draw_bars(hero.health_bar, enemy.health_bar)
+                
+                # Advice from a solved policy table, when there is one
+                hint = combat_hint(hero, enemy)
+                if hint:
+                    print(f"💡 Hint (approximate): {hint}")
+            else:
+                print(f"\n{hero.name} {hero.health}/{hero.health_max} HP vs "
+                      f"{enemy.name} {enemy.health}/{enemy.health_max} HP")
         
         # Hero's turn
         if hero.is_alive:
-            action = display_combat_menu()
+            if agent is None:
+                action = yield from display_combat_menu()
+            else:
+                action = 6
             
             if action == 1:  # Attack
-                hero.attack(enemy)
+                with phase("combat"):
+                    hero.attack(enemy)
             elif action == 2:  # Cast Spell
-                spell_choice = display_spell_menu(hero)
+                spell_choice = yield from display_spell_menu(hero)
                 if spell_choice <= len(hero.spells):
                     spell = hero.spells[spell_choice - 1]
-                    if hero.cast_spell(spell, enemy):
-                        hero.spells_cast += 1
+                    with phase("combat"):
+                        if hero.cast_spell(spell, enemy):
+                            hero.change_stat("spells_cast")
             elif action == 3:  # Use Potion
-                hero.use_potion()
+                with phase("combat"):
+                    hero.use_potion()
             elif action == 4:  # View Stats
                 hero.show_stats()
-                wait_for_input()
+                yield from wait_for_input()
                 continue
             elif action == 5:  # Run Away
                 print("You can't run away from dungeon enemies!")
+            elif action == 6:  # Auto Battle
+                agent = agent or start_auto_battle(hero)
+                auto_turn(agent, hero, enemy)
         
         # Enemy's turn
         if enemy.is_alive:
             print()
-            enemy.ai_action(hero)
+            with phase("ai"):
+                enemy.ai_action(hero)
         
-        wait_for_input()
+        if agent is None:
+            yield from wait_for_input()
     
     # Battle result
     if hero.is_alive:
         print(f"\n🎉 Victory! {hero.name} defeated {enemy.name}!")
         print(f"Gained {enemy.gold} gold!")
-        hero.gold += enemy.gold
-        hero.battles_won += 1
+        hero.change_stat("gold", enemy.gold)
+        hero.change_stat("battles_won")
         
         # Track enemy type kills
         if enemy.enemy_type == "elite":
-            hero.elite_kills += 1
+            hero.change_stat("elite_kills")
         elif enemy.enemy_type == "boss":
-            hero.boss_kills += 1
+            hero.change_stat("boss_kills")
         
-        achievement_system.check_achievements(hero)
+        with phase("achievements"):
+            achievement_system.check_achievements(hero)
         return True
     else:
         print(f"\n💀 {hero.name} has been defeated...")
@@ -370,22 +485,22 @@ def npc_loop(hero: Hero, quest_system: QuestSystem):
     
     while True:
         try:
-            choice = int(input("Visit NPC (1-5): "))
+            choice = int((yield from ask("Visit NPC (1-5): ")))
             if choice == 1:
-                quest_system.visit_npc("village_elder", hero)
-                wait_for_input()
+                yield from quest_system.visit_npc("village_elder", hero)
+                yield from wait_for_input()
                 break
             elif choice == 2:
-                quest_system.visit_npc("training_master", hero)
-                wait_for_input()
+                yield from quest_system.visit_npc("training_master", hero)
+                yield from wait_for_input()
                 break
             elif choice == 3:
-                quest_system.visit_npc("court_wizard", hero)
-                wait_for_input()
+                yield from quest_system.visit_npc("court_wizard", hero)
+                yield from wait_for_input()
                 break
             elif choice == 4:
-                quest_system.visit_npc("dungeon_keeper", hero)
-                wait_for_input()
+                yield from quest_system.visit_npc("dungeon_keeper", hero)
+                yield from wait_for_input()
                 break
             elif choice == 5:
                 break
@@ -401,19 +516,19 @@ def shop_loop(hero: Hero, shop: Shop):
         shop.show_shop(hero)
         
         try:
-            choice = int(input("Choose item to buy (or exit): "))
+            choice = int((yield from ask("Choose item to buy (or exit): ")))
             exit_option = len(shop.weapons) + len(shop.spells) + 2  # Weapons + Spells + Potion + Exit
             if choice == exit_option:  # Exit shop
                 break
             elif 1 <= choice <= exit_option - 1:
                 shop.buy_item(hero, choice)
-                wait_for_input()
+                yield from wait_for_input()
             else:
                 print("Invalid choice.")
-                wait_for_input()
+                yield from wait_for_input()
         except ValueError:
             print("Invalid input. Please enter a number.")
-            wait_for_input()
+            yield from wait_for_input()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,10 +3,17 @@ Quest System for Text-Based Battle Game
 
 This module implements a quest system with NPCs, objectives, and story progression.
 Quests provide additional goals for players and rewards upon completion.
+
+Quest progress is tracked incrementally: objectives subscribe to the hero stats
+they read, quests are kept in per-status buckets, and each tick re-evaluates
+only the objectives whose stats changed.
 """
 
-from typing import Dict, List, Optional, Callable
+from typing import Dict, List, Optional, Callable, Iterable, Tuple
 from enum import Enum
+import events
+from game_io import Flow, ask
+from stat_tracking import StatIndex
 
 
 class QuestStatus(Enum):
@@ -19,10 +26,12 @@ class QuestStatus(Enum):
 class QuestObjective:
     """Represents a single objective within a quest"""
     
-    def __init__(self, description: str, check_condition: Callable, target_value: int = 1):
+    def __init__(self, description: str, check_condition: Callable, target_value: int = 1,
+                 stats: Iterable[str] = ()):
         self.description = description
         self.check_condition = check_condition
         self.target_value = target_value
+        self.stats = tuple(stats)  # Hero stats the condition reads
         self.current_value = 0
         self.completed = False
     
@@ -55,6 +64,13 @@ class Quest:
         self.prerequisite_level = prerequisite_level
         self.status = QuestStatus.NOT_STARTED
         self.completed_objectives = 0
+        self.status_listener: Optional[Callable] = None  # Called as listener(quest, old_status)
+    
+    def _set_status(self, status: QuestStatus):
+        old_status = self.status
+        self.status = status
+        if self.status_listener:
+            self.status_listener(self, old_status)
     
     def can_start(self, hero) -> bool:
         """Check if the hero meets prerequisites to start this quest"""
@@ -63,26 +79,28 @@ class Quest:
     
     def start_quest(self):
         """Start the quest"""
-        self.status = QuestStatus.ACTIVE
-        print(f"📋 Quest Started: {self.name}")
-        print(f"   {self.description}")
+        self._set_status(QuestStatus.ACTIVE)
+        events.emit("quest_started", quest=self.name, description=self.description)
     
-    def update_progress(self, hero) -> bool:
-        """Update quest progress and return True if completed"""
+    def update_progress(self, hero, objectives: Optional[Iterable[QuestObjective]] = None) -> bool:
+        """Update quest progress and return True if completed.
+        
+        Only `objectives` are re-evaluated when given; by default all of them are.
+        """
         if self.status != QuestStatus.ACTIVE:
             return False
         
         newly_completed = []
-        for objective in self.objectives:
+        for objective in (self.objectives if objectives is None else objectives):
             if not objective.completed and objective.update_progress(hero):
                 newly_completed.append(objective)
         
         # Show newly completed objectives
         for objective in newly_completed:
-            print(f"📋 Objective Complete: {objective.description}")
+            events.emit("objective_completed", quest=self.name, objective=objective.description)
         
         # Check if all objectives are complete
-        self.completed_objectives = sum(1 for obj in self.objectives if obj.completed)
+        self.completed_objectives += len(newly_completed)
         if self.completed_objectives == len(self.objectives):
             self.complete_quest(hero)
             return True
@@ -91,25 +109,25 @@ class Quest:
     
     def complete_quest(self, hero):
         """Complete the quest and give rewards"""
-        self.status = QuestStatus.COMPLETED
-        print(f"🎉 Quest Completed: {self.name}")
+        self._set_status(QuestStatus.COMPLETED)
+        events.emit("quest_completed", quest=self.name)
         
         # Give rewards
         if self.reward_gold > 0:
-            hero.gold += self.reward_gold
-            print(f"   Reward: {self.reward_gold} gold!")
+            hero.change_stat("gold", self.reward_gold)
+            events.emit("reward_gold", source=self.name, amount=self.reward_gold)
         
         if self.reward_exp > 0:
             hero.gain_experience(self.reward_exp)
-            print(f"   Reward: {self.reward_exp} experience!")
+            events.emit("reward_experience", source=self.name, amount=self.reward_exp)
         
         if self.reward_items:
             for item in self.reward_items:
-                print(f"   Reward: {item}!")
+                events.emit("reward_item", source=self.name, item=item)
         
         # Give skill points for quest completion
         hero.skill_points += 1
-        print("   Reward: 1 skill point!")
+        events.emit("reward_skill_point", source=self.name)
     
     def get_progress_text(self) -> str:
         """Get quest progress for display"""
@@ -150,9 +168,43 @@ class QuestSystem:
     def __init__(self):
         self.quests: Dict[str, Quest] = {}
         self.npcs: Dict[str, NPC] = {}
+        self._by_status: Dict[QuestStatus, Dict[str, Quest]] = {status: {} for status in QuestStatus}
+        self._order: Dict[str, int] = {}
+        self._objective_index = StatIndex()
+        self._snapshot: Optional[Tuple] = None  # Cached until a status or objective changes
+        self._hero = None  # The hero whose stat changes feed the objective index
         self._initialize_quests()
         self._initialize_npcs()
     
+    def add_quest(self, quest: Quest):
+        """Register a quest with the system"""
+        self.quests[quest.quest_id] = quest
+        self._order[quest.quest_id] = len(self._order)
+        self._snapshot = None
+        quest.status_listener = self._on_status_change
+        self._by_status[quest.status][quest.quest_id] = quest
+        if quest.status == QuestStatus.ACTIVE:
+            self._subscribe_objectives(quest)
+    
+    def _subscribe_objectives(self, quest: Quest):
+        for position, objective in enumerate(quest.objectives):
+            if not objective.completed:
+                self._objective_index.subscribe((quest.quest_id, position), objective.stats)
+    
+    def _unsubscribe_objectives(self, quest: Quest):
+        for position, objective in enumerate(quest.objectives):
+            self._objective_index.unsubscribe((quest.quest_id, position), objective.stats)
+    
+    def _on_status_change(self, quest: Quest, old_status: QuestStatus):
+        """Keep the status buckets and objective subscriptions in step with the quest"""
+        self._snapshot = None
+        self._by_status[old_status].pop(quest.quest_id, None)
+        self._by_status[quest.status][quest.quest_id] = quest
+        if quest.status == QuestStatus.ACTIVE:
+            self._subscribe_objectives(quest)
+        elif old_status == QuestStatus.ACTIVE:
+            self._unsubscribe_objectives(quest)
+    
     def _initialize_quests(self):
         """Initialize all available quests"""
         
@@ -165,12 +217,14 @@ class QuestSystem:
                 QuestObjective(
                     "Win 1 battle",
                     lambda hero: getattr(hero, 'battles_won', 0),
-                    1
+                    1,
+                    stats=["battles_won"]
                 ),
                 QuestObjective(
                     "Buy 1 item from shop",
                     lambda hero: getattr(hero, 'items_purchased', 0),
-                    1
+                    1,
+                    stats=["items_purchased"]
                 )
             ],
             reward_gold=100,
@@ -187,12 +241,14 @@ class QuestSystem:
                 QuestObjective(
                     "Win 5 battles",
                     lambda hero: getattr(hero, 'battles_won', 0),
-                    5
+                    5,
+                    stats=["battles_won"]
                 ),
                 QuestObjective(
                     "Reach level 3",
                     lambda hero: hero.level,
-                    3
+                    3,
+                    stats=["level"]
                 )
             ],
             reward_gold=200,
@@ -209,12 +265,14 @@ class QuestSystem:
                 QuestObjective(
                     "Learn 3 spells",
                     lambda hero: len(hero.spells),
-                    3
+                    3,
+                    stats=["spells_known"]
                 ),
                 QuestObjective(
                     "Cast 10 spells",
                     lambda hero: getattr(hero, 'spells_cast', 0),
-                    10
+                    10,
+                    stats=["spells_cast"]
                 )
             ],
             reward_gold=300,
@@ -231,12 +289,14 @@ class QuestSystem:
                 QuestObjective(
                     "Complete 2 dungeons",
                     lambda hero: getattr(hero, 'dungeons_completed', 0),
-                    2
+                    2,
+                    stats=["dungeons_completed"]
                 ),
                 QuestObjective(
                     "Defeat 3 elite enemies",
                     lambda hero: getattr(hero, 'elite_kills', 0),
-                    3
+                    3,
+                    stats=["elite_kills"]
                 )
             ],
             reward_gold=500,
@@ -253,17 +313,20 @@ class QuestSystem:
                 QuestObjective(
                     "Reach level 8",
                     lambda hero: hero.level,
-                    8
+                    8,
+                    stats=["level"]
                 ),
                 QuestObjective(
                     "Accumulate 1000 gold",
                     lambda hero: hero.gold,
-                    1000
+                    1000,
+                    stats=["gold"]
                 ),
                 QuestObjective(
                     "Defeat 1 boss enemy",
                     lambda hero: getattr(hero, 'boss_kills', 0),
-                    1
+                    1,
+                    stats=["boss_kills"]
                 )
             ],
             reward_gold=1000,
@@ -273,7 +336,7 @@ class QuestSystem:
         
         # Add quests to system
         for quest in [first_steps, apprentice_warrior, spell_caster, dungeon_explorer, master_adventurer]:
-            self.quests[quest.quest_id] = quest
+            self.add_quest(quest)
     
     def _initialize_npcs(self):
         """Initialize NPCs and their quest associations"""
@@ -313,28 +376,93 @@ class QuestSystem:
         """Get a quest by ID"""
         return self.quests.get(quest_id)
     
+    def get_quests_by_status(self, status: QuestStatus) -> List[Quest]:
+        """Get all quests with the given status"""
+        return list(self._by_status[status].values())
+    
     def get_available_quests(self, hero) -> List[Quest]:
         """Get all quests available to start for the hero"""
-        return [quest for quest in self.quests.values() if quest.can_start(hero)]
+        return [quest for quest in self._by_status[QuestStatus.NOT_STARTED].values() if quest.can_start(hero)]
     
     def get_active_quests(self) -> List[Quest]:
         """Get all currently active quests"""
-        return [quest for quest in self.quests.values() if quest.status == QuestStatus.ACTIVE]
+        return self.get_quests_by_status(QuestStatus.ACTIVE)
+    
+    def _watch(self, hero):
+        """Follow `hero`'s stat changes instead of the previous hero's, re-checking every objective once"""
+        if self._hero is not None:
+            self._hero.unwatch_stats(self.stat_changed)
+        hero.watch_stats(self.stat_changed)
+        self._hero = hero
+        self._objective_index.mark_all_dirty()
+    
+    def stat_changed(self, *stats: str):
+        """Stat listener of the watched hero: re-check only the objectives that depend on `stats`"""
+        self._objective_index.mark_changed(*stats)
     
     def update_all_quests(self, hero):
-        """Update progress for all active quests"""
+        """Update progress for active quests whose objective stats changed"""
+        if hero is not self._hero:
+            self._watch(hero)
+        dirty: Dict[str, List[QuestObjective]] = {}
+        for quest_id, position in self._objective_index.collect_dirty():
+            dirty.setdefault(quest_id, []).append(self.quests[quest_id].objectives[position])
+        if dirty:
+            self._snapshot = None
+        
         newly_completed = []
-        for quest in self.get_active_quests():
-            if quest.update_progress(hero):
+        for quest_id in sorted(dirty, key=self._order.__getitem__):
+            quest = self.quests[quest_id]
+            objectives = sorted(dirty[quest_id], key=quest.objectives.index)
+            if quest.update_progress(hero, objectives):
                 newly_completed.append(quest)
+            else:
+                for objective in objectives:
+                    if objective.completed:
+                        position = quest.objectives.index(objective)
+                        self._objective_index.unsubscribe((quest_id, position), objective.stats)
         return newly_completed
     
+    def snapshot(self) -> Tuple:
+        """Status and objective progress of every quest.
+        
+        The same tuple is returned until a quest changes, so taking a snapshot
+        of an unchanged quest system costs nothing.
+        """
+        if self._snapshot is None:
+            self._snapshot = tuple(
+                (quest.status, quest.completed_objectives,
+                 tuple((objective.current_value, objective.completed) for objective in quest.objectives))
+                for quest in self.quests.values())
+        return self._snapshot
+    
+    def restore(self, snapshot: Tuple):
+        """Return to a state from snapshot(), rebuilding the status buckets and objective index if it differs"""
+        current = self.snapshot()
+        if snapshot is current or snapshot == current:
+            return
+        for quest, saved, live in zip(self.quests.values(), snapshot, current):
+            if saved == live:
+                continue
+            quest.status, quest.completed_objectives, progress = saved
+            for objective, (current_value, completed) in zip(quest.objectives, progress):
+                objective.current_value = current_value
+                objective.completed = completed
+        self._snapshot = snapshot
+        
+        self._by_status = {status: {} for status in QuestStatus}
+        self._objective_index = StatIndex()
+        for quest_id, quest in self.quests.items():
+            self._by_status[quest.status][quest_id] = quest
+            if quest.status == QuestStatus.ACTIVE:
+                self._subscribe_objectives(quest)
+    
     def show_quest_log(self, hero):
         """Display the quest log"""
         print("\n=== QUEST LOG ===")
         
         active_quests = self.get_active_quests()
-        completed_quests = [q for q in self.quests.values() if q.status == QuestStatus.COMPLETED]
+        completed_quests = self.get_quests_by_status(QuestStatus.COMPLETED)
         available_quests = self.get_available_quests(hero)
         
         if active_quests:
@@ -357,7 +485,7 @@ class QuestSystem:
         if not active_quests and not available_quests and not completed_quests:
             print("No quests available at your current level.")
     
-    def visit_npc(self, npc_id: str, hero):
+    def visit_npc(self, npc_id: str, hero) -> Flow:
         """Visit an NPC and interact with them"""
         npc = self.npcs.get(npc_id)
         if not npc:
@@ -389,7 +517,7 @@ class QuestSystem:
                 print()
             
             try:
-                choice = int(input(f"Accept quest (1-{len(available_quests)}) or 0 to leave: "))
+                choice = int((yield from ask(f"Accept quest (1-{len(available_quests)}) or 0 to leave: ")))
                 if 1 <= choice <= len(available_quests):
                     quest = available_quests[choice - 1]
                     quest.start_quest()
@@ -0,0 +1,143 @@
+"""
+Frame Renderer for Text-Based Battle Game
+
+Screens used to be cleared by running the `clear` command in a subshell and
+then printed from scratch, line by line. FrameRenderer keeps a copy of what is
+on the player's terminal instead. clear_screen() starts a new frame, and
+everything printed until the next prompt (title, health bars, menu) is
+composed in memory. When the prompt is shown, the frame is compared with the
+screen and only the lines that changed are rewritten, using ANSI cursor moves,
+in one write together with the prompt.
+
+Text printed between a prompt and the next clear_screen() (combat messages,
+the player's echoed answer) goes out as usual and is recorded as part of the
+screen, so the next frame knows which lines to overwrite or erase.
+
+If the screen may have scrolled or wrapped, the frame is drawn in full
+after a clear, as before. This happens when the screen state is unknown,
+when a frame is taller than the terminal, or when a line is wider than the
+terminal.
+"""
+
+import re
+import shutil
+from typing import List, Optional, Tuple
+
+CLEAR = "\033[2J\033[H"
+CLEAR_LINE = "\033[K"
+CLEAR_BELOW = "\033[J"
+
+# Assumed terminal size where it can't be asked, e.g. for remote sessions
+DEFAULT_SIZE = (80, 24)
+
+_ANSI = re.compile(r"\033\[[0-9;]*[A-Za-z]")
+
+
+def _move(row: int) -> str:
+    return f"\033[{row}H"
+
+
+def display_width(line: str) -> int:
+    """Terminal cells a line takes, counting non-ASCII characters as wide to be safe"""
+    visible = _ANSI.sub("", line)
+    return sum(1 if ord(char) < 128 else 2 for char in visible)
+
+
+class FrameRenderer:
+    """Screen model for one terminal; turns frames into minimal redraws"""
+
+    def __init__(self, size: Optional[Tuple[int, int]] = None):
+        # Fixed (columns, rows), or None to ask the local terminal on every frame
+        self.size = size
+        self._screen: Optional[List[str]] = None  # lines on the terminal, None when unknown
+        self._frame: Optional[List[str]] = None   # text of the frame being composed
+        self.frames = 0
+        self.full_redraws = 0
+
+    @property
+    def composing(self) -> bool:
+        return self._frame is not None
+
+    def terminal_size(self) -> Tuple[int, int]:
+        if self.size is not None:
+            return self.size
+        size = shutil.get_terminal_size(DEFAULT_SIZE)
+        return size.columns, size.lines
+
+    def begin_frame(self):
+        """Start composing a new screen; anything composed but not yet shown is dropped"""
+        self._frame = []
+
+    def compose(self, text: str):
+        self._frame.append(text)
+
+    def track(self, text: str):
+        """Record text that went straight to the terminal"""
+        if self._screen is None:
+            return
+        pieces = text.replace("\r", "").split("\n")
+        self._screen[-1] += pieces[0]
+        self._screen.extend(pieces[1:])
+
+    def echo(self, line: str):
+        """Record the player's answer, which their terminal echoed"""
+        self.track(line + "\n")
+
+    def invalidate(self):
+        """Forget the screen contents so the next frame is drawn in full"""
+        self._screen = None
+
+    def present(self, prompt: str = "") -> str:
+        """Output that shows the composed frame (if any) followed by `prompt`"""
+        if self._frame is None:
+            self.track(prompt)
+            return prompt
+
+        lines = "".join(self._frame).split("\n")
+        self._frame = None
+        self.frames += 1
+        output = self._redraw(lines)
+        self._screen = lines
+        self.track(prompt)
+        return output + prompt
+
+    def _redraw(self, lines: List[str]) -> str:
+        old = self._screen
+        columns, rows = self.terminal_size()
+        if (old is None or len(old) > rows or len(lines) > rows
+                or any(display_width(line) >= columns for line in old)
+                or any(display_width(line) >= columns for line in lines)):
+            self.full_redraws += 1
+            return CLEAR + "\n".join(lines)
+
+        parts = []
+        last = len(lines) - 1
+        for row in range(last):
+            if row >= len(old) or old[row] != lines[row]:
+                parts.append(f"{_move(row + 1)}{lines[row]}{CLEAR_LINE}")
+        # The last line is always rewritten to leave the cursor after it,
+        # and everything below it from the previous screen is erased
+        parts.append(f"{_move(last + 1)}{lines[last]}{CLEAR_BELOW}")
+        return "".join(parts)
+
+
+class FrameStdout:
+    """sys.stdout replacement that composes writes into the renderer's current frame"""
+
+    def __init__(self, stream, renderer: FrameRenderer):
+        self.stream = stream
+        self.renderer = renderer
+
+    def write(self, text: str) -> int:
+        if self.renderer.composing:
+            self.renderer.compose(text)
+        else:
+            self.stream.write(text)
+            self.renderer.track(text)
+        return len(text)
+
+    def flush(self):
+        self.stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
@@ -0,0 +1,252 @@
+"""
+Session Replay for Text-Based Battle Game
+
+Interactive play draws from the global `random` module, so a session is
+fully determined by the seed it starts from, the save file it starts with
+and the answers the player types. The recorder seeds the session and stores
+those three things in a small JSON file. Only real answers are stored;
+"Press Enter" pauses are not.
+
+The replay runner feeds the answers back into a fresh game_session() with
+pauses answered at once, output discarded and events dropped unformatted,
+so even long sessions replay in a fraction of a second. A recording that
+ended normally also stores the final hero and game state. The replay
+compares against it, which lets a folder of recordings serve as a
+regression corpus:
+
+    python main.py --record session.replay      # play and record
+    python replay.py session.replay             # replay, check the outcome
+    python replay.py replays/*.replay --repeat 20   # corpus timing
+    python replay.py session.replay --show      # watch the output
+
+A recording of a session that crashed keeps the error message, and replaying
+it raises the same exception at the same point.
+"""
+
+import argparse
+import base64
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import traceback
+import zlib
+from typing import Callable, List, Optional
+
+import events
+from game_io import Flow, run
+from save_system import SAVE_FILE, SaveSystem
+
+FORMAT = "text-battle-replay"
+VERSION = 1
+
+
+class Recording:
+    """Everything needed to play a session again"""
+
+    def __init__(self, seed: int, save: Optional[dict] = None, answers: Optional[List[str]] = None):
+        self.seed = seed
+        self.save = save            # {"name": file name, "data": compressed file contents} or None
+        self.answers = answers if answers is not None else []
+        self.final: Optional[dict] = None   # save data of the hero and game state at the end
+        self.error: Optional[str] = None    # how the session ended if it crashed
+
+    def to_dict(self) -> dict:
+        return {"format": FORMAT, "version": VERSION, "seed": self.seed, "save": self.save,
+                "answers": self.answers, "final": self.final, "error": self.error}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Recording":
+        if data.get("format") != FORMAT or data.get("version") != VERSION:
+            raise ValueError("Not a replay recording (or an unsupported version)")
+        recording = cls(data["seed"], data.get("save"), list(data["answers"]))
+        recording.final = data.get("final")
+        recording.error = data.get("error")
+        return recording
+
+    def write(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, separators=(",", ":"))
+
+    @classmethod
+    def read(cls, path: str) -> "Recording":
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def _embed_save(save_file: str) -> Optional[dict]:
+    """The save file as it is now, so a replay starts from the same one"""
+    if not os.path.exists(save_file):
+        return None
+    with open(save_file, "rb") as f:
+        data = f.read()
+    return {"name": os.path.basename(save_file), "data": base64.b64encode(zlib.compress(data)).decode()}
+
+
+def _extract_save(save: Optional[dict], directory: str) -> str:
+    """Write an embedded save into `directory` and return the path to play with"""
+    if save is None:
+        return os.path.join(directory, os.path.basename(SAVE_FILE))
+    path = os.path.join(directory, save["name"])
+    with open(path, "wb") as f:
+        f.write(zlib.decompress(base64.b64decode(save["data"])))
+    return path
+
+
+def recorded(flow: Flow, answers: List[str]) -> Flow:
+    """Pass a flow through unchanged, appending every answer except pauses to `answers`"""
+    try:
+        try:
+            prompt = next(flow)
+        except StopIteration as stop:
+            return stop.value
+        while True:
+            answer = yield prompt
+            if not prompt.pause:
+                answers.append(answer)
+            try:
+                prompt = flow.send(answer)
+            except StopIteration as stop:
+                return stop.value
+    finally:
+        flow.close()
+
+
+def record_session(path: str, save_file: str = SAVE_FILE, seed: Optional[int] = None,
+                   input_func: Callable[[str], str] = input, renderer=None):
+    """Play a game in the terminal while recording it to `path`.
+
+    The recording is written however the session ends, including crashes
+    and Ctrl+C.
+    """
+    from main import game_session
+
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+    recording = Recording(seed, _embed_save(save_file))
+    random.seed(seed)
+    try:
+        result = run(recorded(game_session(save_file), recording.answers), input_func, renderer)
+        if result is not None:
+            recording.final = SaveSystem.to_save_data(*result)
+        return result
+    except EOFError:
+        raise  # The player closed the input; the recording just stops there
+    except Exception as error:
+        recording.error = f"{type(error).__name__}: {error}"
+        raise
+    finally:
+        recording.write(path)
+
+
+class ReplayResult:
+    """What happened when a recording was played back"""
+
+    __slots__ = ("prompts", "answers_used", "seconds", "finished", "final")
+
+    def __init__(self, prompts: int, answers_used: int, seconds: float, finished: bool, final: Optional[dict]):
+        self.prompts = prompts
+        self.answers_used = answers_used
+        self.seconds = seconds
+        self.finished = finished    # the game ended on its own rather than running out of answers
+        self.final = final
+
+    def matches(self, recording: Recording) -> bool:
+        """Whether the replay ended in the same state as the recorded session"""
+        return recording.final is not None and self.final == recording.final
+
+
+class _NullStream:
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self):
+        pass
+
+
+def replay(recording: Recording, stream=None) -> ReplayResult:
+    """Play a recording back at full speed.
+
+    Output goes to `stream` if given and is discarded otherwise. Exceptions
+    raised by the game propagate, so a recorded crash can be debugged.
+    """
+    from main import game_session
+
+    start = time.perf_counter()
+    prompts = answers_used = 0
+    finished = False
+    final = None
+    sink = events.TerminalSink() if stream is not None else events.NullSink()
+
+    with tempfile.TemporaryDirectory() as workdir, events.use_sink(sink), \
+            contextlib.redirect_stdout(stream if stream is not None else _NullStream()):
+        random.seed(recording.seed)
+        flow = game_session(_extract_save(recording.save, workdir))
+        try:
+            prompt = next(flow)
+            while True:
+                prompts += 1
+                if prompt.pause:
+                    answer = ""
+                elif answers_used < len(recording.answers):
+                    answer = recording.answers[answers_used]
+                    answers_used += 1
+                else:
+                    break
+                if stream is not None:
+                    print(prompt.text + answer)
+                prompt = flow.send(answer)
+        except StopIteration as stop:
+            finished = True
+            if stop.value is not None:
+                final = SaveSystem.to_save_data(*stop.value)
+        finally:
+            flow.close()
+
+    return ReplayResult(prompts, answers_used, time.perf_counter() - start, finished, final)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded game sessions at full speed.")
+    parser.add_argument("recordings", nargs="+", help="files written by main.py --record")
+    parser.add_argument("--show", action="store_true", help="print the game output instead of discarding it")
+    parser.add_argument("--repeat", type=int, default=1, help="replay each recording this many times")
+    args = parser.parse_args()
+
+    failures = 0
+    for path in args.recordings:
+        recording = Recording.read(path)
+        seconds = []
+        try:
+            for _ in range(args.repeat):
+                result = replay(recording, sys.stdout if args.show else None)
+                seconds.append(result.seconds)
+        except Exception as error:
+            reproduced = f"{type(error).__name__}: {error}"
+            if reproduced == recording.error:
+                print(f"{path}: reproduced the recorded error: {reproduced}")
+            else:
+                failures += 1
+                print(f"{path}: FAILED with {reproduced}")
+                traceback.print_exc()
+            continue
+
+        if recording.final is not None:
+            status = "ok" if result.matches(recording) else "MISMATCH"
+        elif recording.error is not None:
+            status = "MISMATCH (the recorded error did not happen)"
+        else:
+            status = "ok (no final state recorded)"
+        if status.startswith("MISMATCH"):
+            failures += 1
+        print(f"{path}: {status}, {result.prompts} prompts, {len(recording.answers)} answers, "
+              f"best {min(seconds) * 1000:.1f}ms")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Seedable Random Streams for Text-Based Battle Game
+
+Combat, generation and level-up code take an optional `rng` argument. When
+it is left out they fall back to the global `random` module, so interactive
+play behaves as it always has. Simulations pass a GameRNG instead so runs
+can be reproduced from a seed.
+
+Streams are split by path rather than by drawing seeds from a parent stream:
+GameRNG(seed).spawn(3) is the same stream no matter how many other streams
+were spawned before it, which is what makes a seed plus a worker (or chunk)
+index reproduce a run bit-for-bit at any level of parallelism.
+"""
+
+import hashlib
+import random
+from typing import Optional, Tuple
+
+
+def derive_seed(seed: int, *path: int) -> int:
+    """Mix a root seed and a stream path into a 64-bit seed"""
+    key = ":".join(str(part) for part in (seed,) + path).encode()
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big")
+
+
+class GameRNG(random.Random):
+    """A random.Random that remembers its seed and can spawn independent child streams"""
+
+    def __init__(self, seed: Optional[int] = None, path: Tuple[int, ...] = ()):
+        if seed is None:
+            seed = random.SystemRandom().randrange(2 ** 63)
+        self.root_seed = seed
+        self.path = tuple(path)
+        super().__init__(derive_seed(seed, *self.path) if self.path else seed)
+
+    def spawn(self, index: int) -> "GameRNG":
+        """Get the child stream with the given index"""
+        return GameRNG(self.root_seed, self.path + (index,))
+
+    @classmethod
+    def for_worker(cls, seed: int, worker_index: int) -> "GameRNG":
+        """Get the stream for one worker of a seeded run"""
+        return cls(seed).spawn(worker_index)
+
+    def __reduce__(self):
+        # Rebuild from seed and path, then restore the exact position in the stream
+        return (self.__class__, (self.root_seed, self.path), self.getstate())
+
+    def __setstate__(self, state):
+        self.setstate(state)
+
+    def __repr__(self) -> str:
+        return f"GameRNG(seed={self.root_seed}, path={self.path})"
+
+
+def resolve(rng):
+    """Get the stream to draw from: `rng` itself, or the global random module when it is None"""
+    return random if rng is None else rng
+
+
+def numpy_generator(rng):
+    """Get a numpy.random.Generator for the batched NumPy paths.
+
+    A Generator is used as is. Anything else (None, the random module, a
+    random.Random or GameRNG) seeds a new Generator from one 64-bit draw, so
+    a seeded `rng` gives the same batch results every time.
+    """
+    import numpy as np  # Only the optional NumPy paths get here
+
+    if isinstance(rng, np.random.Generator):
+        return rng
+    return np.random.default_rng(resolve(rng).getrandbits(64))
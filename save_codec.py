@@ -0,0 +1,190 @@
+"""
+Binary Save Format for Text-Based Battle Game
+
+This module converts the save dict built by SaveSystem.to_save_data to and
+from a compact, versioned binary layout:
+
+    header    magic "TBBS", format version (uint16), reserved (uint16)
+    numbers   fixed block of struct-packed hero stats and game state
+    name      uint16 length + UTF-8 bytes
+    inventory uint16 count + one uint8 weapon id per item
+    spells    uint8 count + one uint8 spell id per spell
+    dungeons  uint8 count + (uint8 id, uint64 seed, uint8 current room) each
+              (format version 2 and later)
+
+Weapons, spells and classes are stored as their index in ALL_WEAPONS,
+ALL_SPELLS and AVAILABLE_CLASSES, so those lists must only ever be appended to.
+
+Run as a script to convert an existing JSON save:
+
+    python save_codec.py savegame.json [savegame.sav]
+"""
+
+import json
+import struct
+import sys
+from typing import Optional
+
+from character_classes import AVAILABLE_CLASSES
+from spells import ALL_SPELLS
+from weapon import ALL_WEAPONS
+
+MAGIC = b"TBBS"
+FORMAT_VERSION = 2
+# Versions decode_save can read
+SUPPORTED_VERSIONS = (1, 2)
+
+SKILL_ORDER = ("strength", "agility", "intelligence", "luck")
+NO_CLASS = 0xFF
+
+_HEADER = struct.Struct("<4sHH")
+_NUMBERS = struct.Struct("<iiiiiiiiiiBB4iiiiiii")
+_NAME_LENGTH = struct.Struct("<H")
+_INVENTORY_COUNT = struct.Struct("<H")
+_DUNGEON = struct.Struct("<BQB")
+
+_WEAPON_IDS = {weapon.name: index for index, weapon in enumerate(ALL_WEAPONS)}
+_SPELL_IDS = {spell.name: index for index, spell in enumerate(ALL_SPELLS)}
+_CLASS_IDS = {char_class.name: index for index, char_class in enumerate(AVAILABLE_CLASSES)}
+
+
+class SaveFormatError(ValueError):
+    """Raised when binary save data is malformed or from an unknown version"""
+
+
+def encode_save(save_data: dict) -> bytes:
+    """Encode a save dict into the binary format"""
+    hero = save_data["hero"]
+    skills = hero["skills"]
+    character_class = hero.get("character_class")
+
+    numbers = _NUMBERS.pack(
+        hero["health"], hero["health_max"], hero["mana"], hero["mana_max"],
+        hero["level"], hero["experience"], hero["experience_to_next_level"],
+        hero["gold"], hero["potions"], hero["skill_points"],
+        _WEAPON_IDS[hero["weapon"]],
+        _CLASS_IDS[character_class] if character_class else NO_CLASS,
+        *(skills[skill] for skill in SKILL_ORDER),
+        hero["battles_won"], hero["battles_fought"], hero["elite_kills"],
+        hero["boss_kills"], hero["spells_cast"],
+        save_data["game_state"]["turn_count"],
+    )
+
+    name = hero["name"].encode("utf-8")
+    inventory = bytes(_WEAPON_IDS[weapon] for weapon in hero["inventory"])
+    spells = bytes(_SPELL_IDS[spell] for spell in hero["spells"])
+    dungeons = save_data["game_state"].get("dungeons", [])
+
+    return b"".join((
+        _HEADER.pack(MAGIC, FORMAT_VERSION, 0),
+        numbers,
+        _NAME_LENGTH.pack(len(name)), name,
+        _INVENTORY_COUNT.pack(len(inventory)), inventory,
+        bytes((len(spells),)), spells,
+        bytes((len(dungeons),)),
+        *(_DUNGEON.pack(*state) for state in dungeons),
+    ))
+
+
+def decode_save(raw: bytes) -> dict:
+    """Decode binary save data back into a save dict"""
+    try:
+        magic, version, _ = _HEADER.unpack_from(raw, 0)
+        if magic != MAGIC:
+            raise SaveFormatError("Not a binary save file")
+        if version not in SUPPORTED_VERSIONS:
+            raise SaveFormatError(f"Unsupported save format version {version}")
+        offset = _HEADER.size
+
+        (health, health_max, mana, mana_max, level, experience, experience_to_next_level,
+         gold, potions, skill_points, weapon_id, class_id,
+         strength, agility, intelligence, luck,
+         battles_won, battles_fought, elite_kills, boss_kills, spells_cast,
+         turn_count) = _NUMBERS.unpack_from(raw, offset)
+        offset += _NUMBERS.size
+
+        (name_length,) = _NAME_LENGTH.unpack_from(raw, offset)
+        offset += _NAME_LENGTH.size
+        name = raw[offset:offset + name_length].decode("utf-8")
+        offset += name_length
+
+        (inventory_count,) = _INVENTORY_COUNT.unpack_from(raw, offset)
+        offset += _INVENTORY_COUNT.size
+        inventory = raw[offset:offset + inventory_count]
+        offset += inventory_count
+
+        spell_count = raw[offset]
+        spells = raw[offset + 1:offset + 1 + spell_count]
+        offset += 1 + spell_count
+
+        dungeons = []
+        if version >= 2:
+            dungeon_count = raw[offset]
+            offset += 1
+            for _ in range(dungeon_count):
+                dungeons.append(list(_DUNGEON.unpack_from(raw, offset)))
+                offset += _DUNGEON.size
+
+        return {
+            "hero": {
+                "name": name,
+                "health": health,
+                "health_max": health_max,
+                "mana": mana,
+                "mana_max": mana_max,
+                "level": level,
+                "experience": experience,
+                "experience_to_next_level": experience_to_next_level,
+                "gold": gold,
+                "potions": potions,
+                "skill_points": skill_points,
+                "weapon": ALL_WEAPONS[weapon_id].name,
+                "character_class": None if class_id == NO_CLASS else AVAILABLE_CLASSES[class_id].name,
+                "inventory": [ALL_WEAPONS[weapon_id].name for weapon_id in inventory],
+                "spells": [ALL_SPELLS[spell_id].name for spell_id in spells],
+                "skills": dict(zip(SKILL_ORDER, (strength, agility, intelligence, luck))),
+                "battles_won": battles_won,
+                "battles_fought": battles_fought,
+                "elite_kills": elite_kills,
+                "boss_kills": boss_kills,
+                "spells_cast": spells_cast
+            },
+            "game_state": {
+                "turn_count": turn_count,
+                "dungeons": dungeons
+            }
+        }
+    except (struct.error, IndexError, UnicodeDecodeError) as e:
+        raise SaveFormatError(f"Corrupt binary save: {e}") from e
+
+
+def convert_json_save(json_path: str, binary_path: Optional[str] = None) -> str:
+    """Convert a JSON save file to the binary format and return the new file's path"""
+    if binary_path is None:
+        binary_path = json_path.rsplit(".", 1)[0] + ".sav"
+
+    with open(json_path, 'r') as f:
+        save_data = json.load(f)
+
+    # Older saves may predate some fields; fill them in like SaveSystem.load_game does
+    hero = save_data["hero"]
+    hero.setdefault("mana", 50)
+    hero.setdefault("mana_max", 50)
+    hero.setdefault("skill_points", 0)
+    hero.setdefault("character_class", None)
+    hero.setdefault("spells", [])
+    for counter in ("battles_won", "battles_fought", "elite_kills", "boss_kills", "spells_cast"):
+        hero.setdefault(counter, 0)
+    if "skills" not in hero:
+        hero["skills"] = {skill: 10 + hero["level"] for skill in SKILL_ORDER}
+
+    with open(binary_path, 'wb') as f:
+        f.write(encode_save(save_data))
+    return binary_path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) not in (2, 3):
+        print("Usage: python save_codec.py <save.json> [save.sav]")
+        sys.exit(1)
+    print(f"Wrote {convert_json_save(*sys.argv[1:])}")
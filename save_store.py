@@ -0,0 +1,149 @@
+"""
+SQLite Save Store for Text-Based Battle Game
+
+This module keeps many saved heroes in one local SQLite database. Each row
+holds the binary save payload (see save_codec.py) plus indexed columns for
+the hero's name, class, level, gold and save time, so save lists can be
+queried and sorted without decoding any payloads.
+
+The database runs in WAL mode so readers (save lists, loads) never block
+behind a writer, and batches of saves are written in a single transaction.
+
+SaveSystem uses this store for any save file ending in .db, so the main
+menu's save and load work with it unchanged.
+"""
+
+import sqlite3
+import time
+from typing import Iterable, List, Optional, Tuple
+
+from save_codec import decode_save, encode_save
+
+DEFAULT_DATABASE = "saves.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS saves (
+    slot TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    character_class TEXT,
+    level INTEGER NOT NULL,
+    gold INTEGER NOT NULL,
+    saved_at REAL NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS saves_name ON saves (name);
+CREATE INDEX IF NOT EXISTS saves_class_level ON saves (character_class, level);
+CREATE INDEX IF NOT EXISTS saves_level ON saves (level);
+CREATE INDEX IF NOT EXISTS saves_gold ON saves (gold);
+CREATE INDEX IF NOT EXISTS saves_saved_at ON saves (saved_at);
+"""
+
+_SORTABLE_COLUMNS = ("name", "character_class", "level", "gold", "saved_at")
+
+
+class SaveSummary:
+    """Indexed metadata of one save, read without decoding its payload"""
+
+    def __init__(self, slot: str, name: str, character_class: Optional[str], level: int,
+                 gold: int, saved_at: float):
+        self.slot = slot
+        self.name = name
+        self.character_class = character_class
+        self.level = level
+        self.gold = gold
+        self.saved_at = saved_at
+
+    def __repr__(self) -> str:
+        return (f"SaveSummary({self.slot!r}, {self.name!r}, {self.character_class!r}, "
+                f"level={self.level}, gold={self.gold})")
+
+
+class SaveStore:
+    """Multi-slot hero saves in a SQLite database"""
+
+    def __init__(self, path: str = DEFAULT_DATABASE):
+        self.path = path
+        self._conn = sqlite3.connect(path, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self) -> "SaveStore":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._conn.close()
+
+    @staticmethod
+    def _row(hero, game_state, slot: Optional[str], saved_at: float) -> tuple:
+        from save_system import SaveSystem
+        save_data = SaveSystem.to_save_data(hero, game_state)
+        hero_data = save_data["hero"]
+        return (slot or hero.name, hero_data["name"], hero_data["character_class"], hero_data["level"],
+                hero_data["gold"], saved_at, encode_save(save_data))
+
+    def save(self, hero, game_state, slot: Optional[str] = None) -> str:
+        """Save a hero to a slot (the hero's name by default) and return the slot"""
+        return self.save_many([(hero, game_state, slot)])[0]
+
+    def save_many(self, entries: Iterable[Tuple]) -> List[str]:
+        """Save (hero, game_state) or (hero, game_state, slot) entries in one transaction"""
+        saved_at = time.time()
+        rows = [self._row(entry[0], entry[1], entry[2] if len(entry) > 2 else None, saved_at)
+                for entry in entries]
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO saves (slot, name, character_class, level, gold, saved_at, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+        return [row[0] for row in rows]
+
+    def load(self, slot: Optional[str] = None):
+        """Load a slot, or the most recently saved hero when no slot is given.
+
+        Returns (hero, game_state), or (None, None) if there is no such save.
+        """
+        if slot is None:
+            row = self._conn.execute(
+                "SELECT payload FROM saves ORDER BY saved_at DESC LIMIT 1").fetchone()
+        else:
+            row = self._conn.execute("SELECT payload FROM saves WHERE slot = ?", (slot,)).fetchone()
+        if row is None:
+            return None, None
+
+        from save_system import SaveSystem
+        return SaveSystem.from_save_data(decode_save(row[0]))
+
+    def list_saves(self, order_by: str = "saved_at", descending: bool = True, limit: Optional[int] = None,
+                   character_class: Optional[str] = None, min_level: Optional[int] = None) -> List[SaveSummary]:
+        """List saves from the indexed columns only"""
+        if order_by not in _SORTABLE_COLUMNS:
+            raise ValueError(f"Cannot sort saves by {order_by!r}")
+
+        query = "SELECT slot, name, character_class, level, gold, saved_at FROM saves"
+        conditions, params = [], []
+        if character_class is not None:
+            conditions.append("character_class = ?")
+            params.append(character_class)
+        if min_level is not None:
+            conditions.append("level >= ?")
+            params.append(min_level)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += f" ORDER BY {order_by} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+
+        return [SaveSummary(*row) for row in self._conn.execute(query, params)]
+
+    def delete(self, slot: str) -> bool:
+        """Delete a slot and return whether it existed"""
+        with self._conn:
+            return self._conn.execute("DELETE FROM saves WHERE slot = ?", (slot,)).rowcount > 0
+
+    def count(self) -> int:
+        """Number of saved slots"""
+        return self._conn.execute("SELECT COUNT(*) FROM saves").fetchone()[0]
@@ -0,0 +1,181 @@
+"""
+Multi-Session Game Server for Text-Based Battle Game
+
+This module hosts many independent games in one process over plain TCP, so
+players can connect with telnet or netcat. Every connection runs its own
+game_session() flow (see game_io.py) with its own hero, GameState, Shop,
+QuestSystem, AchievementSystem and DungeonSystem. Prompts are awaited socket
+reads on the asyncio event loop, so an idle player costs one suspended
+generator and its game objects rather than a thread.
+
+Players pick a name when they connect and their game is saved to
+<save_dir>/<name>.sav.
+
+    python server.py --port 4000
+    telnet localhost 4000
+"""
+
+import argparse
+import asyncio
+import os
+import re
+import sys
+import traceback
+from typing import List, Optional
+
+import game_io
+import instrumentation
+from dungeons import DEFAULT_TEMPLATE_CACHE_SIZE, TEMPLATE_CACHE
+from main import game_session
+from renderer import FrameRenderer
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 4000
+# Room for bursts of players connecting at once (asyncio defaults to 100)
+LISTEN_BACKLOG = 1024
+# Remote terminal size can't be asked over a raw socket; assume the classic size
+SESSION_TERMINAL_SIZE = (80, 24)
+
+
+class GameServer:
+    """Asyncio TCP server running one game per connection"""
+
+    def __init__(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, save_dir: str = "saves",
+                 idle_timeout: Optional[float] = None, max_sessions: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.save_dir = save_dir
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.active_sessions = 0
+        self.total_sessions = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        """Start listening; returns once the socket is bound"""
+        os.makedirs(self.save_dir, exist_ok=True)
+        game_io.install_session_stdout()
+        self._server = await asyncio.start_server(self.handle_connection, self.host, self.port,
+                                                  backlog=LISTEN_BACKLOG)
+        if self.port == 0:
+            self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def save_path(self, player_name: str) -> str:
+        """Save file for a player, with the name reduced to safe filename characters"""
+        safe_name = re.sub(r"[^A-Za-z0-9_-]", "_", player_name)[:32] or "player"
+        return os.path.join(self.save_dir, f"{safe_name}.sav")
+
+    def session(self) -> game_io.Flow:
+        """The flow for one connection: pick a player name, then play"""
+        print("=== TEXT-BASED BATTLE GAME SERVER ===")
+        player_name = ""
+        while not player_name:
+            player_name = (yield from game_io.ask("Player name: ")).strip()
+        yield from game_session(self.save_path(player_name))
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        if self.max_sessions is not None and self.active_sessions >= self.max_sessions:
+            writer.write(b"Server is full, please try again later.\r\n")
+            await self._close(writer)
+            return
+
+        self.active_sessions += 1
+        self.total_sessions += 1
+        # Each connection runs in its own task, so this only redirects this session's prints
+        output: List[str] = []
+        renderer = FrameRenderer(SESSION_TERMINAL_SIZE)
+        tokens = game_io.begin_session_output(output, renderer)
+        flow = self.session()
+        try:
+            prompt = next(flow)
+            while True:
+                output.append(renderer.present(prompt.text))
+                await self._send(writer, output)
+                line = await self._read_line(reader)
+                if line is None:
+                    break
+                renderer.echo(line)
+                prompt = flow.send(line)
+        except StopIteration:
+            output.append(renderer.present())
+            await self._send(writer, output)
+        except (ConnectionError, asyncio.TimeoutError):
+            pass
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+        finally:
+            flow.close()
+            game_io.end_session_output(tokens)
+            self.active_sessions -= 1
+            await self._close(writer)
+
+    async def _read_line(self, reader: asyncio.StreamReader) -> Optional[str]:
+        """Next line from the player, or None once they disconnect"""
+        if self.idle_timeout is None:
+            data = await reader.readline()
+        else:
+            data = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+        if not data:
+            return None
+        return data.decode("utf-8", errors="replace").rstrip("\r\n")
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, output: List[str]):
+        text = "".join(output).replace("\n", "\r\n")
+        output.clear()
+        writer.write(text.encode("utf-8"))
+        await writer.drain()
+
+    @staticmethod
+    async def _close(writer: asyncio.StreamWriter):
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Host many concurrent games over TCP.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--save-dir", default="saves", help="directory for per-player save files")
+    parser.add_argument("--idle-timeout", type=float, default=None,
+                        help="disconnect players idle for this many seconds")
+    parser.add_argument("--max-sessions", type=int, default=None)
+    parser.add_argument("--profile", action="store_true",
+                        help="time game phases across all sessions; summary on SIGUSR1 and at exit")
+    parser.add_argument("--template-cache-size", type=int, default=DEFAULT_TEMPLATE_CACHE_SIZE,
+                        help="dungeon templates shared between sessions")
+    args = parser.parse_args()
+
+    TEMPLATE_CACHE.resize(args.template_cache_size)
+    if args.profile:
+        instrumentation.enable()
+
+    server = GameServer(args.host, args.port, args.save_dir, args.idle_timeout, args.max_sessions)
+
+    async def serve():
+        await server.start()
+        print(f"Serving on {server.host}:{server.port}")
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
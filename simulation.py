@@ -0,0 +1,314 @@
+"""
+Headless Battle Simulator for Text-Based Battle Game
+
+This module plays hero-vs-enemy fights without any terminal interaction so
+that large numbers of battles can be run for balance checks and capacity
+planning. Battles are split into fixed-size chunks that are spread across a
+process pool, and each chunk returns a small aggregate report that is merged
+in the parent process.
+
+Every chunk draws from its own GameRNG stream derived from the run seed and
+the chunk index, so a seeded run gives identical results with any number of
+workers.
+"""
+
+import argparse
+import contextlib
+import os
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Union
+
+import enemy_ai
+import events
+from character import Hero
+from enemy_pool import ENEMY_POOL
+from rng import GameRNG
+from character_classes import AVAILABLE_CLASSES
+from game_utils import EnemyGenerator
+from weapon import ALL_WEAPONS
+
+# Number of battles handed to a worker at a time
+CHUNK_SIZE = 500
+
+# Safety cap so a stalemate can never hang a worker
+MAX_TURNS = 500
+
+# Actions a hero policy may return besides a Spell instance
+ATTACK = "attack"
+POTION = "potion"
+
+
+def attack_policy(hero, enemy):
+    """Always use a basic weapon attack"""
+    return ATTACK
+
+
+def spell_policy(hero, enemy):
+    """Drink a potion when low, otherwise cast the strongest affordable damage spell or attack"""
+    if hero.health < hero.health_max * 0.3 and hero.potions > 0:
+        return POTION
+
+    best_spell = None
+    for spell in hero.spells:
+        if spell.spell_type == "damage" and spell.mana_cost <= hero.mana:
+            if best_spell is None or spell.damage > best_spell.damage:
+                best_spell = spell
+    return best_spell or ATTACK
+
+
+POLICIES: Dict[str, Callable] = {
+    "attack": attack_policy,
+    "spell": spell_policy,
+}
+
+# Enemy turns: None plays Enemy.ai_action
+ENEMY_AIS: Dict[str, Optional[Callable]] = {
+    "default": None,
+    "utility": enemy_ai.act,
+}
+
+
+class Distribution:
+    """Histogram of integer samples with summary statistics"""
+
+    def __init__(self, counts: Optional[Counter] = None):
+        self.counts = counts if counts is not None else Counter()
+
+    def add(self, value: int):
+        self.counts[value] += 1
+
+    def merge(self, other: "Distribution"):
+        self.counts.update(other.counts)
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def mean(self) -> float:
+        total = self.total
+        if total == 0:
+            return 0.0
+        return sum(value * count for value, count in self.counts.items()) / total
+
+    def percentile(self, fraction: float) -> int:
+        """Get the smallest value with at least `fraction` of samples at or below it"""
+        total = self.total
+        if total == 0:
+            return 0
+        threshold = fraction * total
+        seen = 0
+        for value in sorted(self.counts):
+            seen += self.counts[value]
+            if seen >= threshold:
+                return value
+        return max(self.counts)
+
+
+class SimulationReport:
+    """Aggregate results of a batch of simulated battles"""
+
+    def __init__(self):
+        self.battles = 0
+        self.wins = 0
+        self.turns_to_kill = Distribution()
+        self.gold = Distribution()
+        self.experience = Distribution()
+
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.battles if self.battles else 0.0
+
+    def record(self, won: bool, turns: int, gold: int, experience: int):
+        """Record the outcome of a single battle"""
+        self.battles += 1
+        if won:
+            self.wins += 1
+            self.turns_to_kill.add(turns)
+        self.gold.add(gold)
+        self.experience.add(experience)
+
+    def merge(self, other: "SimulationReport"):
+        """Fold another report into this one"""
+        self.battles += other.battles
+        self.wins += other.wins
+        self.turns_to_kill.merge(other.turns_to_kill)
+        self.gold.merge(other.gold)
+        self.experience.merge(other.experience)
+
+    def summary(self) -> str:
+        """Get a human-readable summary of the report"""
+        lines = [f"Battles: {self.battles}",
+                 f"Win rate: {self.win_rate:.2%}"]
+        for label, dist in (("Turns to kill", self.turns_to_kill),
+                            ("Gold", self.gold),
+                            ("Experience", self.experience)):
+            lines.append(f"{label}: mean {dist.mean():.2f}, "
+                         f"p50 {dist.percentile(0.5)}, p90 {dist.percentile(0.9)}, "
+                         f"p99 {dist.percentile(0.99)}")
+        return "\n".join(lines)
+
+
+def _get_class(class_name: str):
+    for char_class in AVAILABLE_CLASSES:
+        if char_class.name.lower() == class_name.lower():
+            return char_class
+    raise ValueError(f"Unknown character class: {class_name}")
+
+
+def _get_weapon(weapon_name: str):
+    for weapon in ALL_WEAPONS:
+        if weapon.name.lower() == weapon_name.lower():
+            return weapon
+    raise ValueError(f"Unknown weapon: {weapon_name}")
+
+
+def _resolve_policy(policy: Union[str, Callable]) -> Callable:
+    if callable(policy):
+        return policy
+    try:
+        return POLICIES[policy]
+    except KeyError:
+        raise ValueError(f"Unknown hero policy: {policy}") from None
+
+
+def build_hero(class_name: str, level: int = 1, weapon: Optional[str] = None) -> Hero:
+    """Create a fresh hero of the given class, as a new game would, optionally wielding another weapon"""
+    hero = Hero("Hero", 100, level)
+    _get_class(class_name).apply_to_hero(hero)
+    if weapon is not None:
+        hero.equip(_get_weapon(weapon))
+    return hero
+
+
+def _total_experience(hero: Hero) -> int:
+    """Experience earned by a fresh hero, including what was spent on level-ups"""
+    earned = hero.experience
+    threshold = 100
+    while threshold < hero.experience_to_next_level:
+        earned += threshold
+        threshold = int(threshold * 1.5)
+    return earned
+
+
+def take_action(hero: Hero, enemy, action, rng=None):
+    """Play a hero action as returned by a policy: ATTACK, POTION or a Spell"""
+    if action == ATTACK:
+        hero.attack(enemy, rng)
+    elif action == POTION:
+        hero.use_potion(rng)
+    elif hero.cast_spell(action, enemy, rng):
+        hero.change_stat("spells_cast")
+
+
+def simulate_battle(hero: Hero, enemy, policy: Callable, rng=None, max_turns: int = MAX_TURNS,
+                    enemy_ai: Optional[Callable] = None) -> int:
+    """Play one battle to completion, mirroring the turn order of battle_loop.
+
+    `enemy_ai(enemy, hero, rng)` plays the enemy's turns in place of enemy.ai_action.
+    Returns the number of turns played. The hero wins if it is still alive afterwards.
+    """
+    turns = 0
+    while hero.is_alive and enemy.is_alive and turns < max_turns:
+        turns += 1
+        hero.update_buffs()
+        enemy.update_buffs()
+        hero.regenerate_mana()
+
+        take_action(hero, enemy, policy(hero, enemy), rng)
+
+        if enemy.is_alive:
+            if enemy_ai is None:
+                enemy.ai_action(hero, rng)
+            else:
+                enemy_ai(enemy, hero, rng)
+
+    if hero.is_alive and not enemy.is_alive:
+        hero.change_stat("gold", enemy.gold)
+        hero.change_stat("battles_won")
+    return turns
+
+
+def run_chunk(class_name: str, hero_level: int, enemy_level: Optional[int],
+              policy: Union[str, Callable], battles: int, seed: int, chunk_index: int,
+              weapon: Optional[str] = None, enemy_ai: str = "default") -> SimulationReport:
+    """Simulate a chunk of battles in the current process"""
+    rng = GameRNG(seed).spawn(chunk_index)
+    policy = _resolve_policy(policy)
+    enemy_turn = ENEMY_AIS[enemy_ai]
+    report = SimulationReport()
+
+    # Events are dropped unformatted; plain prints from setup code go to devnull
+    with events.use_sink(events.NullSink()), open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        for _ in range(battles):
+            hero = build_hero(class_name, hero_level, weapon)
+            level = enemy_level or max(1, hero_level + rng.randint(-1, 2))
+            enemy = EnemyGenerator.generate_enemy(level, rng)
+            start_gold = hero.gold
+
+            turns = simulate_battle(hero, enemy, policy, rng, enemy_ai=enemy_turn)
+            won = hero.is_alive and not enemy.is_alive
+            report.record(won, turns, hero.gold - start_gold, _total_experience(hero))
+            ENEMY_POOL.release(enemy)
+
+    return report
+
+
+def run_simulation(battles: int, class_name: str = "Warrior", hero_level: int = 1,
+                   enemy_level: Optional[int] = None, policy: Union[str, Callable] = "attack",
+                   workers: Optional[int] = None, seed: Optional[int] = None,
+                   enemy_ai: str = "default") -> SimulationReport:
+    """Simulate many battles, spreading chunks of them across a process pool.
+
+    Custom policies must be module-level functions so they can be sent to
+    worker processes.
+    """
+    _get_class(class_name)
+    _resolve_policy(policy)
+    if enemy_ai not in ENEMY_AIS:
+        raise ValueError(f"Unknown enemy AI: {enemy_ai}")
+    if seed is None:
+        seed = random.SystemRandom().randrange(2 ** 32)
+
+    chunks: List[tuple] = []
+    for index, start in enumerate(range(0, battles, CHUNK_SIZE)):
+        count = min(CHUNK_SIZE, battles - start)
+        chunks.append((class_name, hero_level, enemy_level, policy, count, seed, index, None, enemy_ai))
+
+    report = SimulationReport()
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            report.merge(run_chunk(*chunk))
+        return report
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_chunk, *chunk) for chunk in chunks]
+        for future in futures:
+            report.merge(future.result())
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run headless hero-vs-enemy battle simulations.")
+    parser.add_argument("battles", type=int, help="number of battles to simulate")
+    parser.add_argument("--class", dest="class_name", default="Warrior",
+                        choices=[c.name for c in AVAILABLE_CLASSES])
+    parser.add_argument("--level", type=int, default=1, help="hero level")
+    parser.add_argument("--enemy-level", type=int, default=None,
+                        help="fixed enemy level (default: scaled to the hero like battle_loop)")
+    parser.add_argument("--policy", default="attack", choices=sorted(POLICIES))
+    parser.add_argument("--enemy-ai", default="default", choices=sorted(ENEMY_AIS),
+                        help="how enemies pick their actions (default: attack, or skip a turn)")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+
+    report = run_simulation(args.battles, args.class_name, args.level, args.enemy_level,
+                            args.policy, args.workers, args.seed, args.enemy_ai)
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    main()
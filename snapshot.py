@@ -0,0 +1,61 @@
+"""
+Game Snapshots for Text-Based Battle Game
+
+A GameSnapshot captures the state of one game (hero, game state, achievements,
+quests and dungeons) and restores it into the same objects later. AI
+lookahead, "what-if" previews and undo all branch off the current game this
+way, without a deepcopy of the whole object graph.
+
+Each object snapshots itself and shares whatever it can:
+
+- The hero is one dict copy plus copies of its skills, buffs, spells and
+  inventory. Containers that are unchanged since the base snapshot share
+  that snapshot's copy.
+- The achievement and quest systems cache an immutable record of their
+  progress until something changes. Snapshots of unchanged systems are the
+  same object, and restoring them is an identity check. Only a real change
+  rebuilds the stat indexes.
+- Dungeons store their seed, position and the room the hero is in.
+
+    snapshot = GameSnapshot(hero, game_state, achievement_system, quest_system, dungeon_system)
+    ...play on...
+    snapshot.restore()   # back to where the snapshot was taken; can be repeated
+
+Pass the previous snapshot as `base` when taking snapshots in a series, for
+example an undo history, so unchanged containers are shared between them.
+"""
+
+from typing import Optional
+
+
+class GameSnapshot:
+    """The state of one game, restorable into the objects it was captured from"""
+
+    __slots__ = ("hero", "game_state", "achievement_system", "quest_system", "dungeon_system",
+                 "hero_state", "game_state_state", "achievements", "quests", "dungeons")
+
+    def __init__(self, hero, game_state=None, achievement_system=None, quest_system=None,
+                 dungeon_system=None, base: Optional["GameSnapshot"] = None):
+        self.hero = hero
+        self.game_state = game_state
+        self.achievement_system = achievement_system
+        self.quest_system = quest_system
+        self.dungeon_system = dungeon_system
+
+        self.hero_state = hero.snapshot(base.hero_state if base is not None else None)
+        self.game_state_state = game_state.snapshot() if game_state is not None else None
+        self.achievements = achievement_system.snapshot() if achievement_system is not None else None
+        self.quests = quest_system.snapshot() if quest_system is not None else None
+        self.dungeons = dungeon_system.snapshot() if dungeon_system is not None else None
+
+    def restore(self):
+        """Put every captured object back into the state it was in"""
+        self.hero.restore(self.hero_state)
+        if self.game_state is not None:
+            self.game_state.restore(self.game_state_state)
+        if self.achievement_system is not None:
+            self.achievement_system.restore(self.achievements)
+        if self.quest_system is not None:
+            self.quest_system.restore(self.quests)
+        if self.dungeon_system is not None:
+            self.dungeon_system.restore(self.dungeons)
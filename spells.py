@@ -1,4 +1,5 @@
-import random
+import events
+import rng as rng_streams
 
 class Spell:
     def __init__(self, name: str, damage: int, mana_cost: int, spell_type: str, description: str = ""):
@@ -8,27 +9,28 @@ class Spell:
         self.spell_type = spell_type  # "damage", "heal", "buff", "debuff"
         self.description = description
 
-    def cast(self, caster, target=None):
+    def cast(self, caster, target=None, rng=None):
         """Cast the spell and return success status"""
         if caster.mana < self.mana_cost:
-            print(f"{caster.name} doesn't have enough mana to cast {self.name}!")
+            events.emit("not_enough_mana", character=caster.name, spell=self.name)
             return False
         
         caster.mana -= self.mana_cost
+        rng = rng_streams.resolve(rng)
         
         if self.spell_type == "damage" and target:
-            damage = self.damage + random.randint(-2, 2)  # Slight variance
+            damage = self.damage + rng.randint(-2, 2)  # Slight variance
             target.take_damage(damage)
-            print(f"{caster.name} casts {self.name} dealing {damage} magic damage to {target.name}!")
+            events.emit("spell_damage", character=caster.name, spell=self.name, damage=damage, target=target.name)
         
         elif self.spell_type == "heal":
-            heal_amount = self.damage + random.randint(-5, 5)
+            heal_amount = self.damage + rng.randint(-5, 5)
             caster.heal(heal_amount)
-            print(f"{caster.name} casts {self.name} and heals for {heal_amount} HP!")
+            events.emit("spell_heal", character=caster.name, spell=self.name, amount=heal_amount)
         
         elif self.spell_type == "buff":
             # Apply temporary buff (simplified)
-            print(f"{caster.name} casts {self.name} and feels empowered!")
+            events.emit("spell_buff", character=caster.name, spell=self.name)
             return {"type": "buff", "duration": 3, "effect": "damage_boost"}
         
         return True
@@ -40,3 +42,6 @@ lightning_bolt = Spell("Lightning Bolt", 12, 25, "damage", "A devastating bolt o
 minor_heal = Spell("Minor Heal", 15, 10, "heal", "A small healing spell")
 frost_lance = Spell("Frost Lance", 10, 18, "damage", "A piercing shard of ice")
 divine_blessing = Spell("Divine Blessing", 0, 30, "buff", "Temporarily increases combat effectiveness")
+
+# All spells in a fixed order. New spells must be appended so ids stay stable.
+ALL_SPELLS = [fireball, heal, lightning_bolt, minor_heal, frost_lance, divine_blessing]
@@ -0,0 +1,67 @@
+"""
+Stat Change Tracking for Text-Based Battle Game
+
+Achievements and quest objectives only need re-checking when one of the hero
+stats they read has changed. StatIndex maps each watched stat to the keys
+(achievements, objectives, ...) that depend on it and reports which keys
+became dirty.
+
+Changes are pushed, never polled: the hero's mutators (change_stat,
+level_up, learn_spell, restore) tell their stat listeners which stats they
+changed, and the systems that own an index forward that to mark_changed().
+A tick therefore costs O(changed stats), however many stats are watched.
+"""
+
+from typing import Dict, Hashable, Iterable, List, Set
+
+
+class StatIndex:
+    """Index of which keys depend on which hero stats"""
+
+    def __init__(self):
+        self._subscribers: Dict[str, Set[Hashable]] = {}
+        self._dirty: Set[Hashable] = set()
+
+    def subscribe(self, key: Hashable, stats: Iterable[str]):
+        """Make `key` depend on `stats`. New subscriptions start dirty."""
+        for stat in stats:
+            self._subscribers.setdefault(stat, set()).add(key)
+        self._dirty.add(key)
+
+    def unsubscribe(self, key: Hashable, stats: Iterable[str]):
+        """Remove `key` from the index for good"""
+        for stat in stats:
+            keys = self._subscribers.get(stat)
+            if keys is None:
+                continue
+            keys.discard(key)
+            if not keys:
+                del self._subscribers[stat]
+        self._dirty.discard(key)
+
+    def mark_changed(self, *stats: str):
+        """Flag the keys that depend on `stats` as dirty"""
+        for stat in stats:
+            keys = self._subscribers.get(stat)
+            if keys:
+                self._dirty.update(keys)
+
+    def mark_dirty(self, *keys: Hashable):
+        """Flag specific keys as dirty"""
+        self._dirty.update(keys)
+
+    def mark_all_dirty(self):
+        """Flag every subscribed key as dirty, e.g. after a different hero is loaded"""
+        for keys in self._subscribers.values():
+            self._dirty.update(keys)
+
+    def collect_dirty(self) -> List[Hashable]:
+        """Return (and clear) the dirty keys"""
+        dirty = list(self._dirty)
+        self._dirty.clear()
+        return dirty
+
+    @property
+    def watched_stats(self) -> List[str]:
+        return list(self._subscribers)
+
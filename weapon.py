@@ -1,4 +1,4 @@
-import random
+import rng as rng_streams
 
 class Weapon:
     def __init__(self, name: str, weapon_type: str, damage: int, value: int, 
@@ -10,9 +10,9 @@ class Weapon:
         self.crit_chance = crit_chance
         self.description = description
 
-    def calculate_damage(self) -> tuple[int, bool]:
+    def calculate_damage(self, rng=None) -> tuple[int, bool]:
         """Calculate damage with critical hit chance"""
-        is_crit = random.random() < self.crit_chance
+        is_crit = rng_streams.resolve(rng).random() < self.crit_chance
         damage = self.damage * 2 if is_crit else self.damage
         return damage, is_crit
 
@@ -28,4 +28,7 @@ steel_sword = Weapon("Steel Sword", "sharp", 8, 25, 0.12, "A superior blade made
 magic_staff = Weapon("Magic Staff", "magic", 6, 15, 0.25, "A staff imbued with magical energy")
 war_hammer = Weapon("War Hammer", "blunt", 7, 20, 0.08, "A heavy hammer that crushes enemies")
 crossbow = Weapon("Crossbow", "ranged", 9, 30, 0.18, "A powerful mechanical bow")
-dagger = Weapon("Dagger", "sharp", 3, 5, 0.3, "A quick and agile blade")
\ No newline at end of file
+dagger = Weapon("Dagger", "sharp", 3, 5, 0.3, "A quick and agile blade")
+
+# All weapons in a fixed order. New weapons must be appended so ids stay stable.
+ALL_WEAPONS = [fists, dagger, iron_sword, short_bow, magic_staff, war_hammer, steel_sword, crossbow]